@@ -0,0 +1,110 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.commons.models import Estado, Prioridad
+from apps.historial.models import DetalleHistorial, Historial
+from .estadisticas import CAMPOS_ESTADISTICA, aplicar_cambios
+from .models import Bug
+
+# Campos que admite la actualización masiva -> (columna, modelo y atributo para el historial)
+CAMPOS_MASIVOS = {
+    'estado': ('estado_id', Estado, 'nombre'),
+    'prioridad': ('prioridad_id', Prioridad, 'nombre'),
+    'asignado_a': ('asignado_a_id', Usuario, 'nick'),
+}
+
+MAX_BUGS_MASIVOS = 500
+
+
+def _nombres(campo, ids):
+    _, modelo, atributo = CAMPOS_MASIVOS[campo]
+    return dict(modelo.objects.filter(id__in=ids).values_list('id', atributo))
+
+
+def actualizar_bugs(bug_ids, cambios, usuario):
+    """
+    Aplica los mismos cambios (campo -> id) a varios bugs con un único UPDATE y deja
+    el registro en Historial/DetalleHistorial, todo en una transacción.
+
+    QuerySet.update() no pasa por save() ni por las señales, así que aquí mismo se
+    ajustan las estadísticas materializadas. Retorna la cantidad de bugs modificados.
+    """
+    columnas = {CAMPOS_MASIVOS[campo][0]: valor for campo, valor in cambios.items()}
+    if not columnas or not bug_ids:
+        return 0
+
+    with transaction.atomic():
+        # Se bloquean las filas para que los valores anteriores del historial sean los reales
+        anteriores = list(
+            Bug.objects.select_for_update()
+            .filter(id__in=bug_ids)
+            .order_by('id')
+            .values('id', *CAMPOS_ESTADISTICA, 'asignado_a_id')
+        )
+        modificados = [
+            fila for fila in anteriores
+            if any(fila[columna] != valor for columna, valor in columnas.items())
+        ]
+        if not modificados:
+            return 0
+
+        ahora = timezone.now()
+        Bug.objects.filter(id__in=[fila['id'] for fila in modificados]).update(
+            actualizacion=ahora, **columnas
+        )
+
+        aplicar_cambios(
+            (
+                {campo: fila[campo] for campo in CAMPOS_ESTADISTICA},
+                {campo: columnas.get(campo, fila[campo]) for campo in CAMPOS_ESTADISTICA},
+            )
+            for fila in modificados
+        )
+
+        # Nombres legibles para el historial, con una consulta por campo
+        nombres = {
+            campo: _nombres(campo, {fila[CAMPOS_MASIVOS[campo][0]] for fila in modificados} | {valor})
+            for campo, valor in cambios.items()
+        }
+
+        historiales = []
+        detalles = []
+        for fila in modificados:
+            cambiados = [
+                campo for campo, valor in cambios.items()
+                if fila[CAMPOS_MASIVOS[campo][0]] != valor
+            ]
+            historial = Historial(
+                usuario=usuario,
+                estado_id=cambios.get('estado'),
+                descripcion=f"Actualización masiva: {', '.join(cambiados)}",
+                proyecto_id=fila['proyecto_id'],
+                bug_id=fila['id'],
+            )
+            historiales.append(historial)
+            for campo in cambiados:
+                anterior = fila[CAMPOS_MASIVOS[campo][0]]
+                detalles.append((historial, DetalleHistorial(
+                    campo=campo,
+                    valor_anterior=nombres[campo].get(anterior),
+                    valor_nuevo=nombres[campo].get(cambios[campo]),
+                )))
+
+        Historial.objects.bulk_create(historiales)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Sin RETURNING (p. ej. MySQL) bulk_create no asigna ids: se releen por la clave
+            # del lote (usuario, bugs y creacion desde 'ahora'). Los bugs siguen bloqueados,
+            # así que el último historial de cada uno es el recién creado.
+            ids = dict(
+                Historial.objects.filter(
+                    usuario=usuario, bug_id__in=[fila['id'] for fila in modificados], creacion__gte=ahora
+                ).order_by('id').values_list('bug_id', 'id')
+            )
+            for historial in historiales:
+                historial.pk = ids[historial.bug_id]
+        for historial, detalle in detalles:
+            detalle.historial = historial
+        DetalleHistorial.objects.bulk_create([detalle for _, detalle in detalles])
+
+    return len(modificados)
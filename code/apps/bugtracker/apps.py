@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BugtrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bugtracker'
+
+    def ready(self):
+        from .signals import busqueda, catalogos, comentarios, duplicados, estadisticas
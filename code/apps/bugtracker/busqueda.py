@@ -0,0 +1,174 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Bug, ComentarioBug, EstadisticaBug, TerminoBug
+
+# Peso relativo de cada campo al calcular la relevancia
+PESO_TITULO = 3
+PESO_DESCRIPCION = 1
+PESO_COMENTARIO = 1
+
+# Límites para mantener acotado el costo de una consulta
+MAX_TOKENS_CONSULTA = 8
+MAX_RESULTADOS = 50
+# Los términos presentes en más de esta fracción de bugs no discriminan y se ignoran
+FRACCION_TERMINO_COMUN = 0.5
+
+LONGITUD_TOKEN = TerminoBug._meta.get_field('token').max_length
+
+PALABRAS_VACIAS = frozenset({
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'es', 'la', 'las', 'lo', 'los',
+    'no', 'o', 'para', 'por', 'que', 'se', 'si', 'su', 'un', 'una', 'y',
+    'the', 'and', 'of', 'to', 'is', 'in', 'on', 'it',
+})
+
+PATRON_TOKEN = re.compile(r'\w+')
+
+
+def tokenizar(texto):
+    """Normaliza el texto (minúsculas, sin tildes) y lo divide en tokens indexables"""
+    if not texto:
+        return []
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return [
+        token[:LONGITUD_TOKEN]
+        for token in PATRON_TOKEN.findall(texto)
+        if len(token) > 1 and token not in PALABRAS_VACIAS
+    ]
+
+
+def _entradas(bug_id, comentario_id, textos):
+    """Construye las filas del índice para un documento a partir de (texto, peso)"""
+    pesos = Counter()
+    for texto, peso in textos:
+        for token in tokenizar(texto):
+            pesos[token] += peso
+    return [
+        TerminoBug(token=token, bug_id=bug_id, comentario_id=comentario_id, peso=peso)
+        for token, peso in pesos.items()
+    ]
+
+
+def indexar_bug(bug):
+    """Reemplaza las entradas del índice correspondientes al título y la descripción del bug"""
+    with transaction.atomic():
+        TerminoBug.objects.filter(bug_id=bug.pk, comentario__isnull=True).delete()
+        TerminoBug.objects.bulk_create(_entradas(bug.pk, None, [
+            (bug.titulo, PESO_TITULO),
+            (bug.descripcion, PESO_DESCRIPCION),
+        ]))
+
+
+def indexar_comentario(comentario):
+    """Reemplaza las entradas del índice correspondientes a un comentario"""
+    with transaction.atomic():
+        TerminoBug.objects.filter(comentario_id=comentario.pk).delete()
+        TerminoBug.objects.bulk_create(_entradas(comentario.bug_id, comentario.pk, [
+            (comentario.comentario, PESO_COMENTARIO),
+        ]))
+
+
+def indexar_lote(bugs, comentarios=(), tamano_lote=1000):
+    """Indexa bugs y comentarios recién insertados en bloque (bulk_create no dispara señales)"""
+    entradas = []
+    for bug in bugs:
+        entradas.extend(_entradas(bug.pk, None, [
+            (bug.titulo, PESO_TITULO),
+            (bug.descripcion, PESO_DESCRIPCION),
+        ]))
+    for comentario in comentarios:
+        entradas.extend(_entradas(comentario.bug_id, comentario.pk, [
+            (comentario.comentario, PESO_COMENTARIO),
+        ]))
+    TerminoBug.objects.bulk_create(entradas, batch_size=tamano_lote)
+
+
+def reconstruir_indice(tamano_lote=1000):
+    """Reconstruye el índice completo recorriendo bugs y comentarios por lotes"""
+    TerminoBug.objects.all().delete()
+    total = 0
+
+    entradas = []
+    for bug in Bug.objects.only('id', 'titulo', 'descripcion').iterator(chunk_size=tamano_lote):
+        entradas.extend(_entradas(bug.pk, None, [
+            (bug.titulo, PESO_TITULO),
+            (bug.descripcion, PESO_DESCRIPCION),
+        ]))
+        if len(entradas) >= tamano_lote:
+            total += len(TerminoBug.objects.bulk_create(entradas, batch_size=tamano_lote))
+            entradas = []
+
+    comentarios = ComentarioBug.objects.only('id', 'bug_id', 'comentario')
+    for comentario in comentarios.iterator(chunk_size=tamano_lote):
+        entradas.extend(_entradas(comentario.bug_id, comentario.pk, [
+            (comentario.comentario, PESO_COMENTARIO),
+        ]))
+        if len(entradas) >= tamano_lote:
+            total += len(TerminoBug.objects.bulk_create(entradas, batch_size=tamano_lote))
+            entradas = []
+
+    total += len(TerminoBug.objects.bulk_create(entradas, batch_size=tamano_lote))
+    return total
+
+
+def buscar_bugs(consulta, limite=20, proyecto_id=None):
+    """
+    Busca bugs que contengan todos los términos de la consulta en su título,
+    descripción o comentarios. Retorna una lista de (bug, puntaje) ordenada por
+    relevancia (frecuencia ponderada por campo × idf).
+    """
+    tokens = list(dict.fromkeys(tokenizar(consulta)))[:MAX_TOKENS_CONSULTA]
+    if not tokens:
+        return []
+    limite = min(limite, MAX_RESULTADOS)
+
+    frecuencias = dict(
+        TerminoBug.objects.filter(token__in=tokens)
+        .values('token')
+        .annotate(df=Count('bug', distinct=True))
+        .values_list('token', 'df')
+    )
+    # Todos los términos deben aparecer al menos una vez
+    if len(frecuencias) < len(tokens):
+        return []
+
+    # Total de bugs desde las estadísticas materializadas (una fila 'total' por proyecto)
+    # sin recorrer la tabla. Los bugs sin proyecto no se cuentan ahí: el total nunca
+    # se toma menor que la frecuencia de un término
+    total_bugs = max(
+        EstadisticaBug.objects.filter(dimension='total').aggregate(n=Sum('total'))['n'] or 0,
+        *frecuencias.values(),
+    )
+    discriminantes = [t for t in tokens if frecuencias[t] <= total_bugs * FRACCION_TERMINO_COMUN]
+    tokens = discriminantes or tokens
+
+    ponderacion = Case(
+        *[When(token=t, then=Value(math.log(1 + total_bugs / frecuencias[t]))) for t in tokens],
+        output_field=FloatField(),
+    )
+
+    entradas = TerminoBug.objects.filter(token__in=tokens)
+    if proyecto_id:
+        entradas = entradas.filter(bug__proyecto_id=proyecto_id)
+
+    ranking = list(
+        entradas.values('bug_id')
+        .annotate(
+            coincidencias=Count('token', distinct=True),
+            puntaje=Sum(F('peso') * ponderacion, output_field=FloatField()),
+        )
+        .filter(coincidencias=len(tokens))
+        .order_by('-puntaje', '-bug_id')
+        .values_list('bug_id', 'puntaje')[:limite]
+    )
+
+    bugs = Bug.objects.select_related('proyecto', 'estado', 'prioridad').in_bulk(
+        [bug_id for bug_id, _ in ranking]
+    )
+    return [(bugs[bug_id], puntaje) for bug_id, puntaje in ranking if bug_id in bugs]
@@ -0,0 +1,42 @@
+from apps.commons.catalogos import obtener_catalogo
+from apps.commons.models import Estado, Prioridad
+from apps.proyectos.models import Proyecto, Sprint
+
+# Prioridades (y severidades) que se ofrecen para los bugs
+PRIORIDADES_BUG = ['Baja', 'Media', 'Alta', 'Crítica']
+
+
+def catalogo_proyectos():
+    return obtener_catalogo('proyectos', lambda: Proyecto.objects.all())
+
+
+def catalogo_estados():
+    return obtener_catalogo('estados', lambda: Estado.objects.all())
+
+
+def catalogo_prioridades():
+    return obtener_catalogo(
+        'prioridades_bug', lambda: Prioridad.objects.filter(nombre__in=PRIORIDADES_BUG)
+    )
+
+
+def catalogo_sprints():
+    return obtener_catalogo('sprints', lambda: Sprint.objects.select_related('proyecto').all())
+
+
+def catalogos_bug():
+    """
+    Catálogos de los formularios y filtros de bugs, leídos una sola vez. Las vistas
+    que muestran varios formularios los construyen aquí y los pasan a cada uno.
+    """
+    return {
+        'proyectos': catalogo_proyectos(),
+        'estados': catalogo_estados(),
+        'prioridades': catalogo_prioridades(),
+        'sprints': catalogo_sprints(),
+    }
+
+
+def opciones(catalogo):
+    """Convierte un catálogo en choices para un campo de formulario"""
+    return [('', '---------')] + [(obj.pk, str(obj)) for obj in catalogo]
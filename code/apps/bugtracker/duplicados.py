@@ -0,0 +1,142 @@
+import hashlib
+import random
+
+from django.db import transaction
+from django.db.models import Count
+
+from .busqueda import tokenizar
+from .models import BandaBug, Bug
+
+# Parámetros MinHash/LSH: con 16 bandas de 4 filas, dos bugs con similitud de Jaccard
+# 0.5 comparten al menos una cubeta con probabilidad ~0.65, y con 0.8 casi siempre.
+NUM_PERMUTACIONES = 64
+FILAS_POR_BANDA = 4
+NUM_BANDAS = NUM_PERMUTACIONES // FILAS_POR_BANDA
+
+LONGITUD_SHINGLE = 5
+# Solo el comienzo de descripciones muy largas aporta a la firma
+LONGITUD_MAXIMA_TEXTO = 2000
+
+UMBRAL_SIMILITUD = 0.5
+MAX_CANDIDATOS = 50
+
+_PRIMO = (1 << 61) - 1
+_generador = random.Random(7919)
+# Permutaciones h(x) = (a·x + b) mod p; fijas para que las firmas sean estables entre procesos
+_COEFICIENTES = [
+    (_generador.randrange(1, _PRIMO), _generador.randrange(0, _PRIMO))
+    for _ in range(NUM_PERMUTACIONES)
+]
+
+
+def _hash64(datos):
+    return int.from_bytes(hashlib.blake2b(datos, digest_size=8).digest(), 'big')
+
+
+def shingles(titulo, descripcion):
+    """Conjunto de k-gramas de caracteres del texto normalizado (sin tildes ni palabras vacías)"""
+    texto = ' '.join(tokenizar(f"{titulo or ''} {descripcion or ''}"[:LONGITUD_MAXIMA_TEXTO]))
+    if len(texto) <= LONGITUD_SHINGLE:
+        return {texto} if texto else set()
+    return {texto[i:i + LONGITUD_SHINGLE] for i in range(len(texto) - LONGITUD_SHINGLE + 1)}
+
+
+def firma(conjunto):
+    """Firma MinHash: el mínimo de cada permutación sobre los hashes de los shingles"""
+    valores = [_hash64(shingle.encode()) for shingle in conjunto]
+    return [min((a * valor + b) % _PRIMO for valor in valores) for a, b in _COEFICIENTES]
+
+
+def bandas(firma_bug):
+    """Hash de cada banda (incluye el número de banda para no mezclar cubetas entre bandas)"""
+    hashes = []
+    for banda in range(NUM_BANDAS):
+        filas = firma_bug[banda * FILAS_POR_BANDA:(banda + 1) * FILAS_POR_BANDA]
+        crudo = f"{banda}:{','.join(map(str, filas))}".encode()
+        # Se recorta a 63 bits para que quepa en un BigIntegerField con signo
+        hashes.append(_hash64(crudo) & ((1 << 63) - 1))
+    return hashes
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _entradas(bug):
+    conjunto = shingles(bug.titulo, bug.descripcion)
+    if not conjunto:
+        return []
+    return [
+        BandaBug(proyecto_id=bug.proyecto_id, bug_id=bug.pk, hash=valor)
+        for valor in bandas(firma(conjunto))
+    ]
+
+
+def indexar_firma(bug):
+    """Reemplaza las cubetas LSH del bug a partir de su título, descripción y proyecto actuales"""
+    with transaction.atomic():
+        BandaBug.objects.filter(bug_id=bug.pk).delete()
+        BandaBug.objects.bulk_create(_entradas(bug))
+
+
+def indexar_firmas_lote(bugs, tamano_lote=1000):
+    """Indexa bugs recién insertados en bloque (bulk_create no dispara señales)"""
+    entradas = []
+    for bug in bugs:
+        entradas.extend(_entradas(bug))
+    BandaBug.objects.bulk_create(entradas, batch_size=tamano_lote)
+
+
+def reconstruir_firmas(tamano_lote=1000):
+    """Reconstruye el índice LSH completo recorriendo los bugs por lotes"""
+    BandaBug.objects.all().delete()
+    total = 0
+    entradas = []
+    for bug in Bug.objects.only('id', 'proyecto_id', 'titulo', 'descripcion').iterator(chunk_size=tamano_lote):
+        entradas.extend(_entradas(bug))
+        if len(entradas) >= tamano_lote:
+            total += len(BandaBug.objects.bulk_create(entradas, batch_size=tamano_lote))
+            entradas = []
+    total += len(BandaBug.objects.bulk_create(entradas, batch_size=tamano_lote))
+    return total
+
+
+def buscar_duplicados(titulo, descripcion, proyecto_id=None, excluir_id=None, limite=5):
+    """
+    Busca bugs del mismo proyecto probablemente duplicados del texto dado.
+
+    Las cubetas LSH acotan los candidatos con una búsqueda indexada por (proyecto, hash),
+    sin recorrer los bugs del proyecto; solo los candidatos se comparan con la similitud
+    de Jaccard exacta. Retorna una lista de (bug, similitud) de mayor a menor.
+    """
+    conjunto = shingles(titulo, descripcion)
+    if not conjunto:
+        return []
+
+    cubetas = BandaBug.objects.filter(hash__in=bandas(firma(conjunto)))
+    if proyecto_id:
+        cubetas = cubetas.filter(proyecto_id=proyecto_id)
+    else:
+        cubetas = cubetas.filter(proyecto__isnull=True)
+    if excluir_id:
+        cubetas = cubetas.exclude(bug_id=excluir_id)
+
+    candidatos = list(
+        cubetas.values('bug_id')
+        .annotate(coincidencias=Count('id'))
+        .order_by('-coincidencias', '-bug_id')
+        .values_list('bug_id', flat=True)[:MAX_CANDIDATOS]
+    )
+    if not candidatos:
+        return []
+
+    resultados = []
+    for bug in Bug.objects.select_related('estado').filter(id__in=candidatos):
+        similitud = jaccard(conjunto, shingles(bug.titulo, bug.descripcion))
+        if similitud >= UMBRAL_SIMILITUD:
+            resultados.append((bug, similitud))
+
+    resultados.sort(key=lambda par: (-par[1], -par[0].id))
+    return resultados[:limite]
@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Bug, EstadisticaBug
+
+# Campos del bug que alimentan cada dimensión de la estadística
+CAMPOS_DIMENSION = {
+    'estado': 'estado_id',
+    'prioridad': 'prioridad_id',
+    'severidad': 'severidad_id',
+}
+CAMPOS_ESTADISTICA = ('proyecto_id',) + tuple(CAMPOS_DIMENSION.values())
+
+
+def claves_bug(valores):
+    """
+    Devuelve las filas de EstadisticaBug (proyecto_id, dimension, valor_id) a las
+    que aporta un bug con los valores dados. Los bugs sin proyecto no se cuentan.
+    """
+    proyecto_id = valores.get('proyecto_id')
+    if not proyecto_id:
+        return []
+    claves = [(proyecto_id, 'total', 0)]
+    for dimension, campo in CAMPOS_DIMENSION.items():
+        claves.append((proyecto_id, dimension, valores.get(campo) or 0))
+    return claves
+
+
+def _sumar(proyecto_id, dimension, valor_id, delta):
+    filtro = {'proyecto_id': proyecto_id, 'dimension': dimension, 'valor_id': valor_id}
+    if EstadisticaBug.objects.filter(**filtro).update(total=F('total') + delta):
+        return
+    try:
+        with transaction.atomic():
+            EstadisticaBug.objects.create(total=delta, **filtro)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el update y el create
+        EstadisticaBug.objects.filter(**filtro).update(total=F('total') + delta)
+
+
+def aplicar_cambios(pares):
+    """
+    Ajusta los conteos para varios bugs a la vez. Cada par es (anteriores, nuevos),
+    con None para un bug creado o eliminado. Los deltas se agrupan por fila.
+    """
+    deltas = defaultdict(int)
+    for anteriores, nuevos in pares:
+        for clave in claves_bug(anteriores or {}):
+            deltas[clave] -= 1
+        for clave in claves_bug(nuevos or {}):
+            deltas[clave] += 1
+
+    with transaction.atomic():
+        for (proyecto_id, dimension, valor_id), delta in sorted(deltas.items()):
+            if delta:
+                _sumar(proyecto_id, dimension, valor_id, delta)
+
+
+def aplicar_cambio(anteriores, nuevos):
+    """Ajusta los conteos al pasar un bug de los valores 'anteriores' a los 'nuevos' (dicts o None)"""
+    aplicar_cambios([(anteriores, nuevos)])
+
+
+def sumar_bugs(lista_valores):
+    """Suma a los conteos un conjunto de bugs nuevos insertados en bloque"""
+    aplicar_cambios((None, valores) for valores in lista_valores)
+
+
+def recalcular(proyecto_id=None):
+    """Reconstruye las estadísticas desde la tabla de bugs (de un proyecto o de todos)"""
+    bugs = Bug.objects.filter(proyecto__isnull=False)
+    estadisticas = EstadisticaBug.objects.all()
+    if proyecto_id:
+        bugs = bugs.filter(proyecto_id=proyecto_id)
+        estadisticas = estadisticas.filter(proyecto_id=proyecto_id)
+
+    filas = [
+        EstadisticaBug(proyecto_id=fila['proyecto_id'], dimension='total', valor_id=0, total=fila['n'])
+        for fila in bugs.values('proyecto_id').annotate(n=Count('id')).order_by()
+    ]
+    for dimension, campo in CAMPOS_DIMENSION.items():
+        filas.extend(
+            EstadisticaBug(
+                proyecto_id=fila['proyecto_id'], dimension=dimension,
+                valor_id=fila[campo] or 0, total=fila['n'],
+            )
+            for fila in bugs.values('proyecto_id', campo).annotate(n=Count('id')).order_by()
+        )
+
+    with transaction.atomic():
+        estadisticas.delete()
+        EstadisticaBug.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def estadisticas_proyecto(proyecto_id):
+    """
+    Devuelve los conteos de un proyecto como
+    {'total': n, 'estado': {id: n}, 'prioridad': {id: n}, 'severidad': {id: n}}.
+    El id 0 agrupa los bugs sin valor asignado.
+    """
+    resultado = {'total': 0, 'estado': {}, 'prioridad': {}, 'severidad': {}}
+    filas = EstadisticaBug.objects.filter(proyecto_id=proyecto_id, total__gt=0)
+    for dimension, valor_id, total in filas.values_list('dimension', 'valor_id', 'total'):
+        if dimension == 'total':
+            resultado['total'] = total
+        else:
+            resultado[dimension][valor_id] = total
+    return resultado
+
+
+def contar_bugs(proyecto_id, estado_id=None, prioridad_id=None):
+    """
+    Conteo de bugs de un proyecto para los filtros de la lista. Las dimensiones sueltas
+    se leen de EstadisticaBug. La combinación estado y prioridad no se materializa (sería
+    una fila por cada par): se cuenta sobre Bug con el índice
+    bug_proy_est_prior_creac_idx, que ya acota el recorrido a los bugs que coinciden.
+    """
+    if estado_id and prioridad_id:
+        return Bug.objects.filter(
+            proyecto_id=proyecto_id, estado_id=estado_id, prioridad_id=prioridad_id
+        ).count()
+    if estado_id:
+        dimension, valor_id = 'estado', estado_id
+    elif prioridad_id:
+        dimension, valor_id = 'prioridad', prioridad_id
+    else:
+        dimension, valor_id = 'total', 0
+    return (
+        EstadisticaBug.objects.filter(proyecto_id=proyecto_id, dimension=dimension, valor_id=valor_id)
+        .values_list('total', flat=True)
+        .first()
+    ) or 0
@@ -1,9 +1,14 @@
 from django import forms
 from .models import Bug, ComentarioBug
-from apps.commons.models import Estado, Prioridad, File
-from apps.proyectos.models import Proyecto, Sprint
+from apps.commons.models import Estado, Prioridad
+from apps.commons.archivos import guardar_archivo
+from apps.commons.subidas import archivo_de_subida
+from .catalogos import PRIORIDADES_BUG, catalogo_estados, catalogo_prioridades, catalogos_bug, opciones
+from apps.commons.widgets import SelectAutocompletar
+from apps.empresas.models import Empresa_Proyecto
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 
 User = get_user_model()
 
@@ -26,17 +31,32 @@ def validate_file_extension(file):
         )
 
 
+def validar_subida(subida, usuario):
+    """File de una subida por bloques completada, con las mismas validaciones del archivo directo"""
+    archivo = archivo_de_subida(subida, usuario)
+    if archivo is None:
+        raise ValidationError('La subida del archivo no existe o no se completó.')
+    validate_file_size(archivo.ruta)
+    validate_file_extension(archivo.ruta)
+    return archivo
+
+
 class BugForm(forms.ModelForm):
     """Formulario para crear y editar bugs"""
     
-    # Override del campo asignado_a para personalizar la visualización
+    # Override del campo asignado_a: las opciones se buscan por AJAX entre los
+    # miembros del proyecto elegido en lugar de listar todos los usuarios
     asignado_a = forms.ModelChoiceField(
         queryset=User.objects.all(),
         required=False,
-        widget=forms.Select(attrs={
-            'class': 'form-select',
-            'id': 'id_asignado_a'
-        }),
+        widget=SelectAutocompletar(
+            url=reverse_lazy('bugtracker:autocompletar_usuarios'),
+            attrs={
+                'class': 'form-select',
+                'id': 'id_asignado_a',
+                'data-proyecto-campo': 'id_proyecto',
+            }
+        ),
         label='Asignado a'
     )
     
@@ -46,12 +66,16 @@ class BugForm(forms.ModelForm):
         widget=forms.FileInput(attrs={
             'class': 'form-control',
             'id': 'id_archivo',
-            'accept': '.jpg,.jpeg,.png,.gif,.pdf,.doc,.docx,.txt'
+            'accept': '.jpg,.jpeg,.png,.gif,.pdf,.doc,.docx,.txt',
+            'data-subida': reverse_lazy('commons:crear_subida'),
         }),
         label='Archivo adjunto',
         help_text='Formatos: JPG, PNG, GIF, PDF, DOC, DOCX, TXT. Tamaño máximo: 10MB',
         validators=[validate_file_size, validate_file_extension]
     )
+
+    # Id de una subida por bloques completada (apps.commons.subidas), alternativa a 'archivo'
+    subida = forms.UUIDField(required=False, widget=forms.HiddenInput())
     
     class Meta:
         model = Bug
@@ -103,8 +127,9 @@ class BugForm(forms.ModelForm):
             'asignado_a': 'Asignado a',
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, usuario=None, catalogos=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.usuario = usuario
         # Hacer algunos campos opcionales
         self.fields['sprint'].required = False
         self.fields['asignado_a'].required = False
@@ -113,31 +138,49 @@ class BugForm(forms.ModelForm):
         self.fields['prioridad'].required = False
         self.fields['estado'].required = False
         
-        # Filtrar severidad para mostrar solo: Baja, Media, Alta, Crítica
-        self.fields['severidad'].queryset = Prioridad.objects.filter(
-            nombre__in=['Baja', 'Media', 'Alta', 'Crítica']
-        )
+        # Filtrar severidad y prioridad para mostrar solo: Baja, Media, Alta, Crítica
+        self.fields['severidad'].queryset = Prioridad.objects.filter(nombre__in=PRIORIDADES_BUG)
+        self.fields['prioridad'].queryset = Prioridad.objects.filter(nombre__in=PRIORIDADES_BUG)
         
-        # Filtrar prioridad para mostrar solo: Baja, Media, Alta, Crítica
-        self.fields['prioridad'].queryset = Prioridad.objects.filter(
-            nombre__in=['Baja', 'Media', 'Alta', 'Crítica']
-        )
+        # Las opciones se toman de los catálogos en caché (o de los que ya leyó la
+        # vista); el queryset solo se consulta al validar el valor enviado
+        catalogos = catalogos or catalogos_bug()
+        prioridades = opciones(catalogos['prioridades'])
+        self.fields['severidad'].choices = prioridades
+        self.fields['prioridad'].choices = prioridades
+        self.fields['estado'].choices = opciones(catalogos['estados'])
+        self.fields['proyecto'].choices = opciones(catalogos['proyectos'])
+        self.fields['sprint'].choices = opciones(catalogos['sprints'])
         
         # Personalizar el label_from_instance para el campo asignado_a
         # Esto hace que se muestre 'nick' en lugar de 'username'
         self.fields['asignado_a'].label_from_instance = lambda obj: obj.nick
+
+    def clean_subida(self):
+        subida = self.cleaned_data.get('subida')
+        return validar_subida(subida, self.usuario) if subida else None
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        asignado_a = cleaned_data.get('asignado_a')
+        proyecto = cleaned_data.get('proyecto')
+        # Solo se valida al cambiar la asignación, para no bloquear bugs antiguos
+        if asignado_a and proyecto and 'asignado_a' in self.changed_data:
+            if not Empresa_Proyecto.objects.filter(proyecto=proyecto, usuario=asignado_a).exists():
+                self.add_error('asignado_a', 'El usuario no es miembro del proyecto.')
+        return cleaned_data
     
     def save(self, commit=True):
         instance = super().save(commit=False)
         
         # Manejar el archivo manualmente
         archivo_subido = self.cleaned_data.get('archivo')
-        if archivo_subido:
-            # Crear una instancia de File
-            file_obj = File()
-            file_obj.ruta = archivo_subido
-            file_obj.save()
-            instance.archivo = file_obj
+        if self.cleaned_data.get('subida'):
+            # Ya ensamblado en un File por la subida por bloques
+            instance.archivo = self.cleaned_data['subida']
+        elif archivo_subido:
+            # Se guarda por contenido: una subida repetida reutiliza el mismo File
+            instance.archivo = guardar_archivo(archivo_subido)
         
         if commit:
             instance.save()
@@ -145,6 +188,89 @@ class BugForm(forms.ModelForm):
         return instance
 
 
+class AccionMasivaBugForm(forms.Form):
+    """Formulario para cambiar estado, prioridad o asignado de varios bugs a la vez"""
+    
+    bugs = forms.Field(widget=forms.MultipleHiddenInput, label='Bugs')
+    estado = forms.ModelChoiceField(
+        queryset=Estado.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select', 'id': 'id_masivo_estado'}),
+        label='Estado'
+    )
+    prioridad = forms.ModelChoiceField(
+        queryset=Prioridad.objects.filter(nombre__in=PRIORIDADES_BUG),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select', 'id': 'id_masivo_prioridad'}),
+        label='Prioridad'
+    )
+    asignado_a = forms.ModelChoiceField(
+        queryset=User.objects.all(),
+        required=False,
+        widget=SelectAutocompletar(
+            url=reverse_lazy('bugtracker:autocompletar_usuarios'),
+            attrs={'class': 'form-select', 'id': 'id_masivo_asignado_a'}
+        ),
+        label='Asignado a'
+    )
+
+    def __init__(self, *args, max_bugs=None, proyecto_id=None, catalogos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_bugs = max_bugs
+        # El autocompletado de asignado se limita al proyecto filtrado en la lista
+        if proyecto_id:
+            self.fields['asignado_a'].widget.attrs['data-proyecto'] = proyecto_id
+        if catalogos:
+            estados, prioridades = catalogos['estados'], catalogos['prioridades']
+        else:
+            estados, prioridades = catalogo_estados(), catalogo_prioridades()
+        self.fields['estado'].choices = opciones(estados)
+        self.fields['prioridad'].choices = opciones(prioridades)
+        self.fields['asignado_a'].label_from_instance = lambda obj: obj.nick
+
+    def clean_bugs(self):
+        valores = self.cleaned_data['bugs'] or []
+        if isinstance(valores, str):
+            valores = [valores]
+        try:
+            ids = list(dict.fromkeys(int(valor) for valor in valores))
+        except (TypeError, ValueError):
+            raise ValidationError('Selección de bugs inválida.')
+        if not ids:
+            raise ValidationError('Selecciona al menos un bug.')
+        if self.max_bugs and len(ids) > self.max_bugs:
+            raise ValidationError(f'Solo se pueden actualizar {self.max_bugs} bugs a la vez.')
+        return ids
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not any(cleaned_data.get(campo) for campo in ('estado', 'prioridad', 'asignado_a')):
+            raise ValidationError('Indica al menos un cambio (estado, prioridad o asignado).')
+        
+        # Igual que BugForm: el asignado debe ser miembro del proyecto de cada bug
+        asignado_a = cleaned_data.get('asignado_a')
+        bug_ids = cleaned_data.get('bugs')
+        if asignado_a and bug_ids:
+            proyectos = set(
+                Bug.objects.filter(id__in=bug_ids, proyecto__isnull=False).values_list('proyecto_id', flat=True)
+            )
+            miembro = set(
+                Empresa_Proyecto.objects.filter(proyecto_id__in=proyectos, usuario=asignado_a)
+                .values_list('proyecto_id', flat=True)
+            )
+            if proyectos - miembro:
+                self.add_error('asignado_a', 'El usuario no es miembro del proyecto de todos los bugs seleccionados.')
+        return cleaned_data
+
+    def cambios(self):
+        """Campos a modificar -> id del nuevo valor"""
+        return {
+            campo: self.cleaned_data[campo].pk
+            for campo in ('estado', 'prioridad', 'asignado_a')
+            if self.cleaned_data.get(campo)
+        }
+
+
 class ComentarioBugForm(forms.ModelForm):
     """Formulario para crear y editar comentarios de bugs"""
     
@@ -154,12 +280,16 @@ class ComentarioBugForm(forms.ModelForm):
         widget=forms.FileInput(attrs={
             'class': 'form-control',
             'id': 'id_archivo_comentario',
-            'accept': '.jpg,.jpeg,.png,.gif,.pdf,.doc,.docx,.txt'
+            'accept': '.jpg,.jpeg,.png,.gif,.pdf,.doc,.docx,.txt',
+            'data-subida': reverse_lazy('commons:crear_subida'),
         }),
         label='Archivo adjunto',
         help_text='Formatos: JPG, PNG, GIF, PDF, DOC, DOCX, TXT. Tamaño máximo: 10MB',
         validators=[validate_file_size, validate_file_extension]
     )
+
+    # Id de una subida por bloques completada (apps.commons.subidas), alternativa a 'archivo'
+    subida = forms.UUIDField(required=False, widget=forms.HiddenInput(attrs={'id': 'id_subida_comentario'}))
     
     class Meta:
         model = ComentarioBug
@@ -176,21 +306,26 @@ class ComentarioBugForm(forms.ModelForm):
             'comentario': 'Comentario',
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, usuario=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.usuario = usuario
         self.fields['archivo'].required = False
+
+    def clean_subida(self):
+        subida = self.cleaned_data.get('subida')
+        return validar_subida(subida, self.usuario) if subida else None
     
     def save(self, commit=True):
         instance = super().save(commit=False)
         
         # Manejar el archivo manualmente
         archivo_subido = self.cleaned_data.get('archivo')
-        if archivo_subido:
-            # Crear una instancia de File
-            file_obj = File()
-            file_obj.ruta = archivo_subido
-            file_obj.save()
-            instance.archivo = file_obj
+        if self.cleaned_data.get('subida'):
+            # Ya ensamblado en un File por la subida por bloques
+            instance.archivo = self.cleaned_data['subida']
+        elif archivo_subido:
+            # Se guarda por contenido: una subida repetida reutiliza el mismo File
+            instance.archivo = guardar_archivo(archivo_subido)
         
         if commit:
             instance.save()
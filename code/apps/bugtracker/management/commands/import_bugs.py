@@ -0,0 +1,293 @@
+import csv
+import json
+import os
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from apps.bugtracker.busqueda import indexar_lote
+from apps.bugtracker.duplicados import indexar_firmas_lote
+from apps.bugtracker.estadisticas import CAMPOS_ESTADISTICA, sumar_bugs
+from apps.bugtracker.models import Bug, ComentarioBug
+from apps.commons.models import Estado, Prioridad
+from apps.proyectos.models import Proyecto, Sprint
+
+User = get_user_model()
+
+
+class RegistroInvalido(ValueError):
+    """El registro de entrada no se puede convertir en un bug"""
+
+
+def _mapa(filas):
+    """Construye un mapa {id: id, 'nombre': id} a partir de (id, nombre, ...) sin distinguir mayúsculas"""
+    mapa = {}
+    for pk, *nombres in filas:
+        mapa[str(pk)] = pk
+        for nombre in nombres:
+            if nombre:
+                mapa.setdefault(nombre.strip().lower(), pk)
+    return mapa
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa bugs (y sus comentarios) desde un archivo CSV o NDJSON en lotes con "
+        "bulk_create, con reanudación desde un checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo .csv o .ndjson")
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], help="Por defecto se deduce de la extensión")
+        parser.add_argument('--lote', type=int, default=1000, help="Registros por lote/transacción")
+        parser.add_argument('--checkpoint', help="Archivo de checkpoint (por defecto <archivo>.checkpoint)")
+        parser.add_argument('--reiniciar', action='store_true', help="Ignorar un checkpoint existente")
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not os.path.exists(archivo):
+            raise CommandError(f"No existe el archivo {archivo}")
+
+        formato = options['formato'] or ('csv' if archivo.lower().endswith('.csv') else 'ndjson')
+        tamano_lote = options['lote']
+        ruta_checkpoint = options['checkpoint'] or f"{archivo}.checkpoint"
+
+        progreso = {'registro': 0, 'bugs': 0, 'comentarios': 0, 'rechazados': 0}
+        if os.path.exists(ruta_checkpoint) and not options['reiniciar']:
+            with open(ruta_checkpoint, encoding='utf-8') as f:
+                progreso.update(json.load(f))
+            self.stdout.write(f"Reanudando desde el registro {progreso['registro']}.")
+
+        self._cargar_mapas()
+
+        inicio = time.monotonic()
+        procesados = 0
+        lote = []
+        for numero, registro in self._leer(archivo, formato):
+            if numero <= progreso['registro']:
+                continue
+            lote.append((numero, registro))
+            if len(lote) >= tamano_lote:
+                procesados += self._procesar_lote(lote, progreso, ruta_checkpoint)
+                self._reportar(progreso, procesados, inicio)
+                lote = []
+
+        if lote:
+            procesados += self._procesar_lote(lote, progreso, ruta_checkpoint)
+            self._reportar(progreso, procesados, inicio)
+
+        if os.path.exists(ruta_checkpoint):
+            os.remove(ruta_checkpoint)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completa: {progreso['bugs']} bugs, {progreso['comentarios']} comentarios, "
+            f"{progreso['rechazados']} rechazados."
+        ))
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def _leer(self, archivo, formato):
+        """Genera (número de registro, dict) sin cargar el archivo completo en memoria"""
+        with open(archivo, newline='', encoding='utf-8-sig') as f:
+            if formato == 'csv':
+                for numero, fila in enumerate(csv.DictReader(f), start=1):
+                    yield numero, fila
+            else:
+                for numero, linea in enumerate(f, start=1):
+                    linea = linea.strip()
+                    if not linea:
+                        yield numero, None
+                        continue
+                    try:
+                        yield numero, json.loads(linea)
+                    except json.JSONDecodeError:
+                        yield numero, {'_error': 'JSON inválido'}
+
+    def _cargar_mapas(self):
+        """Carga en memoria las referencias por id o nombre para resolver cada registro sin consultas"""
+        self.estados = _mapa(Estado.objects.values_list('id', 'nombre'))
+        self.prioridades = _mapa(Prioridad.objects.values_list('id', 'nombre'))
+        self.proyectos = _mapa(Proyecto.objects.values_list('id', 'nombre'))
+        self.usuarios = _mapa(User.objects.values_list('id', 'correo', 'nick'))
+        self.sprints = {}
+        for pk, nombre, proyecto_id in Sprint.objects.values_list('id', 'nombre', 'proyecto_id'):
+            self.sprints[str(pk)] = (pk, proyecto_id)
+            self.sprints.setdefault((proyecto_id, nombre.strip().lower()), (pk, proyecto_id))
+
+    # ------------------------------------------------------------------
+    # Conversión
+    # ------------------------------------------------------------------
+    def _referencia(self, mapa, valor, campo, obligatorio=False):
+        if valor in (None, ''):
+            if obligatorio:
+                raise RegistroInvalido(f"'{campo}' es obligatorio")
+            return None
+        pk = mapa.get(str(valor).strip().lower())
+        if pk is None:
+            raise RegistroInvalido(f"{campo} '{valor}' no existe")
+        return pk
+
+    def _construir(self, registro):
+        """Convierte un registro en (Bug sin guardar, lista de ComentarioBug sin bug)"""
+        if not registro:
+            raise RegistroInvalido("registro vacío")
+        if not isinstance(registro, dict):
+            raise RegistroInvalido("el registro no es un objeto JSON")
+        if '_error' in registro:
+            raise RegistroInvalido(registro['_error'])
+
+        titulo = str(registro.get('titulo') or '').strip()
+        if not titulo:
+            raise RegistroInvalido("'titulo' es obligatorio")
+        if len(titulo) > Bug._meta.get_field('titulo').max_length:
+            raise RegistroInvalido("'titulo' excede la longitud máxima")
+
+        proyecto_id = self._referencia(self.proyectos, registro.get('proyecto'), 'proyecto')
+        sprint_id = None
+        if registro.get('sprint'):
+            sprint = self.sprints.get(str(registro['sprint']).strip().lower()) or self.sprints.get(
+                (proyecto_id, str(registro['sprint']).strip().lower())
+            )
+            if sprint is None:
+                raise RegistroInvalido(f"sprint '{registro['sprint']}' no existe")
+            sprint_id = sprint[0]
+
+        bug = Bug(
+            titulo=titulo,
+            descripcion=registro.get('descripcion') or '',
+            proyecto_id=proyecto_id,
+            sprint_id=sprint_id,
+            estado_id=self._referencia(self.estados, registro.get('estado'), 'estado'),
+            prioridad_id=self._referencia(self.prioridades, registro.get('prioridad'), 'prioridad'),
+            severidad_id=self._referencia(self.prioridades, registro.get('severidad'), 'severidad'),
+            reportado_por_id=self._referencia(
+                self.usuarios, registro.get('reportado_por'), 'reportado_por', obligatorio=True
+            ),
+            asignado_a_id=self._referencia(self.usuarios, registro.get('asignado_a'), 'asignado_a'),
+        )
+        bug._creacion_importada = None
+        if registro.get('creacion'):
+            try:
+                bug._creacion_importada = parse_datetime(str(registro['creacion']))
+            except ValueError:
+                pass
+            if bug._creacion_importada is None:
+                raise RegistroInvalido(f"creacion '{registro['creacion']}' no es una fecha válida")
+
+        comentarios_crudos = registro.get('comentarios') or []
+        if isinstance(comentarios_crudos, str):
+            # En CSV la columna 'comentarios' trae una lista JSON
+            try:
+                comentarios_crudos = json.loads(comentarios_crudos)
+            except json.JSONDecodeError:
+                raise RegistroInvalido("'comentarios' no es una lista JSON válida")
+        if not isinstance(comentarios_crudos, list):
+            raise RegistroInvalido("'comentarios' debe ser una lista")
+
+        comentarios = []
+        for crudo in comentarios_crudos:
+            if not isinstance(crudo, dict):
+                raise RegistroInvalido("cada comentario debe ser un objeto JSON")
+            texto = str(crudo.get('comentario') or '').strip()
+            if not texto:
+                continue
+            comentarios.append(ComentarioBug(
+                usuario_id=self._referencia(self.usuarios, crudo.get('usuario'), 'usuario', obligatorio=True),
+                comentario=texto,
+            ))
+        bug.total_comentarios = len(comentarios)
+        return bug, comentarios
+
+    # ------------------------------------------------------------------
+    # Inserción
+    # ------------------------------------------------------------------
+    def _procesar_lote(self, lote, progreso, ruta_checkpoint):
+        bugs = []
+        comentarios_por_bug = []
+        rechazados = 0
+        for numero, registro in lote:
+            try:
+                bug, comentarios = self._construir(registro)
+            except RegistroInvalido as exc:
+                rechazados += 1
+                self.stderr.write(f"Registro {numero} rechazado: {exc}")
+                continue
+            bugs.append(bug)
+            comentarios_por_bug.append(comentarios)
+
+        with transaction.atomic():
+            self._insertar_bugs(bugs)
+
+            # bulk_create pisa auto_now_add; se restaura la fecha original cuando viene en el archivo
+            con_fecha = [bug for bug in bugs if bug._creacion_importada]
+            for bug in con_fecha:
+                bug.creacion = bug._creacion_importada
+            if con_fecha:
+                Bug.objects.bulk_update(con_fecha, ['creacion'], batch_size=len(con_fecha))
+
+            comentarios = []
+            for bug, lista in zip(bugs, comentarios_por_bug):
+                for comentario in lista:
+                    comentario.bug_id = bug.pk
+                    comentarios.append(comentario)
+            ComentarioBug.objects.bulk_create(comentarios, batch_size=len(comentarios) or 1)
+
+            # Mantener los índices (búsqueda y duplicados) y las estadísticas, ya que bulk_create no emite señales.
+            # Los comentarios se releen para contar con su id en cualquier motor.
+            comentarios_insertados = ComentarioBug.objects.filter(
+                bug_id__in=[bug.pk for bug in bugs]
+            ).only('id', 'bug_id', 'comentario')
+            indexar_lote(bugs, comentarios_insertados)
+            indexar_firmas_lote(bugs)
+            sumar_bugs({campo: getattr(bug, campo) for campo in CAMPOS_ESTADISTICA} for bug in bugs)
+
+            progreso['registro'] = lote[-1][0]
+            progreso['bugs'] += len(bugs)
+            progreso['comentarios'] += len(comentarios)
+            progreso['rechazados'] += rechazados
+
+        # El checkpoint se escribe una vez confirmado el lote: si el COMMIT falla, la
+        # reanudación vuelve a procesarlo. Si el proceso muere entre el COMMIT y esta
+        # escritura, el lote se importa dos veces (se prefiere a perderlo).
+        self._guardar_checkpoint(ruta_checkpoint, progreso)
+        return len(lote)
+
+    def _insertar_bugs(self, bugs):
+        """
+        Inserta los bugs con un único bulk_create y les asigna su id. Todos los bugs del
+        lote llevan el mismo lote_importacion. Sin RETURNING (p. ej. MySQL) bulk_create
+        no devuelve los ids: se releen por lote_importacion ordenados por id, ya que un
+        INSERT de varias filas asigna los autoincrementales en el orden de las filas.
+        """
+        if not bugs:
+            return
+        lote = uuid.uuid4()
+        for bug in bugs:
+            bug.lote_importacion = lote
+        Bug.objects.bulk_create(bugs, batch_size=len(bugs))
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+
+        ids = list(Bug.objects.filter(lote_importacion=lote).order_by('id').values_list('id', flat=True))
+        if len(ids) != len(bugs):
+            raise CommandError("No se pudieron recuperar los ids de los bugs insertados.")
+        for bug, pk in zip(bugs, ids):
+            bug.pk = pk
+
+    def _guardar_checkpoint(self, ruta, progreso):
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(progreso, f)
+        os.replace(temporal, ruta)
+
+    def _reportar(self, progreso, procesados, inicio):
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        self.stdout.write(
+            f"Registro {progreso['registro']}: {progreso['bugs']} bugs, {progreso['comentarios']} comentarios, "
+            f"{progreso['rechazados']} rechazados ({procesados / transcurrido:.0f} registros/s)"
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.bugtracker.estadisticas import recalcular
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero las estadísticas de bugs por proyecto"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--proyecto', type=int, help="Recalcular solo este proyecto")
+
+    def handle(self, *args, **options):
+        filas = recalcular(options.get('proyecto'))
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas recalculadas: {filas} filas."))
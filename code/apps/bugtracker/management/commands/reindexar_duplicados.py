@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.bugtracker.duplicados import reconstruir_firmas
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice MinHash/LSH usado para detectar bugs duplicados"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por lote de inserción")
+
+    def handle(self, *args, **options):
+        total = reconstruir_firmas(tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f"Índice de duplicados reconstruido: {total} cubetas."))
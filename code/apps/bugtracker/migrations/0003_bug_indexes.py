@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0002_initial'),
+        ('commons', '0001_initial'),
+        ('proyectos', '0003_tarea'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['creacion', 'id'], name='bug_creacion_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['proyecto', 'creacion', 'id'], name='bug_proyecto_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['estado', 'creacion', 'id'], name='bug_estado_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['prioridad', 'creacion', 'id'], name='bug_prioridad_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['proyecto', 'estado', 'creacion', 'id'], name='bug_proy_estado_creac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['proyecto', 'prioridad', 'creacion', 'id'], name='bug_proy_prior_creac_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0003_bug_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('peso', models.PositiveIntegerField(default=1)),
+                ('bug', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='bugtracker.bug')),
+                ('comentario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='bugtracker.comentariobug')),
+            ],
+            options={
+                'verbose_name': 'Término Bug',
+                'verbose_name_plural': 'Términos Bugs',
+                'db_table': 'auth.termino_bug',
+                'indexes': [models.Index(fields=['token', 'bug', 'peso'], name='termino_token_bug_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0004_terminobug'),
+        ('proyectos', '0003_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaBug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('estado', 'Estado'), ('prioridad', 'Prioridad'), ('severidad', 'Severidad')], max_length=20)),
+                ('valor_id', models.PositiveBigIntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_bugs', to='proyectos.proyecto')),
+            ],
+            options={
+                'verbose_name': 'Estadística Bug',
+                'verbose_name_plural': 'Estadísticas Bugs',
+                'db_table': 'auth.estadistica_bug',
+                'constraints': [models.UniqueConstraint(fields=('proyecto', 'dimension', 'valor_id'), name='estadistica_bug_unica')],
+            },
+        ),
+    ]
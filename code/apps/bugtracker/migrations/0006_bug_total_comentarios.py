@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:26
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def contar_comentarios(apps, schema_editor):
+    Bug = apps.get_model('bugtracker', 'Bug')
+    ComentarioBug = apps.get_model('bugtracker', 'ComentarioBug')
+    conteo = (
+        ComentarioBug.objects.filter(bug=OuterRef('pk'))
+        .values('bug')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Bug.objects.update(total_comentarios=Coalesce(Subquery(conteo), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0005_estadisticabug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bug',
+            name='total_comentarios',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de comentarios'),
+        ),
+        migrations.RunPython(contar_comentarios, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0006_bug_total_comentarios'),
+        ('proyectos', '0003_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BandaBug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.BigIntegerField()),
+                ('bug', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bandas', to='bugtracker.bug')),
+                ('proyecto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bandas_bugs', to='proyectos.proyecto')),
+            ],
+            options={
+                'verbose_name': 'Banda Bug',
+                'verbose_name_plural': 'Bandas Bugs',
+                'db_table': 'auth.banda_bug',
+                'indexes': [models.Index(fields=['proyecto', 'hash'], name='banda_proyecto_hash_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0007_bandabug'),
+        ('commons', '0004_vista_previa_archivo'),
+        ('proyectos', '0004_proyecto_creacion_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['estado', 'prioridad', 'creacion', 'id'], name='bug_estado_prior_creac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['proyecto', 'estado', 'prioridad', 'creacion', 'id'], name='bug_proy_est_prior_creac_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0008_bug_indexes_estado_prioridad'),
+        ('commons', '0005_tabla_cache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comentariobug',
+            index=models.Index(fields=['bug', 'creacion', 'id'], name='comentario_bug_creacion_idx'),
+        ),
+    ]
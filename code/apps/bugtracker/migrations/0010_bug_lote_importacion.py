@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0009_comentario_bug_creacion_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bug',
+            name='lote_importacion',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True, verbose_name='Lote de importación'),
+        ),
+    ]
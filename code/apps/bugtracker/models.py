@@ -62,14 +62,40 @@ class Bug(Metadatos):
         related_name="prioridad",
     )
     archivo = models.ForeignKey(File, on_delete=models.SET_NULL, null=True, blank=True)
+    total_comentarios = models.PositiveIntegerField("Total de comentarios", default=0, editable=False)
+    # Lote de import_bugs con el que se creó el bug (None para los creados desde la aplicación)
+    lote_importacion = models.UUIDField("Lote de importación", null=True, blank=True, editable=False, db_index=True)
 
     def __str__(self):
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        # total_comentarios se mantiene con UPDATE atómicos desde las señales de
+        # ComentarioBug; un save normal no debe pisarlo con un valor desactualizado
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'total_comentarios'
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = "auth.bug"
         verbose_name = "Bug"
         verbose_name_plural = "Bugs"
+        # Índices para los filtros de lista_bugs ordenados por (-creacion, -id)
+        indexes = [
+            models.Index(fields=["creacion", "id"], name="bug_creacion_id_idx"),
+            models.Index(fields=["proyecto", "creacion", "id"], name="bug_proyecto_creacion_idx"),
+            models.Index(fields=["estado", "creacion", "id"], name="bug_estado_creacion_idx"),
+            models.Index(fields=["prioridad", "creacion", "id"], name="bug_prioridad_creacion_idx"),
+            models.Index(fields=["proyecto", "estado", "creacion", "id"], name="bug_proy_estado_creac_idx"),
+            models.Index(fields=["proyecto", "prioridad", "creacion", "id"], name="bug_proy_prior_creac_idx"),
+            models.Index(fields=["estado", "prioridad", "creacion", "id"], name="bug_estado_prior_creac_idx"),
+            models.Index(
+                fields=["proyecto", "estado", "prioridad", "creacion", "id"], name="bug_proy_est_prior_creac_idx"
+            ),
+        ]
 
 
 class ComentarioBug(Metadatos):
@@ -85,3 +111,81 @@ class ComentarioBug(Metadatos):
         db_table = "auth.comentario_bug"
         verbose_name = "Comentario Bug"
         verbose_name_plural = "Comentarios Bugs"
+        # Soporta el hilo paginado por cursor (-creacion, -id) de cada bug
+        indexes = [
+            models.Index(fields=["bug", "creacion", "id"], name="comentario_bug_creacion_idx"),
+        ]
+
+
+class TerminoBug(models.Model):
+    """Entrada del índice invertido de búsqueda: un token de un bug o de uno de sus comentarios"""
+    token = models.CharField(max_length=64)
+    bug = models.ForeignKey(Bug, on_delete=models.CASCADE, related_name="terminos")
+    comentario = models.ForeignKey(
+        ComentarioBug, on_delete=models.CASCADE, null=True, blank=True, related_name="terminos"
+    )
+    peso = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.token} → {self.bug_id}"
+
+    class Meta:
+        db_table = "auth.termino_bug"
+        verbose_name = "Término Bug"
+        verbose_name_plural = "Términos Bugs"
+        indexes = [
+            models.Index(fields=["token", "bug", "peso"], name="termino_token_bug_idx"),
+        ]
+
+
+class EstadisticaBug(models.Model):
+    """Conteo materializado de bugs por proyecto y por valor de estado, prioridad o severidad"""
+    DIMENSIONES = [
+        ("total", "Total"),
+        ("estado", "Estado"),
+        ("prioridad", "Prioridad"),
+        ("severidad", "Severidad"),
+    ]
+
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name="estadisticas_bugs")
+    dimension = models.CharField(max_length=20, choices=DIMENSIONES)
+    # Id del Estado/Prioridad correspondiente; 0 para bugs sin valor y para la dimensión total
+    valor_id = models.PositiveBigIntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.proyecto_id} {self.dimension}={self.valor_id}: {self.total}"
+
+    class Meta:
+        db_table = "auth.estadistica_bug"
+        verbose_name = "Estadística Bug"
+        verbose_name_plural = "Estadísticas Bugs"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["proyecto", "dimension", "valor_id"], name="estadistica_bug_unica"
+            ),
+        ]
+
+
+class BandaBug(models.Model):
+    """
+    Cubeta del índice LSH para detectar bugs casi duplicados: hash de una banda de la
+    firma MinHash de título + descripción. Dos bugs que comparten alguna cubeta del
+    mismo proyecto son candidatos a duplicado.
+    """
+    proyecto = models.ForeignKey(
+        Proyecto, on_delete=models.CASCADE, null=True, blank=True, related_name="bandas_bugs"
+    )
+    bug = models.ForeignKey(Bug, on_delete=models.CASCADE, related_name="bandas")
+    hash = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.hash} → {self.bug_id}"
+
+    class Meta:
+        db_table = "auth.banda_bug"
+        verbose_name = "Banda Bug"
+        verbose_name_plural = "Bandas Bugs"
+        indexes = [
+            models.Index(fields=["proyecto", "hash"], name="banda_proyecto_hash_idx"),
+        ]
@@ -0,0 +1,57 @@
+# apps/bugtracker/signals/busqueda.py
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Bug, ComentarioBug, TerminoBug
+from ..busqueda import indexar_bug, indexar_comentario
+
+CAMPOS_INDEXADOS = ('titulo', 'descripcion')
+
+
+def _textos(instance):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    return {campo: instance.__dict__[campo] for campo in CAMPOS_INDEXADOS if campo in instance.__dict__}
+
+
+def _texto_cambiado(instance):
+    originales = getattr(instance, '_texto_indexado', {})
+    return any(
+        campo not in originales or originales[campo] != valor
+        for campo, valor in _textos(instance).items()
+    )
+
+
+@receiver(post_init, sender=Bug)
+def recordar_texto_bug(sender, instance, **kwargs):
+    """Guarda el título y la descripción con que se cargó el bug para reindexar solo si cambian"""
+    instance._texto_indexado = _textos(instance)
+
+
+@receiver(post_save, sender=Bug)
+def indexar_bug_guardado(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Actualiza el índice de búsqueda cuando cambia el título o la descripción del bug"""
+    if raw:
+        return
+    if update_fields is not None and not set(CAMPOS_INDEXADOS) & set(update_fields):
+        return
+    # Bug.save incluye todos los campos en update_fields: se compara con el texto cargado
+    if not created and not _texto_cambiado(instance):
+        return
+    indexar_bug(instance)
+    instance._texto_indexado = _textos(instance)
+
+
+@receiver(post_save, sender=ComentarioBug)
+def indexar_comentario_guardado(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Actualiza el índice de búsqueda cuando se crea o edita un comentario"""
+    if raw:
+        return
+    if update_fields is not None and 'comentario' not in update_fields:
+        return
+    indexar_comentario(instance)
+
+
+@receiver(post_delete, sender=ComentarioBug)
+def desindexar_comentario(sender, instance, **kwargs):
+    """Elimina las entradas que pudieran quedar de un comentario borrado"""
+    TerminoBug.objects.filter(comentario_id=instance.pk).delete()
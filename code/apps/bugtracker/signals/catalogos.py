@@ -0,0 +1,28 @@
+# apps/bugtracker/signals/catalogos.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.commons.catalogos import invalidar_catalogos
+from apps.commons.models import Estado, Prioridad
+from apps.proyectos.models import Proyecto, Sprint
+
+
+@receiver([post_save, post_delete], sender=Proyecto)
+def invalidar_catalogo_proyectos(sender, **kwargs):
+    # Los sprints muestran el nombre de su proyecto
+    invalidar_catalogos('proyectos', 'sprints')
+
+
+@receiver([post_save, post_delete], sender=Estado)
+def invalidar_catalogo_estados(sender, **kwargs):
+    invalidar_catalogos('estados')
+
+
+@receiver([post_save, post_delete], sender=Prioridad)
+def invalidar_catalogo_prioridades(sender, **kwargs):
+    invalidar_catalogos('prioridades_bug')
+
+
+@receiver([post_save, post_delete], sender=Sprint)
+def invalidar_catalogo_sprints(sender, **kwargs):
+    invalidar_catalogos('sprints')
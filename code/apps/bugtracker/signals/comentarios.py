@@ -0,0 +1,21 @@
+# apps/bugtracker/signals/comentarios.py
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Bug, ComentarioBug
+
+
+@receiver(post_save, sender=ComentarioBug)
+def sumar_comentario(sender, instance, created, raw=False, **kwargs):
+    """Incrementa el contador de comentarios del bug"""
+    if created and not raw:
+        Bug.objects.filter(pk=instance.bug_id).update(total_comentarios=F('total_comentarios') + 1)
+
+
+@receiver(post_delete, sender=ComentarioBug)
+def restar_comentario(sender, instance, **kwargs):
+    """Decrementa el contador de comentarios del bug"""
+    Bug.objects.filter(pk=instance.bug_id, total_comentarios__gt=0).update(
+        total_comentarios=F('total_comentarios') - 1
+    )
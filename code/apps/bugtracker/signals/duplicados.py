@@ -0,0 +1,42 @@
+# apps/bugtracker/signals/duplicados.py
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from ..models import Bug
+from ..duplicados import indexar_firma
+
+# Atributos de los que dependen las cubetas LSH (texto de la firma y proyecto)
+CAMPOS_FIRMA = ('titulo', 'descripcion', 'proyecto_id')
+
+
+def _valores(instance):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    return {campo: instance.__dict__[campo] for campo in CAMPOS_FIRMA if campo in instance.__dict__}
+
+
+def _firma_cambiada(instance):
+    originales = getattr(instance, '_firma_indexada', {})
+    return any(
+        campo not in originales or originales[campo] != valor
+        for campo, valor in _valores(instance).items()
+    )
+
+
+@receiver(post_init, sender=Bug)
+def recordar_firma_bug(sender, instance, **kwargs):
+    """Guarda el texto y el proyecto con que se cargó el bug para recalcular la firma solo si cambian"""
+    instance._firma_indexada = _valores(instance)
+
+
+@receiver(post_save, sender=Bug)
+def indexar_firma_guardada(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Actualiza las cubetas LSH cuando cambia el texto o el proyecto del bug"""
+    if raw:
+        return
+    if update_fields is not None and not {'titulo', 'descripcion', 'proyecto'} & set(update_fields):
+        return
+    # Bug.save incluye todos los campos en update_fields: se compara con lo cargado
+    if not created and not _firma_cambiada(instance):
+        return
+    indexar_firma(instance)
+    instance._firma_indexada = _valores(instance)
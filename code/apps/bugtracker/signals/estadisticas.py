@@ -0,0 +1,46 @@
+# apps/bugtracker/signals/estadisticas.py
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Bug
+from ..estadisticas import CAMPOS_ESTADISTICA, aplicar_cambio
+
+
+def _valores(instance):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    if all(campo in instance.__dict__ for campo in CAMPOS_ESTADISTICA):
+        return {campo: instance.__dict__[campo] for campo in CAMPOS_ESTADISTICA}
+    return None
+
+
+@receiver(post_init, sender=Bug)
+def recordar_valores_bug(sender, instance, **kwargs):
+    """Guarda los valores con los que se cargó el bug para calcular el cambio al guardarlo"""
+    instance._estadistica_original = _valores(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Bug)
+def completar_valores_bug(sender, instance, raw=False, **kwargs):
+    """Si el bug se cargó con campos diferidos, consulta los valores previos antes de guardar"""
+    if raw or not instance.pk or instance._state.adding:
+        return
+    if getattr(instance, '_estadistica_original', None) is None:
+        instance._estadistica_original = (
+            Bug.objects.filter(pk=instance.pk).values(*CAMPOS_ESTADISTICA).first()
+        )
+
+
+@receiver(post_save, sender=Bug)
+def actualizar_estadisticas_bug(sender, instance, created, raw=False, **kwargs):
+    """Ajusta los conteos por proyecto cuando se crea, edita o reasigna un bug"""
+    if raw:
+        return
+    anteriores = None if created else instance._estadistica_original
+    nuevos = {campo: getattr(instance, campo) for campo in CAMPOS_ESTADISTICA}
+    aplicar_cambio(anteriores, nuevos)
+    instance._estadistica_original = nuevos
+
+
+@receiver(post_delete, sender=Bug)
+def descontar_bug_eliminado(sender, instance, **kwargs):
+    aplicar_cambio({campo: getattr(instance, campo) for campo in CAMPOS_ESTADISTICA}, None)
@@ -1,3 +1,904 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.commons.models import Estado, Prioridad
+from apps.commons.paginacion import codificar_cursor, paginar_keyset
+from apps.empresas.models import Empresa_Proyecto
+from apps.historial.models import DetalleHistorial, Historial
+from apps.proyectos.models import Proyecto, Sprint
+from .acciones import actualizar_bugs
+from .busqueda import buscar_bugs
+from .catalogos import catalogos_bug
+from .duplicados import (
+    NUM_BANDAS, UMBRAL_SIMILITUD, bandas, buscar_duplicados, firma, jaccard, shingles,
+)
+from .estadisticas import contar_bugs, estadisticas_proyecto
+from .forms import AccionMasivaBugForm, BugForm
+from .models import BandaBug, Bug, ComentarioBug, EstadisticaBug, TerminoBug
+from .management.commands.import_bugs import Command
+from .views import (
+    _filas_exportacion, _filtrar_bugs, AUTOCOMPLETAR_LIMITE, BUGS_POR_PAGINA, COMENTARIOS_POR_PAGINA,
+)
+
+
+class PlanConsultasListaBugsTests(TestCase):
+    """
+    Verifica con EXPLAIN que las consultas de lista_bugs usan los índices compuestos
+    de Bug y no recorren la tabla completa ni ordenan en memoria.
+    """
+
+    TOTAL_BUGS = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = usuario = Usuario.objects.create(correo='plan@example.com', nick='plan_explain', password='x')
+        cls.proyectos = [Proyecto.objects.create(nombre=f'Proyecto {i}') for i in range(10)]
+        cls.estados = [Estado.objects.create(nombre=f'Estado {i}') for i in range(8)]
+        cls.prioridades = [Prioridad.objects.create(nombre=f'Prioridad {i}') for i in range(4)]
+
+        Bug.objects.bulk_create([
+            Bug(
+                titulo=f'Bug {i}',
+                descripcion='Descripción',
+                reportado_por=usuario,
+                proyecto=cls.proyectos[i % len(cls.proyectos)],
+                estado=cls.estados[i % len(cls.estados)],
+                prioridad=cls.prioridades[i % len(cls.prioridades)],
+            )
+            for i in range(cls.TOTAL_BUGS)
+        ], batch_size=500)
+
+        # Repartir las fechas para que el orden por creacion sea significativo
+        ahora = timezone.now()
+        bugs = list(Bug.objects.only('id'))
+        for i, bug in enumerate(bugs):
+            bug.creacion = ahora - timedelta(minutes=i)
+        Bug.objects.bulk_update(bugs, ['creacion'], batch_size=500)
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE `{Bug._meta.db_table}`')
+            else:
+                cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def _consulta(self, filtros, cursor=None):
+        """SQL de la página que ejecuta lista_bugs_json (paginar_keyset sobre _filtrar_bugs)"""
+        parametros = dict(filtros, cursor=cursor) if cursor else filtros
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('bugtracker:lista_bugs_json'), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        tabla = connection.ops.quote_name(Bug._meta.db_table)
+        sentencias = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if f'FROM {tabla}' in consulta['sql'] and 'ORDER BY' in consulta['sql']
+        ]
+        self.assertEqual(len(sentencias), 1, sentencias)
+        return sentencias[0]
+
+    def _combinaciones(self):
+        proyecto = str(self.proyectos[0].id)
+        estado = str(self.estados[0].id)
+        prioridad = str(self.prioridades[0].id)
+        return {
+            'sin filtros': {},
+            'proyecto': {'proyecto': proyecto},
+            'estado': {'estado': estado},
+            'prioridad': {'prioridad': prioridad},
+            'proyecto y estado': {'proyecto': proyecto, 'estado': estado},
+            'proyecto y prioridad': {'proyecto': proyecto, 'prioridad': prioridad},
+            'estado y prioridad': {'estado': estado, 'prioridad': prioridad},
+            'proyecto, estado y prioridad': {'proyecto': proyecto, 'estado': estado, 'prioridad': prioridad},
+        }
+
+    def _assert_usa_indice(self, sql, descripcion):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+                texto = cursor.fetchone()[0]
+                self.assertNotIn('"access_type": "ALL"', texto, f'{descripcion}: recorrido completo\n{texto}')
+                self.assertNotIn('"using_filesort": true', texto, f'{descripcion}: filesort\n{texto}')
+                return
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(' '.join(str(columna) for columna in fila) for fila in cursor.fetchall())
+        tabla = Bug._meta.db_table
+        for linea in plan.splitlines():
+            if tabla in linea and ('SCAN' in linea or 'SEARCH' in linea):
+                self.assertIn('USING', linea, f'{descripcion}: recorrido sin índice\n{plan}')
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan, f'{descripcion}: orden en memoria\n{plan}')
+
+    @skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN solo se valida en sqlite y MySQL')
+    def test_primera_pagina_usa_indice(self):
+        for descripcion, filtros in self._combinaciones().items():
+            with self.subTest(filtros=descripcion):
+                self._assert_usa_indice(self._consulta(filtros), descripcion)
+
+    @skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN solo se valida en sqlite y MySQL')
+    def test_pagina_con_cursor_usa_indice(self):
+        bug = Bug.objects.order_by('-creacion', '-id')[BUGS_POR_PAGINA * 5]
+        cursores = {
+            'siguiente': codificar_cursor('next', bug.creacion, bug.id),
+            'anterior': codificar_cursor('prev', bug.creacion, bug.id),
+        }
+        for direccion, cursor in cursores.items():
+            for descripcion, filtros in self._combinaciones().items():
+                with self.subTest(direccion=direccion, filtros=descripcion):
+                    self._assert_usa_indice(self._consulta(filtros, cursor), f'{direccion}, {descripcion}')
+
+    def test_cursor_recorre_todos_los_bugs_sin_repetir(self):
+        vistos = []
+        token = None
+        while True:
+            pagina = paginar_keyset(Bug.objects.filter(proyecto=self.proyectos[1]), token, 50)
+            vistos.extend(bug.id for bug in pagina['objetos'])
+            token = pagina['next']
+            if not token:
+                break
+
+        esperados = list(
+            Bug.objects.filter(proyecto=self.proyectos[1]).order_by('-creacion', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+
+    def test_exportacion_por_bloques_recorre_todos_en_orden(self):
+        request = RequestFactory().get('/bugtracker/bugs/exportar/', {'proyecto': str(self.proyectos[2].id)})
+        with mock.patch('apps.bugtracker.views.EXPORTACION_CHUNK', 70):
+            lineas = list(_filas_exportacion(_filtrar_bugs(request), 'ndjson'))
+
+        esperados = list(
+            Bug.objects.filter(proyecto=self.proyectos[2]).order_by('-creacion', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual([json.loads(linea)['id'] for linea in lineas], esperados)
+
+    def test_cursor_anterior_regresa_a_la_misma_pagina(self):
+        primera = paginar_keyset(Bug.objects.all(), None, BUGS_POR_PAGINA)
+        segunda = paginar_keyset(Bug.objects.all(), primera['next'], BUGS_POR_PAGINA)
+        regreso = paginar_keyset(Bug.objects.all(), segunda['prev'], BUGS_POR_PAGINA)
+
+        self.assertIsNone(primera['prev'])
+        self.assertEqual([b.id for b in regreso['objetos']], [b.id for b in primera['objetos']])
+        self.assertIsNone(regreso['prev'])
+
+
+class ListaBugsJsonTests(TestCase):
+    """lista_bugs_json: páginas por cursor y cursores inválidos o manipulados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='lista@example.com', nick='lista', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Lista')
+        cls.otro_proyecto = Proyecto.objects.create(nombre='Otro')
+        cls.abierto = Estado.objects.create(nombre='Abierto')
+        ahora = timezone.now()
+        cls.bugs = Bug.objects.bulk_create([
+            Bug(
+                titulo=f'Bug {i}', descripcion='-', reportado_por=cls.usuario, estado=cls.abierto,
+                proyecto=cls.proyecto if i % 5 else cls.otro_proyecto,
+            )
+            for i in range(BUGS_POR_PAGINA * 2 + 5)
+        ])
+        # Varios bugs con la misma fecha: el id desempata dentro del cursor
+        bugs = list(Bug.objects.order_by('id'))
+        for i, bug in enumerate(bugs):
+            bug.creacion = ahora - timedelta(minutes=i // 3)
+        Bug.objects.bulk_update(bugs, ['creacion'])
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def _pagina(self, **parametros):
+        return self.client.get(reverse('bugtracker:lista_bugs_json'), parametros)
+
+    def test_recorre_las_paginas_en_orden(self):
+        vistos = []
+        respuesta = self._pagina(proyecto=self.proyecto.id).json()
+        self.assertIsNone(respuesta['prev'])
+        while True:
+            vistos.extend(resultado['id'] for resultado in respuesta['resultados'])
+            if not respuesta['next']:
+                break
+            respuesta = self._pagina(proyecto=self.proyecto.id, cursor=respuesta['next']).json()
+            self.assertIsNotNone(respuesta['prev'])
+
+        esperados = list(
+            Bug.objects.filter(proyecto=self.proyecto).order_by('-creacion', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+
+    def test_campos_de_cada_resultado(self):
+        resultado = self._pagina().json()['resultados'][0]
+        bug = Bug.objects.order_by('-creacion', '-id').first()
+        self.assertEqual(resultado['id'], bug.id)
+        self.assertEqual(resultado['proyecto'], bug.proyecto.nombre)
+        self.assertEqual(resultado['estado'], 'Abierto')
+        self.assertEqual(resultado['reportado_por'], 'lista')
+        self.assertIsNone(resultado['asignado_a'])
+        self.assertEqual(resultado['url'], reverse('bugtracker:detalle_bug', args=[bug.id]))
+
+    def test_cursor_anterior(self):
+        primera = self._pagina().json()
+        segunda = self._pagina(cursor=primera['next']).json()
+        regreso = self._pagina(cursor=segunda['prev']).json()
+        self.assertEqual(
+            [r['id'] for r in regreso['resultados']], [r['id'] for r in primera['resultados']]
+        )
+
+    def test_cursor_invalido_responde_400(self):
+        valido = codificar_cursor('next', timezone.now(), 1)
+        manipulados = {
+            'no es base64': '%%%',
+            'json inválido': base64.urlsafe_b64encode(b'{no json').decode(),
+            'dirección desconocida': codificar_cursor('arriba', timezone.now(), 1),
+            'fecha inválida': codificar_cursor('next', 'ayer', 1),
+            'id no numérico': codificar_cursor('next', timezone.now(), 'uno'),
+            'truncado': valido[:len(valido) // 2],
+        }
+        for descripcion, cursor in manipulados.items():
+            with self.subTest(cursor=descripcion):
+                respuesta = self._pagina(cursor=cursor)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('error', respuesta.json())
+
+    def test_lista_html_con_cursor_invalido_muestra_la_primera_pagina(self):
+        respuesta = self.client.get(reverse('bugtracker:lista_bugs'), {'cursor': 'manipulado'})
+        self.assertEqual(respuesta.status_code, 200)
+        primeros = list(Bug.objects.order_by('-creacion', '-id')[:BUGS_POR_PAGINA])
+        self.assertEqual(list(respuesta.context['bugs']), primeros)
+
+
+class CatalogosListaBugsTests(TestCase):
+    """lista_bugs lee los catálogos de la caché una vez por request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='catalogos@example.com', nick='catalogos', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Catálogos')
+        Estado.objects.create(nombre='Abierto')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def _consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('bugtracker:lista_bugs'))
+        self.assertEqual(respuesta.status_code, 200)
+        return [consulta['sql'] for consulta in consultas.captured_queries]
+
+    def test_request_caliente_no_consulta_los_catalogos(self):
+        self._consultas()
+        tablas = [
+            connection.ops.quote_name(modelo._meta.db_table)
+            for modelo in (Proyecto, Estado, Prioridad, Sprint)
+        ]
+        caliente = self._consultas()
+        for tabla in tablas:
+            self.assertFalse(
+                [sql for sql in caliente if f'FROM {tabla}' in sql], f'{tabla} consultada con la caché caliente'
+            )
+        self.assertEqual(len(self._consultas()), len(caliente))
+
+    def test_los_formularios_reciben_los_catalogos_de_la_vista(self):
+        with mock.patch('apps.bugtracker.views.catalogos_bug', wraps=catalogos_bug) as leer:
+            respuesta = self.client.get(reverse('bugtracker:lista_bugs'))
+        self.assertEqual(leer.call_count, 1)
+        prioridades = [pk for pk, _ in respuesta.context['form'].fields['prioridad'].choices][1:]
+        self.assertEqual(prioridades, [prioridad.pk for prioridad in respuesta.context['prioridades']])
+        self.assertEqual(
+            list(respuesta.context['form_masivo'].fields['prioridad'].choices),
+            list(respuesta.context['form'].fields['prioridad'].choices),
+        )
+
+    def test_el_catalogo_se_invalida_al_guardar(self):
+        self._consultas()
+        with self.captureOnCommitCallbacks(execute=True):
+            Estado.objects.create(nombre='Cerrado')
+        respuesta = self.client.get(reverse('bugtracker:lista_bugs'))
+        self.assertIn('Cerrado', [estado.nombre for estado in respuesta.context['estados']])
+
+
+class EstadisticasBugTests(TestCase):
+    """Conteos materializados por proyecto: señales, contar_bugs y recalcular_estadisticas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='estadisticas@example.com', nick='estadisticas', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Estadísticas')
+        cls.otro_proyecto = Proyecto.objects.create(nombre='Otro')
+        cls.abierto = Estado.objects.create(nombre='Abierto')
+        cls.cerrado = Estado.objects.create(nombre='Cerrado')
+        cls.alta = Prioridad.objects.create(nombre='Alta estadística')
+        cls.baja = Prioridad.objects.create(nombre='Baja estadística')
+
+    def _crear(self, estado, prioridad=None, proyecto=None):
+        return Bug.objects.create(
+            titulo='Bug', descripcion='-', reportado_por=self.usuario,
+            proyecto=proyecto or self.proyecto, estado=estado, prioridad=prioridad, severidad=prioridad,
+        )
+
+    def test_crear_suma_en_cada_dimension(self):
+        self._crear(self.abierto, self.alta)
+        self._crear(self.abierto, self.baja)
+        self._crear(self.cerrado)
+
+        estadisticas = estadisticas_proyecto(self.proyecto.id)
+        self.assertEqual(estadisticas['total'], 3)
+        self.assertEqual(estadisticas['estado'], {self.abierto.id: 2, self.cerrado.id: 1})
+        self.assertEqual(estadisticas['prioridad'], {self.alta.id: 1, self.baja.id: 1, 0: 1})
+        self.assertEqual(estadisticas['severidad'], {self.alta.id: 1, self.baja.id: 1, 0: 1})
+
+    def test_transicion_mueve_el_conteo(self):
+        bug = self._crear(self.abierto, self.alta)
+        bug.estado = self.cerrado
+        bug.save()
+
+        estadisticas = estadisticas_proyecto(self.proyecto.id)
+        self.assertEqual(estadisticas['total'], 1)
+        self.assertEqual(estadisticas['estado'], {self.cerrado.id: 1})
+
+        # Un bug recargado sin cambios no altera los conteos
+        Bug.objects.get(pk=bug.pk).save()
+        self.assertEqual(estadisticas_proyecto(self.proyecto.id), estadisticas)
+
+    def test_cambio_de_proyecto(self):
+        bug = self._crear(self.abierto)
+        bug.proyecto = self.otro_proyecto
+        bug.save()
+        self.assertEqual(estadisticas_proyecto(self.proyecto.id)['total'], 0)
+        self.assertEqual(estadisticas_proyecto(self.otro_proyecto.id)['estado'], {self.abierto.id: 1})
+
+    def test_eliminar_descuenta(self):
+        bug = self._crear(self.abierto, self.alta)
+        self._crear(self.abierto)
+        bug.delete()
+
+        estadisticas = estadisticas_proyecto(self.proyecto.id)
+        self.assertEqual(estadisticas['total'], 1)
+        self.assertEqual(estadisticas['prioridad'], {0: 1})
+
+    def test_contar_bugs_por_filtro(self):
+        self._crear(self.abierto, self.alta)
+        self._crear(self.abierto, self.alta)
+        self._crear(self.abierto, self.baja)
+        self._crear(self.cerrado, self.alta)
+
+        self.assertEqual(contar_bugs(self.proyecto.id), 4)
+        self.assertEqual(contar_bugs(self.proyecto.id, estado_id=self.abierto.id), 3)
+        self.assertEqual(contar_bugs(self.proyecto.id, prioridad_id=self.alta.id), 3)
+        self.assertEqual(contar_bugs(self.proyecto.id, self.abierto.id, self.alta.id), 2)
+        self.assertEqual(contar_bugs(self.proyecto.id, self.cerrado.id, self.baja.id), 0)
+        self.assertEqual(contar_bugs(self.otro_proyecto.id), 0)
+
+    def test_recalcular_estadisticas_reconstruye_los_conteos(self):
+        self._crear(self.abierto, self.alta)
+        self._crear(self.cerrado, self.baja)
+        self._crear(self.abierto, proyecto=self.otro_proyecto)
+        esperadas = {
+            proyecto.id: estadisticas_proyecto(proyecto.id) for proyecto in (self.proyecto, self.otro_proyecto)
+        }
+
+        # Conteos desfasados (p. ej. por un update() sin señales)
+        EstadisticaBug.objects.filter(proyecto=self.proyecto).update(total=99)
+        EstadisticaBug.objects.filter(proyecto=self.otro_proyecto).delete()
+
+        salida = StringIO()
+        call_command('recalcular_estadisticas', '--proyecto', str(self.proyecto.id), stdout=salida)
+        self.assertEqual(estadisticas_proyecto(self.proyecto.id), esperadas[self.proyecto.id])
+        self.assertEqual(estadisticas_proyecto(self.otro_proyecto.id)['total'], 0)
+
+        call_command('recalcular_estadisticas', stdout=salida)
+        for proyecto_id, estadisticas in esperadas.items():
+            self.assertEqual(estadisticas_proyecto(proyecto_id), estadisticas)
+        self.assertIn('Estadísticas recalculadas', salida.getvalue())
+
+
+class ComentariosBugTests(TestCase):
+    """Hilo de comentarios paginado por cursor y contador total_comentarios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='comentarios@example.com', nick='comentarios', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Comentarios')
+        cls.bug = Bug.objects.create(titulo='Bug', descripcion='-', proyecto=cls.proyecto, reportado_por=cls.usuario)
+        cls.otro_bug = Bug.objects.create(titulo='Otro', descripcion='-', proyecto=cls.proyecto, reportado_por=cls.usuario)
+        ahora = timezone.now()
+        ComentarioBug.objects.bulk_create(
+            [ComentarioBug(bug=cls.bug, usuario=cls.usuario, comentario=f'C {i}') for i in range(COMENTARIOS_POR_PAGINA * 2 + 3)]
+            + [ComentarioBug(bug=cls.otro_bug, usuario=cls.usuario, comentario=f'O {i}') for i in range(200)]
+        )
+        # Varios comentarios con la misma fecha: el id desempata dentro del cursor
+        comentarios = list(ComentarioBug.objects.order_by('id'))
+        for i, comentario in enumerate(comentarios):
+            comentario.creacion = ahora - timedelta(minutes=i // 4)
+        ComentarioBug.objects.bulk_update(comentarios, ['creacion'])
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def _siguiente(self, cursor):
+        return self.client.get(reverse('bugtracker:comentarios_bug', args=[self.bug.id]), {'cursor': cursor})
+
+    def test_recorre_el_hilo_en_orden(self):
+        respuesta = self.client.get(reverse('bugtracker:detalle_bug', args=[self.bug.id]))
+        self.assertEqual(respuesta.status_code, 200)
+        vistos = [comentario.id for comentario in respuesta.context['comentarios']]
+        self.assertEqual(len(vistos), COMENTARIOS_POR_PAGINA)
+
+        cursor = respuesta.context['cursor_comentarios']
+        while cursor:
+            pagina = self._siguiente(cursor).json()
+            vistos.extend(int(pk) for pk in re.findall(r'data-comment-id="(\d+)"', pagina['html']))
+            cursor = pagina['next']
+
+        esperados = list(
+            ComentarioBug.objects.filter(bug=self.bug).order_by('-creacion', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+
+    def test_cursor_invalido_responde_400(self):
+        respuesta = self._siguiente('manipulado')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('error', respuesta.json())
+
+    def test_pagina_usa_el_indice_del_hilo(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE TABLE `{ComentarioBug._meta.db_table}`' if connection.vendor == 'mysql' else 'ANALYZE')
+        primera = self.client.get(reverse('bugtracker:detalle_bug', args=[self.bug.id]))
+        with CaptureQueriesContext(connection) as consultas:
+            self._siguiente(primera.context['cursor_comentarios'])
+        tabla = connection.ops.quote_name(ComentarioBug._meta.db_table)
+        sql = next(
+            consulta['sql'] for consulta in consultas.captured_queries
+            if f'FROM {tabla}' in consulta['sql'] and 'ORDER BY' in consulta['sql']
+        )
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+                plan = cursor.fetchone()[0]
+                self.assertNotIn('"using_filesort": true', plan, plan)
+                return
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(' '.join(str(columna) for columna in fila) for fila in cursor.fetchall())
+        self.assertIn('comentario_bug_creacion_idx', plan, plan)
+        self.assertNotIn('TEMP B-TREE', plan, plan)
+
+    def test_total_comentarios_se_mantiene_con_las_senales(self):
+        bug = Bug.objects.create(titulo='Contador', descripcion='-', proyecto=self.proyecto, reportado_por=self.usuario)
+        primero = ComentarioBug.objects.create(bug=bug, usuario=self.usuario, comentario='Uno')
+        ComentarioBug.objects.create(bug=bug, usuario=self.usuario, comentario='Dos')
+        bug.refresh_from_db()
+        self.assertEqual(bug.total_comentarios, 2)
+
+        # Editar un comentario no lo vuelve a contar
+        primero.comentario = 'Uno editado'
+        primero.save()
+        primero.delete()
+        bug.refresh_from_db()
+        self.assertEqual(bug.total_comentarios, 1)
+
+    def test_guardar_un_bug_desactualizado_no_pisa_el_contador(self):
+        bug = Bug.objects.create(titulo='Contador', descripcion='-', proyecto=self.proyecto, reportado_por=self.usuario)
+        desactualizado = Bug.objects.get(pk=bug.pk)
+        ComentarioBug.objects.create(bug=bug, usuario=self.usuario, comentario='Uno')
+
+        desactualizado.titulo = 'Contador editado'
+        desactualizado.save()
+        bug.refresh_from_db()
+        self.assertEqual((bug.titulo, bug.total_comentarios), ('Contador editado', 1))
+
+
+class AutocompletarUsuariosTests(TestCase):
+    """Endpoint autocompletar_usuarios y widget SelectAutocompletar del asignado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='auto@example.com', nick='auto', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Autocompletar')
+        cls.otro_proyecto = Proyecto.objects.create(nombre='Ajeno')
+        cls.miembros = [
+            Usuario.objects.create(correo=f'dev{i:02d}@example.com', nick=f'ana{i:02d}', password='x')
+            for i in range(AUTOCOMPLETAR_LIMITE + 5)
+        ]
+        cls.beto = Usuario.objects.create(correo='roberto@example.com', nick='beto', password='x')
+        cls.inactivo = Usuario.objects.create(correo='anabel@example.com', nick='anabel', password='x', is_active=False)
+        cls.ajeno = Usuario.objects.create(correo='ana.ajena@example.com', nick='ana_ajena', password='x')
+        for miembro in cls.miembros + [cls.beto, cls.inactivo]:
+            Empresa_Proyecto.objects.create(proyecto=cls.proyecto, usuario=miembro)
+        Empresa_Proyecto.objects.create(proyecto=cls.otro_proyecto, usuario=cls.ajeno)
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def _buscar(self, **parametros):
+        respuesta = self.client.get(reverse('bugtracker:autocompletar_usuarios'), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()['resultados']
+
+    def test_prefijo_de_nick_o_correo(self):
+        self.assertEqual([r['nick'] for r in self._buscar(proyecto=self.proyecto.id, q='BE')], ['beto'])
+        self.assertEqual([r['nick'] for r in self._buscar(proyecto=self.proyecto.id, q='robert')], ['beto'])
+        # Solo prefijo: 'eto' está dentro de 'beto' pero no al inicio
+        self.assertEqual(self._buscar(proyecto=self.proyecto.id, q='eto'), [])
+
+    def test_limite_de_resultados(self):
+        resultados = self._buscar(proyecto=self.proyecto.id, q='ana')
+        self.assertEqual(len(resultados), AUTOCOMPLETAR_LIMITE)
+        self.assertEqual([r['nick'] for r in resultados], [f'ana{i:02d}' for i in range(AUTOCOMPLETAR_LIMITE)])
+
+    def test_solo_miembros_activos_del_proyecto(self):
+        nicks = {r['nick'] for r in self._buscar(proyecto=self.proyecto.id, q='ana')}
+        self.assertNotIn('ana_ajena', nicks)
+        self.assertNotIn('anabel', nicks)
+        self.assertEqual([r['nick'] for r in self._buscar(proyecto=self.otro_proyecto.id, q='ana')], ['ana_ajena'])
+
+    def test_sin_proyecto_no_devuelve_resultados(self):
+        self.assertEqual(self._buscar(q='ana'), [])
+        self.assertEqual(self._buscar(proyecto='uno', q='ana'), [])
+
+    def test_formulario_ligado_renderiza_solo_la_opcion_seleccionada(self):
+        seleccionado = self.miembros[3]
+        form = AccionMasivaBugForm(data={'asignado_a': seleccionado.id}, proyecto_id=self.proyecto.id)
+        # La validación (que también dispara el render de un form ligado) consulta aparte
+        form.full_clean()
+        with CaptureQueriesContext(connection) as consultas:
+            html = str(form['asignado_a'])
+        # Una consulta por la opción seleccionada, no por todo el queryset de usuarios
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'value="{seleccionado.id}" selected', html)
+        self.assertIn(seleccionado.nick, html)
+        self.assertIn(f'data-autocompletar="{reverse("bugtracker:autocompletar_usuarios")}"', html)
+        self.assertIn(f'data-proyecto="{self.proyecto.id}"', html)
+
+    def test_formulario_sin_valor_renderiza_solo_la_opcion_vacia(self):
+        with CaptureQueriesContext(connection) as consultas:
+            html = str(BugForm(catalogos={'proyectos': [], 'estados': [], 'prioridades': [], 'sprints': []})['asignado_a'])
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual(html.count('<option'), 1)
+
+
+class BusquedaBugsTests(TestCase):
+    """Índice invertido: coincidencias, ranking, reindexación y términos comunes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='busca@example.com', nick='busca', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Búsqueda')
+
+    def _bug(self, titulo, descripcion='-'):
+        return Bug.objects.create(
+            titulo=titulo, descripcion=descripcion, proyecto=self.proyecto, reportado_por=self.usuario
+        )
+
+    def _buscar(self, consulta, **kwargs):
+        return [bug.titulo for bug, _ in buscar_bugs(consulta, **kwargs)]
+
+    def test_exige_todos_los_terminos_sin_distinguir_tildes(self):
+        self._bug('Error de validación en el formulario de login')
+        self._bug('Error al exportar CSV', 'El archivo sale vacío')
+        self._bug('Menú lateral desalineado')
+
+        self.assertEqual(self._buscar('VALIDACION Login'), ['Error de validación en el formulario de login'])
+        self.assertEqual(self._buscar('archivo vacio'), ['Error al exportar CSV'])
+        self.assertEqual(self._buscar('validación csv'), [])
+        self.assertEqual(self._buscar('de la el'), [])
+
+    def test_el_titulo_pesa_mas_que_descripcion_y_comentarios(self):
+        en_titulo = self._bug('Pantalla congelada')
+        en_descripcion = self._bug('Cierre inesperado', 'La pantalla queda en negro')
+        en_comentario = self._bug('Reinicio del equipo')
+        ComentarioBug.objects.create(bug=en_comentario, usuario=self.usuario, comentario='Pasa con otra pantalla')
+        self._bug('Sin relación')
+        self._bug('Tampoco relacionado')
+
+        resultados = buscar_bugs('pantalla')
+        self.assertEqual(resultados[0][0], en_titulo)
+        self.assertEqual({bug for bug, _ in resultados[1:]}, {en_descripcion, en_comentario})
+        self.assertGreater(resultados[0][1], resultados[1][1])
+
+    def test_reindexa_al_editar(self):
+        bug = self._bug('Fallo de impresión')
+        comentario = ComentarioBug.objects.create(bug=bug, usuario=self.usuario, comentario='Con la impresora HP')
+
+        bug.titulo = 'Fallo de exportación'
+        bug.save()
+        comentario.comentario = 'Con la impresora Epson'
+        comentario.save()
+
+        self.assertEqual(self._buscar('impresion'), [])
+        self.assertEqual(self._buscar('exportacion'), ['Fallo de exportación'])
+        self.assertEqual(self._buscar('hp'), [])
+        self.assertEqual(self._buscar('epson'), ['Fallo de exportación'])
+
+    def test_no_reindexa_si_el_texto_no_cambio(self):
+        bug = self._bug('Sesión expirada', 'Al volver de la suspensión')
+        otro = Estado.objects.create(nombre='Cerrado')
+        with mock.patch('apps.bugtracker.signals.busqueda.indexar_bug') as indexar:
+            bug.estado = otro
+            bug.save()
+            Bug.objects.get(pk=bug.pk).save()
+            Bug.objects.only('id', 'estado').get(pk=bug.pk).save(update_fields=['estado'])
+        indexar.assert_not_called()
+
+        bug.descripcion = 'Al volver de la hibernación'
+        bug.save()
+        self.assertEqual(self._buscar('hibernacion'), ['Sesión expirada'])
+        self.assertEqual(self._buscar('suspension'), [])
+
+    def test_elimina_entradas_al_borrar(self):
+        bug = self._bug('Botón guardar inactivo')
+        comentario = ComentarioBug.objects.create(bug=bug, usuario=self.usuario, comentario='Reproducido en Safari')
+
+        comentario_id = comentario.pk
+        comentario.delete()
+        self.assertEqual(self._buscar('safari'), [])
+        self.assertFalse(TerminoBug.objects.filter(comentario_id=comentario_id).exists())
+
+        bug.delete()
+        self.assertEqual(self._buscar('guardar'), [])
+        self.assertFalse(TerminoBug.objects.exists())
+
+    def test_terminos_comunes_con_el_total_real_de_bugs(self):
+        # Los bugs eliminados dejan huecos en los ids: el total no es el id máximo
+        for bug in [self._bug(f'Relleno {i}') for i in range(8)]:
+            bug.delete()
+        self._bug('Teclado bluetooth desconectado')
+        self._bug('Teclado sin respuesta')
+        self._bug('Teclado numérico')
+        self._bug('Auriculares bluetooth')
+
+        # 'teclado' está en 3 de 4 bugs: no discrimina y se ignora
+        self.assertEqual(
+            sorted(self._buscar('teclado bluetooth')), ['Auriculares bluetooth', 'Teclado bluetooth desconectado']
+        )
+
+
+class DuplicadosBugsTests(TestCase):
+    """MinHash/LSH: candidatos a duplicado, cubetas al editar o eliminar y aviso en crear_bug"""
+
+    TITULO = 'Error al iniciar sesión con Google en Android'
+    DESCRIPCION = 'La aplicación se cierra al pulsar el botón de Google en la pantalla de ingreso'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='duplica@example.com', nick='duplica', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Móvil')
+        cls.otro_proyecto = Proyecto.objects.create(nombre='Web')
+
+    def setUp(self):
+        self.bug = Bug.objects.create(
+            titulo=self.TITULO, descripcion=self.DESCRIPCION, proyecto=self.proyecto, reportado_por=self.usuario
+        )
+        Bug.objects.create(
+            titulo='Exportación a CSV sin encabezados', descripcion='Las columnas salen sin nombre',
+            proyecto=self.proyecto, reportado_por=self.usuario,
+        )
+
+    def _duplicados(self, titulo, descripcion=DESCRIPCION, proyecto=None):
+        return buscar_duplicados(titulo, descripcion, (proyecto or self.proyecto).id)
+
+    def test_firma_y_similitud(self):
+        conjunto = shingles(self.TITULO, self.DESCRIPCION)
+        # Mayúsculas, tildes y palabras vacías no cambian los shingles
+        self.assertEqual(shingles('ERROR al iniciar sesion con GOOGLE en Android', self.DESCRIPCION), conjunto)
+        self.assertEqual(len(bandas(firma(conjunto))), NUM_BANDAS)
+        self.assertLess(jaccard(conjunto, shingles('Exportación a CSV', 'Sin encabezados')), UMBRAL_SIMILITUD)
+
+    def test_encuentra_titulos_casi_identicos(self):
+        resultados = self._duplicados('Error al iniciar sesion con Google en Android 14')
+        self.assertEqual([bug for bug, _ in resultados], [self.bug])
+        self.assertGreaterEqual(resultados[0][1], UMBRAL_SIMILITUD)
+
+    def test_no_encuentra_textos_distintos_ni_de_otro_proyecto(self):
+        self.assertEqual(self._duplicados('Notificaciones duplicadas', 'Llegan dos correos por cada cambio'), [])
+        self.assertEqual(self._duplicados(self.TITULO, proyecto=self.otro_proyecto), [])
+        self.assertEqual(buscar_duplicados(self.TITULO, self.DESCRIPCION, self.proyecto.id, excluir_id=self.bug.id), [])
+
+    def test_cubetas_al_editar_y_eliminar(self):
+        self.assertEqual(BandaBug.objects.filter(bug=self.bug).count(), NUM_BANDAS)
+
+        self.bug.proyecto = self.otro_proyecto
+        self.bug.save()
+        self.assertEqual(self._duplicados(self.TITULO), [])
+        self.assertEqual([bug for bug, _ in self._duplicados(self.TITULO, proyecto=self.otro_proyecto)], [self.bug])
+
+        self.bug.delete()
+        self.assertFalse(BandaBug.objects.filter(proyecto=self.otro_proyecto).exists())
+        self.assertEqual(self._duplicados(self.TITULO, proyecto=self.otro_proyecto), [])
+
+    def test_no_recalcula_la_firma_si_el_texto_no_cambio(self):
+        with mock.patch('apps.bugtracker.signals.duplicados.indexar_firma') as indexar:
+            self.bug.estado = Estado.objects.create(nombre='Cerrado')
+            self.bug.save()
+        indexar.assert_not_called()
+
+    def test_crear_bug_avisa_de_duplicados(self):
+        self.client.force_login(self.usuario)
+        datos = {'titulo': f'{self.TITULO}.', 'descripcion': self.DESCRIPCION, 'proyecto': self.proyecto.id}
+
+        respuesta = self.client.post(reverse('bugtracker:crear_bug'), datos, follow=True)
+        self.assertRedirects(respuesta, reverse('bugtracker:lista_bugs'))
+        avisos = [str(mensaje) for mensaje in respuesta.context['messages']]
+        self.assertTrue(any(f'#{self.bug.id}' in aviso for aviso in avisos), avisos)
+        self.assertEqual(Bug.objects.filter(proyecto=self.proyecto).count(), 2)
+
+        self.client.post(reverse('bugtracker:crear_bug'), dict(datos, ignorar_duplicados='1'))
+        self.assertEqual(Bug.objects.filter(proyecto=self.proyecto).count(), 3)
+
+
+class ImportarBugsTests(TestCase):
+    """Comando import_bugs: inserción en bloque, registros inválidos y checkpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='importa@example.com', nick='importador', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Importado')
+        cls.estado = Estado.objects.create(nombre='Abierto')
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, 'bugs.ndjson')
+
+    def _registro(self, titulo, **extra):
+        registro = {
+            'titulo': titulo,
+            'descripcion': f'Descripción de {titulo}',
+            'proyecto': self.proyecto.nombre,
+            'estado': 'abierto',
+            'reportado_por': self.usuario.correo,
+        }
+        registro.update(extra)
+        return json.dumps(registro)
+
+    def _importar(self, lineas, **opciones):
+        with open(self.ruta, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lineas) + '\n')
+        errores = StringIO()
+        call_command('import_bugs', self.ruta, stdout=StringIO(), stderr=errores, **opciones)
+        return errores.getvalue()
+
+    def test_importa_sin_returning_en_bulk_insert(self):
+        features = type(connection.features)
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', False), \
+                CaptureQueriesContext(connection) as consultas:
+            self._importar([
+                self._registro('Uno', comentarios=[{'usuario': 'importador', 'comentario': 'Primero'}]),
+                self._registro('Dos', creacion='2024-01-02T03:04:05+00:00'),
+                self._registro('Tres', comentarios=[
+                    {'usuario': 'importador', 'comentario': 'A'},
+                    {'usuario': 'importador', 'comentario': 'B'},
+                ]),
+            ], lote=10)
+
+        bugs = {bug.titulo: bug for bug in Bug.objects.filter(proyecto=self.proyecto)}
+        self.assertEqual(set(bugs), {'Uno', 'Dos', 'Tres'})
+        for titulo, bug in bugs.items():
+            self.assertEqual(bug.descripcion, f'Descripción de {titulo}')
+        # Los ids se recuperan por la columna del lote, sin marcar ni reescribir la descripción
+        self.assertEqual(len({bug.lote_importacion for bug in bugs.values()}), 1)
+        self.assertIsNotNone(bugs['Uno'].lote_importacion)
+        tabla = connection.ops.quote_name(Bug._meta.db_table)
+        self.assertFalse([
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(f'UPDATE {tabla}') and 'descripcion' in consulta['sql']
+        ])
+        self.assertEqual(bugs['Dos'].creacion.year, 2024)
+        self.assertEqual(
+            sorted(ComentarioBug.objects.filter(bug=bugs['Tres']).values_list('comentario', flat=True)), ['A', 'B']
+        )
+        self.assertEqual(ComentarioBug.objects.get(bug=bugs['Uno']).comentario, 'Primero')
+        self.assertEqual(bugs['Tres'].total_comentarios, 2)
+
+    def test_registros_que_no_son_objetos_se_rechazan(self):
+        errores = self._importar([
+            '[1, 2]',
+            '"texto"',
+            self._registro('Comentario inválido', comentarios=['no es un objeto']),
+            self._registro('Válido'),
+        ])
+
+        self.assertEqual(list(Bug.objects.values_list('titulo', flat=True)), ['Válido'])
+        self.assertEqual(errores.count('rechazado'), 3)
+
+    def test_lote_fallido_no_avanza_el_checkpoint(self):
+        lineas = [self._registro(f'Bug {i}') for i in range(4)]
+        original = Command._insertar_bugs
+        llamadas = []
+
+        def insertar_y_fallar(comando, bugs):
+            llamadas.append(len(bugs))
+            if len(llamadas) == 2:
+                raise RuntimeError('fallo simulado')
+            original(comando, bugs)
+
+        with mock.patch.object(Command, '_insertar_bugs', insertar_y_fallar):
+            with self.assertRaises(RuntimeError):
+                self._importar(lineas, lote=2)
+
+        with open(f'{self.ruta}.checkpoint', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['registro'], 2)
+
+        self._importar(lineas, lote=2)
+        self.assertEqual(Bug.objects.count(), 4)
+        self.assertFalse(os.path.exists(f'{self.ruta}.checkpoint'))
+
+
+class ActualizacionMasivaTests(TestCase):
+    """actualizar_bugs y AccionMasivaBugForm: estadísticas, historial y miembros del proyecto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='masivo@example.com', nick='masivo', password='x')
+        cls.otro = Usuario.objects.create(correo='otro@example.com', nick='otro', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Masivo')
+        cls.abierto = Estado.objects.create(nombre='Abierto')
+        cls.cerrado = Estado.objects.create(nombre='Cerrado')
+        cls.bugs = [
+            Bug.objects.create(
+                titulo=f'Bug {i}', descripcion='-', proyecto=cls.proyecto,
+                estado=cls.cerrado if i == 0 else cls.abierto, reportado_por=cls.usuario,
+            )
+            for i in range(4)
+        ]
+
+    def _verificar_actualizacion(self):
+        with CaptureQueriesContext(connection) as consultas:
+            total = actualizar_bugs([bug.id for bug in self.bugs], {'estado': self.cerrado.id}, self.usuario)
+
+        # Los historiales se insertan en bloque, no uno por bug
+        inserciones = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('INSERT') and Historial._meta.db_table in consulta['sql'].split('(')[0]
+        ]
+        self.assertEqual(len(inserciones), 1)
+
+        # El bug que ya estaba cerrado no cuenta como modificado
+        self.assertEqual(total, 3)
+        estadisticas = estadisticas_proyecto(self.proyecto.id)
+        self.assertEqual(estadisticas['total'], 4)
+        self.assertEqual(estadisticas['estado'], {self.cerrado.id: 4})
+
+        historiales = Historial.objects.filter(bug__in=self.bugs)
+        self.assertEqual(sorted(historiales.values_list('bug_id', flat=True)), [bug.id for bug in self.bugs[1:]])
+        detalles = DetalleHistorial.objects.filter(historial__in=historiales).select_related('historial')
+        self.assertEqual(len(detalles), 3)
+        for detalle in detalles:
+            self.assertEqual(
+                (detalle.campo, detalle.valor_anterior, detalle.valor_nuevo), ('estado', 'Abierto', 'Cerrado')
+            )
+        self.assertEqual({detalle.historial.bug_id for detalle in detalles}, {bug.id for bug in self.bugs[1:]})
+
+    def test_actualiza_estadisticas_e_historial(self):
+        self._verificar_actualizacion()
+
+    def test_historial_sin_returning_en_bulk_insert(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self._verificar_actualizacion()
+
+    def test_asignado_debe_ser_miembro_de_cada_proyecto(self):
+        datos = {'bugs': [str(bug.id) for bug in self.bugs], 'asignado_a': str(self.otro.id)}
+
+        form = AccionMasivaBugForm(datos)
+        self.assertFalse(form.is_valid())
+        self.assertIn('asignado_a', form.errors)
+
+        Empresa_Proyecto.objects.create(proyecto=self.proyecto, usuario=self.otro)
+        self.assertTrue(AccionMasivaBugForm(datos).is_valid())
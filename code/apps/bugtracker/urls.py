@@ -6,13 +6,20 @@ app_name = 'bugtracker'
 urlpatterns = [
     # Lista y CRUD de bugs
     path('bugs/', views.lista_bugs, name='lista_bugs'),
+    path('bugs/json/', views.lista_bugs_json, name='lista_bugs_json'),
+    path('bugs/exportar/', views.exportar_bugs, name='exportar_bugs'),
+    path('bugs/duplicados/', views.duplicados_bug_json, name='duplicados_bug'),
+    path('usuarios/autocompletar/', views.autocompletar_usuarios, name='autocompletar_usuarios'),
+    path('bugs/buscar/', views.buscar_bugs_json, name='buscar_bugs'),
     path('bugs/crear/', views.crear_bug, name='crear_bug'),
+    path('bugs/actualizar-masivo/', views.actualizar_bugs_masivo, name='actualizar_bugs_masivo'),
     path('bugs/<int:bug_id>/', views.detalle_bug, name='detalle_bug'),
     path('bugs/<int:bug_id>/editar/', views.editar_bug, name='editar_bug'),
     path('bugs/<int:bug_id>/eliminar/', views.eliminar_bug, name='eliminar_bug'),
     path('bugs/<int:bug_id>/solicitar-revision/', views.solicitar_revision, name='solicitar_revision'),
     
     # Comentarios
+    path('bugs/<int:bug_id>/comentarios/', views.comentarios_bug, name='comentarios_bug'),
     path('bugs/<int:bug_id>/comentarios/agregar/', views.agregar_comentario, name='agregar_comentario'),
     path('comentarios/<int:comentario_id>/editar/', views.editar_comentario, name='editar_comentario'),
     path('comentarios/<int:comentario_id>/eliminar/', views.eliminar_comentario, name='eliminar_comentario'),
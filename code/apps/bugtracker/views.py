@@ -1,22 +1,60 @@
+import csv
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.template.loader import render_to_string
 from .models import Bug, ComentarioBug
-from .forms import BugForm, ComentarioBugForm
-from apps.proyectos.models import Proyecto, Sprint
-from apps.commons.models import Estado, Prioridad
+from .forms import BugForm, ComentarioBugForm, AccionMasivaBugForm
+from .acciones import actualizar_bugs, MAX_BUGS_MASIVOS
+from .busqueda import buscar_bugs
+from .duplicados import buscar_duplicados
+from .estadisticas import contar_bugs
+from .catalogos import catalogos_bug
+from apps.commons.models import Estado
+from apps.commons.paginacion import paginar_keyset, CursorInvalido
+from apps.notificaciones.eventos import registrar_solicitud_revision
+from apps.empresas.models import Empresa_Proyecto
 
 
-@login_required
-def lista_bugs(request):
-    """Vista para listar todos los bugs"""
+User = get_user_model()
+
+BUGS_POR_PAGINA = 20
+COMENTARIOS_POR_PAGINA = 10
+EXPORTACION_CHUNK = 2000
+AUTOCOMPLETAR_LIMITE = 10
+
+# Columna exportada -> campo (con joins) proyectado por values()
+COLUMNAS_EXPORTACION = {
+    'id': 'id',
+    'titulo': 'titulo',
+    'descripcion': 'descripcion',
+    'proyecto': 'proyecto__nombre',
+    'sprint': 'sprint__nombre',
+    'estado': 'estado__nombre',
+    'prioridad': 'prioridad__nombre',
+    'severidad': 'severidad__nombre',
+    'reportado_por': 'reportado_por__nick',
+    'asignado_a': 'asignado_a__nick',
+    'creacion': 'creacion',
+}
+
+
+def _filtrar_bugs(request):
+    """Aplica los filtros opcionales de la lista de bugs (proyecto, estado, prioridad)"""
     bugs = Bug.objects.select_related(
         'proyecto', 'sprint', 'estado', 'prioridad', 'severidad',
         'reportado_por', 'asignado_a'
-    ).order_by('-creacion')
+    )
     
-    # Filtros opcionales
     proyecto_id = request.GET.get('proyecto')
     estado_id = request.GET.get('estado')
     prioridad_id = request.GET.get('prioridad')
@@ -28,35 +66,226 @@ def lista_bugs(request):
     if prioridad_id:
         bugs = bugs.filter(prioridad_id=prioridad_id)
     
-    # Para los filtros en el template
-    proyectos = Proyecto.objects.all()
-    estados = Estado.objects.all()
-    # Filtrar prioridades para mostrar solo: Baja, Media, Alta, Crítica
-    prioridades = Prioridad.objects.filter(
-        nombre__in=['Baja', 'Media', 'Alta', 'Crítica']
-    )
+    return bugs
+
+
+@login_required
+def lista_bugs(request):
+    """Vista para listar los bugs paginados por cursor (-creacion, -id)"""
+    bugs = _filtrar_bugs(request)
     
-    # Importar Sprint desde el modelo correcto
-    from apps.proyectos.models import Sprint
-    sprints = Sprint.objects.select_related('proyecto').all()
+    try:
+        pagina = paginar_keyset(bugs, request.GET.get('cursor'), BUGS_POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(bugs, None, BUGS_POR_PAGINA)
     
+    # Conteo desde las estadísticas materializadas (solo con proyecto seleccionado)
+    total_bugs = None
+    proyecto_id = request.GET.get('proyecto')
+    if proyecto_id:
+        total_bugs = contar_bugs(
+            proyecto_id, request.GET.get('estado'), request.GET.get('prioridad')
+        )
+    
+    # Catálogos en caché, leídos una vez para los filtros del template y ambos formularios
+    catalogos = catalogos_bug()
     context = {
-        'bugs': bugs,
-        'proyectos': proyectos,
-        'estados': estados,
-        'prioridades': prioridades,
-        'sprints': sprints,
-        'form': BugForm(),
+        'bugs': pagina['objetos'],
+        'total_bugs': total_bugs,
+        'cursor_siguiente': pagina['next'],
+        'cursor_anterior': pagina['prev'],
+        **catalogos,
+        'form': BugForm(catalogos=catalogos),
+        'form_masivo': AccionMasivaBugForm(proyecto_id=proyecto_id, catalogos=catalogos),
     }
     return render(request, 'bugtracker/lista_bugs.html', context)
 
 
+@login_required
+def lista_bugs_json(request):
+    """Variante JSON de lista_bugs para el scroll infinito"""
+    bugs = _filtrar_bugs(request)
+    
+    try:
+        pagina = paginar_keyset(bugs, request.GET.get('cursor'), BUGS_POR_PAGINA)
+    except CursorInvalido:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+    
+    resultados = [
+        {
+            'id': bug.id,
+            'titulo': bug.titulo,
+            'descripcion': bug.descripcion,
+            'proyecto': bug.proyecto.nombre if bug.proyecto else None,
+            'sprint': bug.sprint.nombre if bug.sprint else None,
+            'estado': bug.estado.nombre if bug.estado else None,
+            'prioridad': bug.prioridad.nombre if bug.prioridad else None,
+            'severidad': bug.severidad.nombre if bug.severidad else None,
+            'reportado_por': bug.reportado_por.nick,
+            'asignado_a': bug.asignado_a.nick if bug.asignado_a else None,
+            'creacion': bug.creacion.isoformat(),
+            'url': reverse('bugtracker:detalle_bug', args=[bug.id]),
+        }
+        for bug in pagina['objetos']
+    ]
+    
+    return JsonResponse({
+        'resultados': resultados,
+        'next': pagina['next'],
+        'prev': pagina['prev'],
+    })
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de almacenarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_por_bloques(bugs):
+    """
+    Genera las filas de COLUMNAS_EXPORTACION en orden (-creacion, -id) consultando
+    bloques de EXPORTACION_CHUNK por cursor. iterator() no acota la memoria en MySQL
+    (mysqlclient trae el resultado completo al cliente); cada bloque sí, en todo motor.
+    """
+    filas = bugs.order_by('-creacion', '-id').values_list(*COLUMNAS_EXPORTACION.values())
+    posicion_id = list(COLUMNAS_EXPORTACION).index('id')
+    posicion_creacion = list(COLUMNAS_EXPORTACION).index('creacion')
+    bloque = list(filas[:EXPORTACION_CHUNK])
+    while bloque:
+        yield from bloque
+        if len(bloque) < EXPORTACION_CHUNK:
+            break
+        creacion, pk = bloque[-1][posicion_creacion], bloque[-1][posicion_id]
+        siguientes = filas.filter(Q(creacion__lte=creacion), Q(creacion__lt=creacion) | Q(id__lt=pk))
+        bloque = list(siguientes[:EXPORTACION_CHUNK])
+
+
+def _filas_exportacion(bugs, formato):
+    """Genera el contenido de la exportación fila por fila sin materializar el queryset"""
+    filas = _filas_por_bloques(bugs)
+    columnas = list(COLUMNAS_EXPORTACION)
+
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        # BOM para que Excel reconozca el UTF-8
+        yield '\ufeff' + escritor.writerow(columnas)
+        for fila in filas:
+            yield escritor.writerow(
+                [valor.isoformat() if hasattr(valor, 'isoformat') else valor for valor in fila]
+            )
+    else:
+        for fila in filas:
+            registro = dict(zip(columnas, fila))
+            registro['creacion'] = registro['creacion'].isoformat()
+            yield json.dumps(registro, ensure_ascii=False) + '\n'
+
+
+@login_required
+def exportar_bugs(request):
+    """Exporta en CSV o NDJSON todos los bugs que cumplen los filtros de lista_bugs"""
+    formato = request.GET.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return JsonResponse({'error': 'Formato no soportado.'}, status=400)
+    
+    content_type = 'text/csv; charset=utf-8' if formato == 'csv' else 'application/x-ndjson; charset=utf-8'
+    respuesta = StreamingHttpResponse(
+        _filas_exportacion(_filtrar_bugs(request), formato), content_type=content_type
+    )
+    nombre = f"bugs_{timezone.localdate():%Y%m%d}.{formato}"
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
+
+
+@login_required
+def duplicados_bug_json(request):
+    """Bugs probablemente duplicados del título y descripción que se están reportando"""
+    resultados = buscar_duplicados(
+        request.GET.get('titulo', ''),
+        request.GET.get('descripcion', ''),
+        request.GET.get('proyecto') or None,
+        excluir_id=request.GET.get('excluir') or None,
+    )
+    
+    return JsonResponse({
+        'resultados': [
+            {
+                'id': bug.id,
+                'titulo': bug.titulo,
+                'estado': bug.estado.nombre if bug.estado else None,
+                'similitud': round(similitud, 3),
+                'url': reverse('bugtracker:detalle_bug', args=[bug.id]),
+            }
+            for bug, similitud in resultados
+        ]
+    })
+
+
+@login_required
+def autocompletar_usuarios(request):
+    """Búsqueda por prefijo de nick o correo entre los miembros del proyecto (Empresa_Proyecto)"""
+    proyecto_id = request.GET.get('proyecto', '')
+    if not proyecto_id.isdigit():
+        return JsonResponse({'resultados': []})
+    
+    termino = request.GET.get('q', '').strip()
+    usuarios = User.objects.filter(
+        is_active=True,
+        id__in=Empresa_Proyecto.objects.filter(proyecto_id=proyecto_id).values('usuario_id'),
+    )
+    if termino:
+        # Prefijo sin comodín inicial: se resuelve con los índices únicos de nick y correo
+        usuarios = usuarios.filter(Q(nick__istartswith=termino) | Q(correo__istartswith=termino))
+    
+    return JsonResponse({
+        'resultados': [
+            {'id': usuario['id'], 'nick': usuario['nick'], 'correo': usuario['correo']}
+            for usuario in usuarios.order_by('nick').values('id', 'nick', 'correo')[:AUTOCOMPLETAR_LIMITE]
+        ]
+    })
+
+
+@login_required
+def buscar_bugs_json(request):
+    """Búsqueda de texto sobre bugs y comentarios usando el índice invertido"""
+    consulta = request.GET.get('q', '').strip()
+    resultados = buscar_bugs(consulta, proyecto_id=request.GET.get('proyecto') or None)
+    
+    return JsonResponse({
+        'resultados': [
+            {
+                'id': bug.id,
+                'titulo': bug.titulo,
+                'proyecto': bug.proyecto.nombre if bug.proyecto else None,
+                'estado': bug.estado.nombre if bug.estado else None,
+                'puntaje': round(puntaje, 3),
+                'url': reverse('bugtracker:detalle_bug', args=[bug.id]),
+            }
+            for bug, puntaje in resultados
+        ]
+    })
+
+
 @login_required
 def crear_bug(request):
     """Vista para crear un nuevo bug"""
     if request.method == 'POST':
-        form = BugForm(request.POST, request.FILES)
+        form = BugForm(request.POST, request.FILES, usuario=request.user)
         if form.is_valid():
+            # Antes de guardar, avisar de bugs casi idénticos del mismo proyecto
+            if not request.POST.get('ignorar_duplicados'):
+                proyecto = form.cleaned_data.get('proyecto')
+                duplicados = buscar_duplicados(
+                    form.cleaned_data['titulo'], form.cleaned_data['descripcion'],
+                    proyecto.id if proyecto else None
+                )
+                if duplicados:
+                    messages.warning(request, 'El bug no se creó porque parece duplicado de:')
+                    for duplicado, similitud in duplicados:
+                        messages.warning(request, f'#{duplicado.id} "{duplicado.titulo}" ({similitud:.0%} similar)')
+                    return redirect('bugtracker:lista_bugs')
+            
             bug = form.save(commit=False)
             bug.reportado_por = request.user
             bug.save()
@@ -78,7 +307,7 @@ def editar_bug(request, bug_id):
     bug = get_object_or_404(Bug, id=bug_id)
     
     if request.method == 'POST':
-        form = BugForm(request.POST, request.FILES, instance=bug)
+        form = BugForm(request.POST, request.FILES, instance=bug, usuario=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, f'Bug "{bug.titulo}" actualizado exitosamente.')
@@ -89,6 +318,25 @@ def editar_bug(request, bug_id):
     return redirect('bugtracker:lista_bugs')
 
 
+@login_required
+def actualizar_bugs_masivo(request):
+    """Vista para cambiar estado, prioridad o asignado de varios bugs en una sola operación"""
+    siguiente = request.POST.get('siguiente')
+    if not url_has_allowed_host_and_scheme(siguiente, allowed_hosts={request.get_host()}):
+        siguiente = reverse('bugtracker:lista_bugs')
+    
+    if request.method == 'POST':
+        form = AccionMasivaBugForm(request.POST, max_bugs=MAX_BUGS_MASIVOS)
+        if form.is_valid():
+            total = actualizar_bugs(form.cleaned_data['bugs'], form.cambios(), request.user)
+            messages.success(request, f'{total} bug{"s" if total != 1 else ""} actualizado{"s" if total != 1 else ""}.')
+        else:
+            errores = [error for lista in form.errors.values() for error in lista]
+            messages.error(request, ' '.join(errores) or 'Error al actualizar los bugs.')
+    
+    return redirect(siguiente)
+
+
 @login_required
 def eliminar_bug(request, bug_id):
     """
@@ -110,26 +358,46 @@ def detalle_bug(request, bug_id):
         id=bug_id
     )
     
-    comentarios = ComentarioBug.objects.filter(bug=bug).select_related(
-        'usuario', 'archivo'
-    ).order_by('-creacion')
+    # Solo la primera página de comentarios; el resto se carga por cursor
+    comentarios = ComentarioBug.objects.filter(bug=bug).select_related('usuario', 'archivo')
+    pagina = paginar_keyset(comentarios, None, COMENTARIOS_POR_PAGINA)
     
     context = {
         'bug': bug,
-        'comentarios': comentarios,
+        'comentarios': pagina['objetos'],
+        'cursor_comentarios': pagina['next'],
         'form_bug': BugForm(instance=bug),
         'form_comentario': ComentarioBugForm(),
     }
     return render(request, 'bugtracker/detalle_bug.html', context)
 
 
+@login_required
+def comentarios_bug(request, bug_id):
+    """Devuelve el fragmento HTML de la siguiente página de comentarios de un bug"""
+    bug = get_object_or_404(Bug.objects.only('id'), id=bug_id)
+    comentarios = ComentarioBug.objects.filter(bug=bug).select_related('usuario', 'archivo')
+    
+    try:
+        pagina = paginar_keyset(comentarios, request.GET.get('cursor'), COMENTARIOS_POR_PAGINA)
+    except CursorInvalido:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+    
+    html = render_to_string(
+        'bugtracker/partials/comentarios.html',
+        {'comentarios': pagina['objetos']},
+        request=request
+    )
+    return JsonResponse({'html': html, 'next': pagina['next']})
+
+
 @login_required
 def agregar_comentario(request, bug_id):
     """Vista para agregar un comentario a un bug"""
     bug = get_object_or_404(Bug, id=bug_id)
     
     if request.method == 'POST':
-        form = ComentarioBugForm(request.POST, request.FILES)
+        form = ComentarioBugForm(request.POST, request.FILES, usuario=request.user)
         if form.is_valid():
             comentario = form.save(commit=False)
             comentario.bug = bug
@@ -157,7 +425,7 @@ def editar_comentario(request, comentario_id):
         return redirect('bugtracker:detalle_bug', bug_id=comentario.bug.id)
     
     if request.method == 'POST':
-        form = ComentarioBugForm(request.POST, request.FILES, instance=comentario)
+        form = ComentarioBugForm(request.POST, request.FILES, instance=comentario, usuario=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, 'Comentario actualizado exitosamente.')
@@ -189,39 +457,30 @@ def eliminar_comentario(request, comentario_id):
 @login_required
 def solicitar_revision(request, bug_id):
     """
-    Vista para solicitar revisión de un bug
+    Vista para solicitar revisión de un bug.
     
-    TODO: Integrar con sistema de notificaciones
-    - Enviar notificación al equipo de QA
-    - Enviar email al asignado
-    - Notificar a los administradores del proyecto
+    El cambio de estado, el comentario automático y el evento de notificación se
+    guardan en una misma transacción; el envío al asignado, al equipo de QA y a los
+    administradores del proyecto lo hace el comando procesar_notificaciones.
     """
-    bug = get_object_or_404(Bug, id=bug_id)
+    bug = get_object_or_404(Bug.objects.select_related('proyecto'), id=bug_id)
     
     if request.method == 'POST':
         # Obtener el estado "En Revisión" o el que corresponda
         try:
             estado_revision = Estado.objects.get(nombre__icontains='revisión')
-            bug.estado = estado_revision
-            bug.save()
-            
-            # Crear un comentario automático
-            ComentarioBug.objects.create(
-                bug=bug,
-                usuario=request.user,
-                comentario=f'{request.user.nick} ha solicitado revisión de este bug.'
-            )
-            
-            # TODO: INTEGRACIÓN CON NOTIFICACIONES
-            # Aquí se debe implementar la lógica de notificaciones:
-            # 1. Notificar al usuario asignado (si existe)
-            # 2. Notificar al equipo de revisión/QA
-            # 3. Enviar email de notificación
-            # 4. Crear registro en el sistema de notificaciones
-            # 
-            # Ejemplo de implementación futura:
-            # from apps.notificaciones.utils import enviar_notificacion_revision
-            # enviar_notificacion_revision(bug, request.user)
+            with transaction.atomic():
+                bug.estado = estado_revision
+                bug.save()
+                
+                # Crear un comentario automático
+                ComentarioBug.objects.create(
+                    bug=bug,
+                    usuario=request.user,
+                    comentario=f'{request.user.nick} ha solicitado revisión de este bug.'
+                )
+                
+                registrar_solicitud_revision(bug, request.user)
             
             messages.success(request, 'Solicitud de revisión enviada exitosamente.')
         except Estado.DoesNotExist:
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Los blobs se guardan como contenido/ab/<sha256>.<ext>, repartidos por los dos
+# primeros caracteres del hash para no acumular miles de archivos en un directorio.
+# La extensión se conserva para que el servidor web entregue el tipo MIME correcto.
+DIRECTORIO_CONTENIDO = 'contenido'
+DIRECTORIO_TEMPORAL = os.path.join(DIRECTORIO_CONTENIDO, 'tmp')
+PATRON_EXTENSION = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def nombre_contenido(sha256, nombre_original=''):
+    """Nombre relativo (dentro de MEDIA_ROOT) del blob con ese hash"""
+    extension = os.path.splitext(nombre_original)[1].lower()
+    if not PATRON_EXTENSION.match(extension):
+        extension = ''
+    return f"{DIRECTORIO_CONTENIDO}/{sha256[:2]}/{sha256}{extension}"
+
+
+def hash_de(nombre):
+    """sha256 de un nombre generado por AlmacenamientoContenido, o None si no lo es"""
+    partes = nombre.split('/')
+    if len(partes) == 3 and partes[0] == DIRECTORIO_CONTENIDO:
+        sha256 = os.path.splitext(partes[2])[0]
+        if len(sha256) == 64:
+            return sha256
+    return None
+
+
+@deconstructible
+class AlmacenamientoContenido(FileSystemStorage):
+    """
+    Almacenamiento direccionado por contenido: el nombre de cada archivo es el
+    SHA-256 de sus bytes, así un mismo contenido se guarda en disco una sola vez.
+
+    El hash se calcula mientras el archivo se escribe por bloques a un temporal,
+    sin leerlo dos veces ni cargarlo en memoria. Si el blob ya existía se descarta
+    el temporal; si no, se mueve a su nombre definitivo con os.replace (atómico),
+    de modo que dos subidas simultáneas del mismo contenido no se pisan.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo lo decide _save; no hay colisiones que resolver
+        return name
+
+    def _save(self, name, content):
+        directorio_temporal = self.path(DIRECTORIO_TEMPORAL)
+        os.makedirs(directorio_temporal, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio_temporal)
+        sha256 = hashlib.sha256()
+        try:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            with os.fdopen(descriptor, 'wb') as destino:
+                for bloque in content.chunks():
+                    if isinstance(bloque, str):
+                        bloque = bloque.encode()
+                    sha256.update(bloque)
+                    destino.write(bloque)
+
+            nombre = nombre_contenido(sha256.hexdigest(), name)
+            ruta = self.path(nombre)
+            if os.path.exists(ruta):
+                os.remove(temporal)
+                # Blob reutilizado: se actualiza su fecha para que la recolección de
+                # huérfanos (que respeta una antigüedad mínima) no lo borre ahora
+                os.utime(ruta)
+            else:
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporal, self.file_permissions_mode)
+                else:
+                    # mkstemp crea con 0600; se respeta la umask como lo haría FileSystemStorage
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    os.chmod(temporal, 0o666 & ~umask)
+                os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        return nombre
+
+
+def almacenamiento_archivos():
+    """Almacenamiento de File.ruta (callable para que la migración no dependa de la instancia)"""
+    return AlmacenamientoContenido()
@@ -5,4 +5,6 @@ class CommonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.commons'
     def ready(self):
-        from .signals import data
\ No newline at end of file
+        from .signals import data
+        from .signals.referencias import conectar_referencias
+        conectar_referencias()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .almacenamiento import hash_de
+from .models import File
+from .vistas_previas import encolar_vista_previa
+
+LONGITUD_NOMBRE = File._meta.get_field('nombre').max_length
+
+
+def guardar_archivo(subido):
+    """
+    Guarda un archivo subido y retorna su File. El contenido se escribe por bloques
+    calculando su SHA-256; si ya existía un File con el mismo hash se reutiliza
+    (mismo blob en disco, el nombre original es el de la primera subida).
+    """
+    almacenamiento = File._meta.get_field('ruta').storage
+    nombre_blob = almacenamiento.save(subido.name, subido)
+    sha256 = hash_de(nombre_blob)
+
+    existente = File.objects.filter(sha256=sha256).first()
+    # Se marca como recién usado para que la recolección de huérfanos no lo elimine
+    # antes de que se guarde el registro que lo referencia. Si el update no toca
+    # filas, la recolección lo acaba de borrar y se crea de nuevo.
+    if existente and File.objects.filter(pk=existente.pk).update(actualizacion=timezone.now()):
+        if existente.ruta.name != nombre_blob:
+            # Mismo contenido subido con otra extensión: queda el blob del File existente
+            almacenamiento.delete(nombre_blob)
+        return existente
+    if not almacenamiento.exists(nombre_blob):
+        # La recolección borró el blob junto con su File entre save() y la consulta
+        nombre_blob = almacenamiento.save(subido.name, subido)
+
+    archivo = File(
+        nombre=os.path.basename(subido.name)[:LONGITUD_NOMBRE],
+        sha256=sha256,
+        tamano=almacenamiento.size(nombre_blob),
+    )
+    archivo.ruta.name = nombre_blob
+    # Las imágenes y PDF quedan en cola para generar miniatura y vista previa
+    encolar_vista_previa(archivo)
+    try:
+        with transaction.atomic():
+            archivo.save()
+    except IntegrityError:
+        # Otra subida con el mismo contenido creó la fila entre la consulta y el insert
+        existente = File.objects.get(sha256=sha256)
+        if existente.ruta.name != nombre_blob:
+            almacenamiento.delete(nombre_blob)
+        return existente
+    return archivo
+
+
+def modelos_con_archivo():
+    """(modelo, attname) de cada ForeignKey a File en el proyecto"""
+    return [
+        (relacion.related_model, relacion.field.attname)
+        for relacion in File._meta.related_objects
+        if relacion.one_to_many
+    ]
+
+
+def aplicar_referencias(deltas):
+    """Suma a 'referencias' el delta de cada File (en orden de id para evitar bloqueos cruzados)"""
+    for archivo_id, delta in sorted(deltas.items()):
+        if delta:
+            File.objects.filter(pk=archivo_id).update(referencias=Greatest(F('referencias') + delta, 0))
+
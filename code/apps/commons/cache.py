@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _clave_version(espacio):
+    return f'{espacio}:version'
+
+
+def _clave_valor(espacio):
+    return f'{espacio}:valor'
+
+
+def obtener_versionado(espacio, construir, tiempo):
+    """
+    Devuelve el valor cacheado de 'espacio' si se guardó con la versión vigente. Si no,
+    lo calcula con 'construir()' y lo guarda 'tiempo' segundos junto con esa versión.
+    La versión y el valor se leen con un solo get_many. Invalidar es subir la versión
+    (invalidar_versiones): el valor guardado con una versión anterior se descarta.
+    """
+    clave_version, clave_valor = _clave_version(espacio), _clave_valor(espacio)
+    encontrados = cache.get_many([clave_version, clave_valor])
+    version = encontrados.get(clave_version)
+    if version is None:
+        version = 1
+        if not cache.add(clave_version, version, None):
+            version = cache.get(clave_version, version)
+
+    guardado = encontrados.get(clave_valor)
+    if guardado is not None and guardado[0] == version:
+        return guardado[1]
+    valor = construir()
+    cache.set(clave_valor, (version, valor), tiempo)
+    return valor
+
+
+def invalidar_versiones(*espacios):
+    """Incrementa la versión de los espacios una vez confirmada la transacción en curso"""
+    def _invalidar():
+        for espacio in espacios:
+            try:
+                cache.incr(_clave_version(espacio))
+            except ValueError:
+                cache.set(_clave_version(espacio), 2, None)
+
+    transaction.on_commit(_invalidar)
@@ -0,0 +1,17 @@
+from .cache import invalidar_versiones, obtener_versionado
+
+# Respaldo por si se pierde una invalidación; requiere la caché compartida de settings.CACHES
+TIEMPO_CATALOGO = 60 * 60
+
+
+def obtener_catalogo(nombre, construir):
+    """
+    Devuelve el catálogo 'nombre' desde la caché. Si no existe para la versión
+    vigente, lo construye con 'construir()' y lo guarda.
+    """
+    return obtener_versionado(f'catalogo:{nombre}', lambda: list(construir()), TIEMPO_CATALOGO)
+
+
+def invalidar_catalogos(*nombres):
+    """Incrementa la versión de los catálogos una vez confirmada la transacción en curso"""
+    invalidar_versiones(*(f'catalogo:{nombre}' for nombre in nombres))
@@ -0,0 +1,150 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+PATRON_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def etag_archivo(estado):
+    """ETag fuerte derivado de tamaño y fecha de modificación (os.stat) del archivo"""
+    return quote_etag(f"{estado.st_size:x}-{estado.st_mtime_ns:x}")
+
+
+def _rango(request, tamano, etag, modificado):
+    """
+    Interpreta la cabecera Range (un solo rango de bytes). Retorna None si se debe
+    enviar el archivo completo, (inicio, fin) inclusivos, o False si no es satisfacible.
+    """
+    cabecera = request.headers.get('Range', '').replace(' ', '')
+    if not cabecera:
+        return None
+
+    # If-Range: el rango solo vale si el validador coincide exactamente con el actual
+    # (RFC 9110 13.1.5: ETag fuerte o la misma fecha Last-Modified)
+    si_rango = request.headers.get('If-Range')
+    if si_rango:
+        fecha = parse_http_date_safe(si_rango)
+        if si_rango != etag and fecha != int(modificado):
+            return None
+
+    coincidencia = PATRON_RANGO.match(cabecera)
+    if not coincidencia:
+        # Rangos múltiples u otras unidades: se ignora y se envía completo
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if tamano == 0:
+        # Ningún rango de un archivo vacío es satisfacible
+        return False
+
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return False
+        return max(tamano - largo, 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
+
+
+def _leer_rango(archivo, inicio, largo, tamano_bloque):
+    try:
+        archivo.seek(inicio)
+        while largo > 0:
+            bloque = archivo.read(min(tamano_bloque, largo))
+            if not bloque:
+                break
+            largo -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def respuesta_archivo(request, archivo, nombre=None, adjunto=True, etag=None):
+    """
+    Respuesta de descarga para un FieldFile sin cargarlo en memoria.
+
+    Por defecto se usa FileResponse, que envía el archivo por bloques (o con
+    wsgi.file_wrapper/sendfile si el servidor lo soporta). Con DESCARGAS_OFFLOAD
+    en 'x-accel' o 'x-sendfile' solo se emiten las cabeceras y el servidor web
+    entrega los bytes.
+
+    Se responde 304 a If-None-Match/If-Modified-Since usando el ETag (por defecto
+    derivado de os.stat, o el recibido, p. ej. un hash del contenido) y la fecha de
+    modificación; en modo directo se atiende Range con 206 Partial Content.
+    """
+    if not archivo:
+        raise Http404("El archivo no está asociado en la base de datos.")
+
+    ruta = archivo.path
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        raise Http404("El archivo no fue encontrado en el servidor.")
+
+    etag = quote_etag(etag) if etag else etag_archivo(estado)
+    modificado = estado.st_mtime
+    nombre = nombre or os.path.basename(ruta)
+    content_type = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+
+    def validadores(respuesta):
+        respuesta['ETag'] = etag
+        respuesta['Last-Modified'] = http_date(modificado)
+        respuesta['Accept-Ranges'] = 'bytes'
+        # Archivos privados: el navegador puede guardarlos pero debe revalidar (304)
+        patch_cache_control(respuesta, private=True, no_cache=True)
+        return respuesta
+
+    condicional = get_conditional_response(request, etag=etag, last_modified=int(modificado))
+    if condicional is not None:
+        return validadores(condicional)
+
+    modo = settings.DESCARGAS_OFFLOAD
+    if modo:
+        # El servidor web atiende Range por su cuenta
+        respuesta = HttpResponse(content_type=content_type)
+        if modo == 'x-accel':
+            respuesta['X-Accel-Redirect'] = settings.DESCARGAS_ACCEL_PREFIJO + quote(archivo.name)
+        elif modo == 'x-sendfile':
+            respuesta['X-Sendfile'] = ruta
+        else:
+            raise ImproperlyConfigured(f"DESCARGAS_OFFLOAD no soportado: {modo!r}")
+        respuesta['Content-Disposition'] = content_disposition_header(adjunto, nombre)
+        return validadores(respuesta)
+
+    tamano = estado.st_size
+    rango = _rango(request, tamano, etag, modificado) if request.method == 'GET' else None
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f"bytes */{tamano}"
+        return validadores(respuesta)
+
+    if rango:
+        inicio, fin = rango
+        largo = fin - inicio + 1
+        respuesta = StreamingHttpResponse(
+            _leer_rango(open(ruta, 'rb'), inicio, largo, settings.DESCARGAS_TAMANO_BLOQUE),
+            status=206,
+            content_type=content_type,
+        )
+        respuesta['Content-Length'] = str(largo)
+        respuesta['Content-Range'] = f"bytes {inicio}-{fin}/{tamano}"
+        respuesta['Content-Disposition'] = content_disposition_header(adjunto, nombre)
+        return validadores(respuesta)
+
+    respuesta = FileResponse(
+        open(ruta, 'rb'), as_attachment=adjunto, filename=nombre, content_type=content_type
+    )
+    respuesta.block_size = settings.DESCARGAS_TAMANO_BLOQUE
+    return validadores(respuesta)
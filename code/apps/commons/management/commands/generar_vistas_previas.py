@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.commons.vistas_previas import MAX_INTENTOS, encolar_existentes, procesar_vistas_previas
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera en segundo plano las miniaturas y vistas previas (imágenes y primera "
+        "página de PDF) de los archivos pendientes, por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=20, help="Archivos por lote")
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS, help="Intentos antes de marcar como fallido")
+        parser.add_argument('--continuo', action='store_true', help="Seguir esperando nuevos archivos")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos de espera sin archivos (modo continuo)")
+        parser.add_argument(
+            '--encolar-existentes', action='store_true',
+            help="Poner en cola los archivos subidos antes de que existieran las vistas previas",
+        )
+
+    def handle(self, *args, **options):
+        if options['encolar_existentes']:
+            self.stdout.write(f"Archivos puestos en cola: {encolar_existentes()}.")
+
+        total_generadas = total_errores = 0
+        try:
+            while True:
+                generadas, errores = procesar_vistas_previas(options['lote'], options['max_intentos'])
+                total_generadas += generadas
+                total_errores += len(errores)
+                for archivo, mensaje in errores:
+                    self.stderr.write(f"  Archivo {archivo.pk} ({archivo.nombre_descarga}): {mensaje}")
+                if generadas or errores:
+                    self.stdout.write(f"Lote: {generadas} generadas, {len(errores)} con error.")
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Vistas previas generadas: {total_generadas}, con error: {total_errores}."
+        ))
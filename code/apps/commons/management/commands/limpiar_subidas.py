@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.commons.subidas import eliminar_subidas_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las sesiones de subida por bloques sin actividad reciente y sus "
+        "bloques en disco. Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas', type=int, default=settings.SUBIDAS_EXPIRACION_HORAS,
+            help="Antigüedad mínima (horas sin recibir bloques) de las sesiones a eliminar",
+        )
+
+    def handle(self, *args, **options):
+        eliminadas = eliminar_subidas_vencidas(max(options['horas'], 1))
+        self.stdout.write(self.style.SUCCESS(f"Sesiones de subida eliminadas: {eliminadas}."))
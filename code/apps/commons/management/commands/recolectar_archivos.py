@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.commons.recoleccion import ANTIGUEDAD_MINIMA, recolectar_disco, recolectar_filas
+
+
+def _legible(cantidad):
+    for unidad in ('B', 'KB', 'MB'):
+        if cantidad < 1024:
+            return f"{cantidad:.0f} {unidad}" if unidad == 'B' else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:.1f} GB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina los archivos adjuntos huérfanos: filas File que ningún registro "
+        "referencia (revisando todas las FK a File) y archivos de MEDIA_ROOT sin fila "
+        "File. Trabaja por lotes; con --simulacion solo informa lo que eliminaría."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulacion', action='store_true', help="No elimina nada; informa archivos y bytes a liberar")
+        parser.add_argument('--lote', type=int, default=500, help="Filas o archivos por lote")
+        parser.add_argument(
+            '--antiguedad', type=float, default=ANTIGUEDAD_MINIMA.total_seconds() / 3600,
+            help="Horas mínimas sin uso para considerar un archivo huérfano",
+        )
+        parser.add_argument(
+            '--completo', action='store_true',
+            help="Revisar todas las filas File (no solo las de contador en 0) y corregir los contadores",
+        )
+        parser.add_argument('--sin-disco', action='store_true', help="No recorrer MEDIA_ROOT")
+
+    def handle(self, *args, **options):
+        lote = max(options['lote'], 1)
+        antiguedad = timedelta(hours=max(options['antiguedad'], 0))
+        simulacion = options['simulacion']
+        verbo = "a eliminar" if simulacion else "eliminados"
+
+        filas = recolectar_filas(lote, antiguedad, completo=options['completo'], simulacion=simulacion)
+        self.stdout.write(
+            f"Filas File: {filas['revisados']} revisadas, {filas['eliminados']} {verbo} "
+            f"({_legible(filas['bytes'])}), {filas['corregidos']} contadores "
+            f"{'desfasados' if simulacion else 'corregidos'}."
+        )
+
+        disco = {'revisados': 0, 'eliminados': 0, 'bytes': 0}
+        if not options['sin_disco']:
+            disco = recolectar_disco(lote, antiguedad, simulacion=simulacion)
+            self.stdout.write(
+                f"Archivos en disco sin fila File: {disco['revisados']} revisados, "
+                f"{disco['eliminados']} {verbo} ({_legible(disco['bytes'])})."
+            )
+
+        total = filas['bytes'] + disco['bytes']
+        prefijo = "Simulación: se liberarían" if simulacion else "Espacio liberado:"
+        self.stdout.write(self.style.SUCCESS(f"{prefijo} {_legible(total)} ({total} bytes)."))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:53
+
+import apps.commons.almacenamiento
+import apps.commons.models
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Modelos con ForeignKey a File al momento de esta migración
+RELACIONES_ARCHIVO = [
+    ('bugtracker', 'Bug', 'archivo_id'),
+    ('bugtracker', 'ComentarioBug', 'archivo_id'),
+    ('reports', 'ArchivoReporte', 'archivo_id'),
+    ('testsuite', 'EjecucionPrueba', 'archivo_id'),
+    ('tickets', 'Ticket', 'archivo_id'),
+    ('tickets', 'ComentarioTicket', 'archivo_id'),
+]
+
+
+def contar_referencias(apps, schema_editor):
+    """Inicializa File.referencias con los registros que ya usan cada archivo"""
+    File = apps.get_model('commons', 'File')
+    for app_label, modelo, campo in RELACIONES_ARCHIVO:
+        filas = (
+            apps.get_model(app_label, modelo).objects.filter(**{f'{campo}__isnull': False})
+            .values(campo).annotate(n=Count('pk')).order_by()
+        )
+        for fila in filas.iterator():
+            File.objects.filter(pk=fila[campo]).update(referencias=models.F('referencias') + fila['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0001_initial'),
+        ('bugtracker', '0007_bandabug'),
+        ('reports', '0001_initial'),
+        ('testsuite', '0004_indices_listas'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='nombre',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Nombre original'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='referencias',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Referencias'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='tamano',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Tamaño (bytes)'),
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='ruta',
+            field=models.FileField(max_length=255, storage=apps.commons.almacenamiento.almacenamiento_archivos, upload_to=apps.commons.models.upload_to_app),
+        ),
+        migrations.RunPython(contar_referencias, migrations.RunPython.noop),
+    ]
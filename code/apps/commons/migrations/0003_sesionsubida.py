@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:57
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0002_archivo_contenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionSubida',
+            fields=[
+                ('creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('actualizacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255, verbose_name='Nombre original')),
+                ('tamano', models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('tamano_bloque', models.PositiveIntegerField(verbose_name='Tamaño de bloque (bytes)')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 esperado')),
+                ('archivo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sesiones_subida', to='commons.file')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones_subida', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sesión de subida',
+                'verbose_name_plural': 'Sesiones de subida',
+                'db_table': 'commons.sesion_subida',
+            },
+        ),
+        migrations.CreateModel(
+            name='BloqueSubida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('actualizacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('estado', models.BooleanField(default=True, verbose_name='Estado')),
+                ('indice', models.PositiveIntegerField(verbose_name='Índice')),
+                ('tamano', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('sesion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bloques', to='commons.sesionsubida')),
+            ],
+            options={
+                'verbose_name': 'Bloque de subida',
+                'verbose_name_plural': 'Bloques de subida',
+                'db_table': 'commons.bloque_subida',
+                'constraints': [models.UniqueConstraint(fields=('sesion', 'indice'), name='bloque_subida_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0003_sesionsubida'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='estado_previa',
+            field=models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('generada', 'Generada'), ('fallida', 'Fallida')], max_length=20, verbose_name='Estado de la vista previa'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='intentos_previa',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Intentos de vista previa'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='previa_disponible_desde',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Vista previa disponible desde'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['estado_previa', 'previa_disponible_desde'], name='archivo_previa_pendiente_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+def marcar_completadas(apps, schema_editor):
+    SesionSubida = apps.get_model('commons', 'SesionSubida')
+    SesionSubida.objects.filter(archivo__isnull=False).update(estado_subida='completada')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0005_tabla_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesionsubida',
+            name='estado_subida',
+            field=models.CharField(choices=[('recibiendo', 'Recibiendo bloques'), ('ensamblando', 'Ensamblando'), ('completada', 'Completada')], default='recibiendo', max_length=20, verbose_name='Estado de la subida'),
+        ),
+        migrations.RunPython(marcar_completadas, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 
+from .almacenamiento import almacenamiento_archivos
+
 # Create your models here.
 # ---------------------------------------------------------
 #  METADATOS COMUNES
@@ -47,16 +53,110 @@ def upload_to_app(instance, filename):
     return f"{app_label}/rutas/{filename}"
 
 class File(Metadatos):
+    """
+    Archivo adjunto. El contenido se guarda una sola vez por hash (ver
+    apps.commons.archivos.guardar_archivo); 'referencias' cuenta los registros que
+    lo usan y lo mantienen las señales de commons. Las filas anteriores al
+    almacenamiento por contenido conservan su ruta y tienen sha256 nulo.
+    """
     extension = models.ForeignKey(Extension, on_delete=models.SET_NULL, null=True, blank=True)
-    ruta = models.FileField(upload_to=upload_to_app)
+    ruta = models.FileField(upload_to=upload_to_app, storage=almacenamiento_archivos, max_length=255)
+    nombre = models.CharField("Nombre original", max_length=255, blank=True)
+    sha256 = models.CharField("SHA-256", max_length=64, unique=True, null=True, blank=True, editable=False)
+    tamano = models.PositiveBigIntegerField("Tamaño (bytes)", null=True, blank=True, editable=False)
+    referencias = models.PositiveIntegerField("Referencias", default=0, editable=False)
+
+    # Miniatura y vista previa (imágenes y primera página de PDF), generadas en segundo
+    # plano por generar_vistas_previas (ver apps.commons.vistas_previas)
+    PREVIA_PENDIENTE = 'pendiente'
+    PREVIA_GENERADA = 'generada'
+    PREVIA_FALLIDA = 'fallida'
+    ESTADOS_PREVIA = [
+        (PREVIA_PENDIENTE, 'Pendiente'),
+        (PREVIA_GENERADA, 'Generada'),
+        (PREVIA_FALLIDA, 'Fallida'),
+    ]
+    estado_previa = models.CharField("Estado de la vista previa", max_length=20, choices=ESTADOS_PREVIA, blank=True)
+    intentos_previa = models.PositiveSmallIntegerField("Intentos de vista previa", default=0, editable=False)
+    previa_disponible_desde = models.DateTimeField("Vista previa disponible desde", null=True, blank=True, editable=False)
 
     def __str__(self):
-        return str(self.ruta)
+        return self.nombre or str(self.ruta)
+
+    @property
+    def tiene_vista_previa(self):
+        return self.estado_previa == self.PREVIA_GENERADA
+
+    @property
+    def nombre_descarga(self):
+        """Nombre con el que se muestra y descarga el archivo"""
+        return self.nombre or os.path.basename(self.ruta.name)
     
     class Meta:
         db_table = "auth.ruta"
         verbose_name = "Ruta"
-        verbose_name_plural = "Rutas" 
+        verbose_name_plural = "Rutas"
+        indexes = [
+            # El worker de vistas previas busca los pendientes cuyo siguiente intento ya venció
+            models.Index(fields=['estado_previa', 'previa_disponible_desde'], name='archivo_previa_pendiente_idx'),
+        ]
+
+class SesionSubida(Metadatos):
+    """
+    Subida de un archivo en bloques (ver apps.commons.subidas). Al completarse,
+    'archivo' apunta al File ensamblado y los formularios reciben el id de la sesión
+    en lugar del archivo.
+    """
+    RECIBIENDO = 'recibiendo'
+    ENSAMBLANDO = 'ensamblando'
+    COMPLETADA = 'completada'
+    ESTADOS_SUBIDA = [
+        (RECIBIENDO, 'Recibiendo bloques'),
+        (ENSAMBLANDO, 'Ensamblando'),
+        (COMPLETADA, 'Completada'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sesiones_subida")
+    nombre = models.CharField("Nombre original", max_length=255)
+    tamano = models.PositiveBigIntegerField("Tamaño (bytes)")
+    tamano_bloque = models.PositiveIntegerField("Tamaño de bloque (bytes)")
+    sha256 = models.CharField("SHA-256 esperado", max_length=64, blank=True)
+    archivo = models.ForeignKey(File, on_delete=models.SET_NULL, null=True, blank=True, related_name="sesiones_subida")
+    # Mientras se ensambla no se aceptan bloques ni otro ensamblado de la misma sesión
+    estado_subida = models.CharField("Estado de la subida", max_length=20, choices=ESTADOS_SUBIDA, default=RECIBIENDO)
+
+    @property
+    def total_bloques(self):
+        return max(1, -(-self.tamano // self.tamano_bloque))
+
+    def tamano_de_bloque(self, indice):
+        """Bytes que debe tener el bloque 'indice' (el último puede ser menor)"""
+        return min(self.tamano_bloque, self.tamano - indice * self.tamano_bloque)
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        db_table = "commons.sesion_subida"
+        verbose_name = "Sesión de subida"
+        verbose_name_plural = "Sesiones de subida"
+
+
+class BloqueSubida(Metadatos):
+    sesion = models.ForeignKey(SesionSubida, on_delete=models.CASCADE, related_name="bloques")
+    indice = models.PositiveIntegerField("Índice")
+    tamano = models.PositiveIntegerField("Tamaño (bytes)")
+    sha256 = models.CharField("SHA-256", max_length=64)
+
+    class Meta:
+        db_table = "commons.bloque_subida"
+        verbose_name = "Bloque de subida"
+        verbose_name_plural = "Bloques de subida"
+        constraints = [
+            models.UniqueConstraint(fields=['sesion', 'indice'], name='bloque_subida_unico'),
+        ]
+
 
 class Tipo(Metadatos):
     nombre=models.CharField("Nombre", max_length=100)
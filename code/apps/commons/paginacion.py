@@ -0,0 +1,132 @@
+import base64
+import json
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+
+# Hasta este número de registros se cuenta exacto; por encima se estima
+LIMITE_CONTEO_EXACTO = 1000
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+
+def codificar_cursor(direccion, valor, pk):
+    """Serializa la posición (valor, pk) en un token opaco para la URL"""
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    crudo = json.dumps([direccion, valor, pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, campo):
+    """Devuelve (direccion, valor, pk) a partir de un token generado por codificar_cursor"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        direccion, valor, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if direccion not in ('next', 'prev'):
+            raise ValueError(direccion)
+        valor = modelo._meta.get_field(campo).to_python(valor)
+        return direccion, valor, int(pk)
+    except Exception as exc:
+        raise CursorInvalido(cursor) from exc
+
+
+def paginar_keyset(queryset, cursor=None, tamano=20, campo='creacion'):
+    """
+    Pagina un queryset ordenado por (-campo, -id) usando un cursor en lugar de OFFSET.
+
+    El costo de cada página es el mismo sin importar qué tan profundo se navegue,
+    porque el filtro por cursor se resuelve con el índice (campo, id).
+    Retorna un diccionario con 'objetos', 'next' y 'prev' (tokens o None).
+    """
+    direccion = 'next'
+    if cursor:
+        direccion, valor, pk = decodificar_cursor(cursor, queryset.model, campo)
+        # La condición de rango sobre el campo permite recorrer el índice en orden;
+        # la disyunción solo desempata registros con el mismo valor.
+        if direccion == 'next':
+            queryset = queryset.filter(
+                Q(**{f'{campo}__lte': valor}),
+                Q(**{f'{campo}__lt': valor}) | Q(id__lt=pk),
+            )
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{campo}__gte': valor}),
+                Q(**{f'{campo}__gt': valor}) | Q(id__gt=pk),
+            )
+
+    if direccion == 'next':
+        queryset = queryset.order_by(f'-{campo}', '-id')
+    else:
+        queryset = queryset.order_by(campo, 'id')
+
+    # Se pide un registro extra para saber si hay más páginas en esa dirección
+    objetos = list(queryset[:tamano + 1])
+    hay_mas = len(objetos) > tamano
+    objetos = objetos[:tamano]
+
+    if direccion == 'next':
+        hay_siguiente, hay_anterior = hay_mas, bool(cursor)
+    else:
+        objetos.reverse()
+        hay_siguiente, hay_anterior = True, hay_mas
+
+    siguiente = anterior = None
+    if objetos and hay_siguiente:
+        ultimo = objetos[-1]
+        siguiente = codificar_cursor('next', getattr(ultimo, campo), ultimo.pk)
+    if objetos and hay_anterior:
+        primero = objetos[0]
+        anterior = codificar_cursor('prev', getattr(primero, campo), primero.pk)
+
+    return {
+        'objetos': objetos,
+        'next': siguiente,
+        'prev': anterior,
+    }
+
+
+def _filas_estimadas(modelo):
+    """Filas de la tabla según las estadísticas del motor (sin recorrerla), o None"""
+    tabla = modelo._meta.db_table
+    consultas = {
+        'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                       [connection.ops.quote_name(tabla)]),
+        'mysql': ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                  "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [tabla]),
+        # Solo existe después de ANALYZE; el primer número de 'stat' son las filas
+        'sqlite': ("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [tabla]),
+    }
+    if connection.vendor not in consultas:
+        return None
+    sql, params = consultas[connection.vendor]
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            fila = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not fila or fila[0] is None:
+        return None
+    return int(str(fila[0]).split()[0])
+
+
+def contar_estimado(queryset, limite=LIMITE_CONTEO_EXACTO):
+    """
+    Conteo para mostrar junto a una lista paginada sin recorrer millones de filas.
+
+    Cuenta exacto hasta 'limite' (COUNT sobre una subconsulta con LIMIT). Si hay más
+    y el queryset no tiene filtros, usa la estimación de filas del motor; con filtros
+    solo informa que hay más de 'limite'. Retorna {'total': n, 'tipo': 'exacto' |
+    'estimado' | 'minimo'}.
+    """
+    total = queryset.order_by()[:limite + 1].count()
+    if total <= limite:
+        return {'total': total, 'tipo': 'exacto'}
+    if not queryset.query.has_filters():
+        estimado = _filas_estimadas(queryset.model)
+        if estimado and estimado > limite:
+            return {'total': estimado, 'tipo': 'estimado'}
+    return {'total': limite, 'tipo': 'minimo'}
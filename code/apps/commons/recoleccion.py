@@ -0,0 +1,167 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .almacenamiento import DIRECTORIO_CONTENIDO
+from .archivos import modelos_con_archivo
+from .models import File
+from .vistas_previas import TAMANOS_PREVIA, rutas_vistas_previas
+
+# Los archivos recientes se respetan: pueden estar a la espera del registro que los
+# va a referenciar (un formulario en curso o un blob recién escrito)
+ANTIGUEDAD_MINIMA = timedelta(hours=24)
+
+# Directorios de MEDIA_ROOT donde escribe File.ruta: el almacenamiento por contenido
+# y el upload_to anterior (upload_to_app con app_label de File)
+DIRECTORIOS_ARCHIVOS = (DIRECTORIO_CONTENIDO, 'commons/rutas')
+SUFIJOS_PREVIA = tuple(f".{tamano}.jpg" for tamano in TAMANOS_PREVIA)
+
+
+def referencias_reales(ids):
+    """Counter {archivo_id: registros que lo referencian} contado en cada modelo con FK a File"""
+    conteo = Counter()
+    for modelo, attname in modelos_con_archivo():
+        filas = (
+            modelo._base_manager.filter(**{f'{attname}__in': ids})
+            .values(attname)
+            .annotate(n=Count('pk'))
+            .order_by()
+        )
+        for fila in filas:
+            conteo[fila[attname]] += fila['n']
+    return conteo
+
+
+def _tamano(almacenamiento, nombre):
+    try:
+        return os.path.getsize(almacenamiento.path(nombre))
+    except OSError:
+        return 0
+
+
+def _borrar_del_disco(almacenamiento, nombres):
+    for nombre in nombres:
+        try:
+            os.remove(almacenamiento.path(nombre))
+        except FileNotFoundError:
+            pass
+
+
+def recolectar_filas(lote=500, antiguedad=ANTIGUEDAD_MINIMA, completo=False, simulacion=False):
+    """
+    Elimina los File que ningún registro referencia, junto con su blob y sus vistas
+    previas. Por defecto revisa solo los que tienen el contador 'referencias' en 0;
+    con completo=True recorre todos y corrige los contadores desfasados.
+
+    Se avanza por id en lotes de 'lote' filas, cada uno en su transacción: las
+    candidatas se bloquean (select_for_update) y se verifican contra todas las FK
+    antes de borrarlas. Retorna un Counter con 'revisados', 'eliminados', 'bytes' y
+    'corregidos'.
+    """
+    almacenamiento = File._meta.get_field('ruta').storage
+    limite = timezone.now() - antiguedad
+    base = File.objects.all() if completo else File.objects.filter(referencias=0)
+    resumen = Counter()
+    desde = 0
+
+    while True:
+        ids = list(base.filter(id__gt=desde).order_by('id').values_list('id', flat=True)[:lote])
+        if not ids:
+            break
+        desde = ids[-1]
+        resumen['revisados'] += len(ids)
+
+        with transaction.atomic():
+            candidatos = list(File.objects.select_for_update().filter(id__in=ids).order_by('id'))
+            reales = referencias_reales(ids)
+            huerfanos = []
+            for archivo in candidatos:
+                if archivo.referencias != reales[archivo.pk]:
+                    resumen['corregidos'] += 1
+                    if not simulacion:
+                        File.objects.filter(pk=archivo.pk).update(referencias=reales[archivo.pk])
+                if not reales[archivo.pk] and archivo.actualizacion < limite:
+                    huerfanos.append(archivo)
+
+            # El blob se conserva si otra fila usa la misma ruta (posible en filas antiguas)
+            en_uso = set(
+                File.objects.filter(ruta__in=[archivo.ruta.name for archivo in huerfanos])
+                .exclude(id__in=[archivo.pk for archivo in huerfanos])
+                .values_list('ruta', flat=True)
+            )
+            nombres = []
+            for archivo in huerfanos:
+                if archivo.ruta.name and archivo.ruta.name not in en_uso:
+                    nombres += [archivo.ruta.name] + rutas_vistas_previas(archivo)
+            resumen['eliminados'] += len(huerfanos)
+            resumen['bytes'] += sum(_tamano(almacenamiento, nombre) for nombre in nombres)
+
+            if not simulacion and huerfanos:
+                File.objects.filter(id__in=[archivo.pk for archivo in huerfanos]).delete()
+                # Los archivos se borran solo si la transacción se confirma
+                transaction.on_commit(lambda nombres=nombres: _borrar_del_disco(almacenamiento, nombres))
+
+    return resumen
+
+
+def _original(nombre):
+    """Nombre del archivo al que pertenece una vista previa (o el mismo nombre)"""
+    for sufijo in SUFIJOS_PREVIA:
+        if nombre.endswith(sufijo):
+            return nombre[:-len(sufijo)]
+    return nombre
+
+
+def _archivos_en_disco(almacenamiento, limite):
+    """Genera (nombre relativo, tamaño) de los archivos de DIRECTORIOS_ARCHIVOS anteriores a 'limite'"""
+    raiz = almacenamiento.path('')
+    for directorio in DIRECTORIOS_ARCHIVOS:
+        for actual, _, archivos in os.walk(almacenamiento.path(directorio)):
+            for nombre in archivos:
+                ruta = os.path.join(actual, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except FileNotFoundError:
+                    continue
+                if estado.st_mtime < limite:
+                    yield os.path.relpath(ruta, raiz).replace(os.sep, '/'), estado.st_size
+
+
+def recolectar_disco(lote=500, antiguedad=ANTIGUEDAD_MINIMA, simulacion=False):
+    """
+    Elimina los archivos de MEDIA_ROOT (en los directorios de File) que no tienen
+    una fila File: blobs y vistas previas sin dueño y temporales abandonados. Se
+    consultan las filas en lotes de 'lote' nombres, así la memoria no depende de la
+    cantidad de archivos. Retorna un Counter con 'revisados', 'eliminados' y 'bytes'.
+    """
+    almacenamiento = File._meta.get_field('ruta').storage
+    limite = time.time() - antiguedad.total_seconds()
+    resumen = Counter()
+
+    def procesar(pendientes):
+        # Los temporales (.tmp, contenido/tmp/) nunca tienen fila; el resto se busca por ruta
+        originales = {nombre: _original(nombre) for nombre, _ in pendientes}
+        existentes = set(
+            File.objects.filter(ruta__in=set(originales.values())).values_list('ruta', flat=True)
+        )
+        huerfanos = [(nombre, tamano) for nombre, tamano in pendientes if originales[nombre] not in existentes]
+        resumen['revisados'] += len(pendientes)
+        resumen['eliminados'] += len(huerfanos)
+        resumen['bytes'] += sum(tamano for _, tamano in huerfanos)
+        if not simulacion:
+            _borrar_del_disco(almacenamiento, [nombre for nombre, _ in huerfanos])
+
+    pendientes = []
+    for nombre, tamano in _archivos_en_disco(almacenamiento, limite):
+        pendientes.append((nombre, tamano))
+        if len(pendientes) >= lote:
+            procesar(pendientes)
+            pendientes = []
+    if pendientes:
+        procesar(pendientes)
+    return resumen
@@ -0,0 +1,70 @@
+# apps/commons/signals/referencias.py
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from ..archivos import aplicar_referencias, modelos_con_archivo
+
+
+def _valores(instance, campos):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    if all(campo in instance.__dict__ for campo in campos):
+        return {campo: instance.__dict__[campo] for campo in campos}
+    return None
+
+
+def _receptores(campos):
+    def recordar_archivos(sender, instance, **kwargs):
+        instance._archivos_originales = _valores(instance, campos)
+
+    def completar_archivos(sender, instance, raw=False, **kwargs):
+        """Si el registro se cargó con campos diferidos, consulta los archivos previos antes de guardar"""
+        if raw or not instance.pk or instance._state.adding:
+            return
+        if getattr(instance, '_archivos_originales', None) is None:
+            instance._archivos_originales = (
+                sender._base_manager.filter(pk=instance.pk).values(*campos).first()
+            )
+
+    def contar_archivos(sender, instance, created, raw=False, **kwargs):
+        """Suma una referencia al archivo nuevo y descuenta la del anterior"""
+        if raw:
+            return
+        nuevos = {campo: getattr(instance, campo) for campo in campos}
+        anteriores = None if created else instance._archivos_originales
+        deltas = Counter()
+        for campo in campos:
+            if nuevos[campo]:
+                deltas[nuevos[campo]] += 1
+            if anteriores and anteriores[campo]:
+                deltas[anteriores[campo]] -= 1
+        aplicar_referencias(deltas)
+        instance._archivos_originales = nuevos
+
+    def descontar_archivos(sender, instance, **kwargs):
+        """Al eliminar el registro sus archivos pierden una referencia (se borran en la recolección)"""
+        deltas = Counter()
+        for campo in campos:
+            if getattr(instance, campo):
+                deltas[getattr(instance, campo)] -= 1
+        aplicar_referencias(deltas)
+
+    return recordar_archivos, completar_archivos, contar_archivos, descontar_archivos
+
+
+def conectar_referencias():
+    """
+    Conecta el conteo de referencias de File a cada modelo con ForeignKey a File.
+    Se llama desde CommonsConfig.ready, cuando ya están cargados todos los modelos.
+    """
+    por_modelo = {}
+    for modelo, attname in modelos_con_archivo():
+        por_modelo.setdefault(modelo, []).append(attname)
+
+    for modelo, campos in por_modelo.items():
+        recordar, completar, contar, descontar = _receptores(tuple(campos))
+        uid = f'referencias_archivo:{modelo._meta.label}'
+        post_init.connect(recordar, sender=modelo, weak=False, dispatch_uid=uid)
+        pre_save.connect(completar, sender=modelo, weak=False, dispatch_uid=uid)
+        post_save.connect(contar, sender=modelo, weak=False, dispatch_uid=uid)
+        post_delete.connect(descontar, sender=modelo, weak=False, dispatch_uid=uid)
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import File as ArchivoDjango
+from django.db import transaction
+from django.utils import timezone
+
+from .archivos import guardar_archivo
+from .models import BloqueSubida, SesionSubida
+
+PATRON_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+TAMANO_LECTURA = 64 * 1024
+# Un ensamblado sin terminar tras este tiempo (p. ej. el proceso murió) se puede reintentar
+ESPERA_ENSAMBLADO = timedelta(minutes=15)
+
+
+class SubidaInvalida(ValueError):
+    """La sesión o el bloque recibido no cumplen el protocolo de subida"""
+
+
+def _directorio(sesion):
+    return os.path.join(settings.SUBIDAS_DIRECTORIO, str(sesion.pk))
+
+
+def _ruta_bloque(sesion, indice):
+    return os.path.join(_directorio(sesion), f"{indice:06d}")
+
+
+def _sha256(valor, campo):
+    valor = (valor or '').strip().lower()
+    if valor and not PATRON_SHA256.match(valor):
+        raise SubidaInvalida(f"{campo} debe ser un SHA-256 en hexadecimal.")
+    return valor
+
+
+def iniciar_subida(usuario, nombre, tamano, sha256=''):
+    """Crea una sesión de subida para un archivo de 'tamano' bytes"""
+    nombre = os.path.basename(nombre or '').strip()
+    if not nombre:
+        raise SubidaInvalida("Falta el nombre del archivo.")
+    try:
+        tamano = int(tamano)
+    except (TypeError, ValueError):
+        raise SubidaInvalida("El tamaño del archivo no es válido.")
+    if tamano <= 0 or tamano > settings.SUBIDAS_TAMANO_MAXIMO:
+        raise SubidaInvalida(
+            f"El archivo debe pesar entre 1 byte y {settings.SUBIDAS_TAMANO_MAXIMO // (1024 * 1024)}MB."
+        )
+    return SesionSubida.objects.create(
+        usuario=usuario,
+        nombre=nombre[:SesionSubida._meta.get_field('nombre').max_length],
+        tamano=tamano,
+        tamano_bloque=settings.SUBIDAS_TAMANO_BLOQUE,
+        sha256=_sha256(sha256, 'sha256'),
+    )
+
+
+def bloques_recibidos(sesion):
+    return list(sesion.bloques.order_by('indice').values_list('indice', flat=True))
+
+
+def guardar_bloque(sesion, indice, origen, sha256):
+    """
+    Guarda el bloque 'indice' leyendo 'origen' (p. ej. el request) por partes y
+    verificando su tamaño y su SHA-256. Reenviar un bloque ya recibido lo reemplaza,
+    así el cliente puede reintentar sin consultar antes el estado.
+    """
+    if sesion.archivo_id:
+        raise SubidaInvalida("La subida ya fue completada.")
+    if sesion.estado_subida == SesionSubida.ENSAMBLANDO:
+        raise SubidaInvalida("La subida se está ensamblando.")
+    if not 0 <= indice < sesion.total_bloques:
+        raise SubidaInvalida(f"El bloque {indice} no existe (la subida tiene {sesion.total_bloques}).")
+    sha256 = _sha256(sha256, 'El checksum del bloque')
+    if not sha256:
+        raise SubidaInvalida("Falta el checksum SHA-256 del bloque.")
+
+    esperado = sesion.tamano_de_bloque(indice)
+    directorio = _directorio(sesion)
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.parcial')
+    calculado = hashlib.sha256()
+    recibidos = 0
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            while True:
+                # Se lee como máximo un byte más de lo esperado para detectar excesos
+                parte = origen.read(min(TAMANO_LECTURA, esperado + 1 - recibidos))
+                if not parte:
+                    break
+                recibidos += len(parte)
+                if recibidos > esperado:
+                    break
+                calculado.update(parte)
+                destino.write(parte)
+        if recibidos != esperado:
+            raise SubidaInvalida(f"El bloque {indice} debe tener {esperado} bytes.")
+        if calculado.hexdigest() != sha256:
+            raise SubidaInvalida(f"El checksum del bloque {indice} no coincide.")
+        os.replace(temporal, _ruta_bloque(sesion, indice))
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    BloqueSubida.objects.update_or_create(
+        sesion=sesion, indice=indice, defaults={'tamano': recibidos, 'sha256': sha256}
+    )
+    # La sesión sigue activa mientras lleguen bloques (ver eliminar_subidas_vencidas)
+    SesionSubida.objects.filter(pk=sesion.pk).update(actualizacion=timezone.now())
+    return recibidos
+
+
+class ArchivoEnBloques(ArchivoDjango):
+    """Archivo formado por los bloques de una sesión, leídos en orden sin concatenarlos antes"""
+
+    def __init__(self, sesion):
+        super().__init__(None, name=sesion.nombre)
+        self.sesion = sesion
+
+    @property
+    def size(self):
+        return self.sesion.tamano
+
+    def seek(self, posicion):
+        pass
+
+    def chunks(self, chunk_size=None):
+        for indice in range(self.sesion.total_bloques):
+            with open(_ruta_bloque(self.sesion, indice), 'rb') as bloque:
+                while parte := bloque.read(chunk_size or TAMANO_LECTURA):
+                    yield parte
+
+
+def _reservar_ensamblado(sesion):
+    """
+    Marca la sesión como 'ensamblando' en una transacción corta. Retorna la sesión
+    actualizada; si ya estaba completa, su File queda en sesion.archivo.
+    """
+    with transaction.atomic():
+        sesion = SesionSubida.objects.select_for_update().select_related('archivo').get(pk=sesion.pk)
+        if sesion.archivo_id:
+            return sesion
+        if (
+            sesion.estado_subida == SesionSubida.ENSAMBLANDO
+            and sesion.actualizacion > timezone.now() - ESPERA_ENSAMBLADO
+        ):
+            raise SubidaInvalida("La subida ya se está ensamblando.")
+
+        faltantes = set(range(sesion.total_bloques)) - set(bloques_recibidos(sesion))
+        if faltantes:
+            raise SubidaInvalida(f"Faltan {len(faltantes)} bloques por subir.")
+        sesion.estado_subida = SesionSubida.ENSAMBLANDO
+        sesion.save(update_fields=['estado_subida', 'actualizacion'])
+    return sesion
+
+
+def completar_subida(sesion):
+    """
+    Ensambla los bloques en un File (deduplicado por contenido) y lo asocia a la
+    sesión. Si la sesión ya estaba completa retorna el mismo File. La sesión se
+    reserva y se cierra en dos transacciones cortas; el ensamblado y el hash, que
+    leen y escriben el archivo completo, ocurren entre ambas sin bloquear la fila.
+    """
+    sesion = _reservar_ensamblado(sesion)
+    if sesion.archivo_id:
+        return sesion.archivo
+
+    try:
+        archivo = guardar_archivo(ArchivoEnBloques(sesion))
+        if sesion.sha256 and archivo.sha256 != sesion.sha256:
+            # El File queda sin referencias y lo elimina la recolección de archivos
+            raise SubidaInvalida("El checksum del archivo completo no coincide.")
+    except BaseException:
+        SesionSubida.objects.filter(pk=sesion.pk, estado_subida=SesionSubida.ENSAMBLANDO).update(
+            estado_subida=SesionSubida.RECIBIENDO, actualizacion=timezone.now()
+        )
+        raise
+
+    with transaction.atomic():
+        SesionSubida.objects.filter(pk=sesion.pk).update(
+            archivo=archivo, estado_subida=SesionSubida.COMPLETADA, actualizacion=timezone.now()
+        )
+        BloqueSubida.objects.filter(sesion_id=sesion.pk).delete()
+
+    shutil.rmtree(_directorio(sesion), ignore_errors=True)
+    return archivo
+
+
+def archivo_de_subida(subida_id, usuario):
+    """File de una subida completada por 'usuario', o None si no existe o no está completa"""
+    try:
+        subida_id = uuid.UUID(str(subida_id))
+    except ValueError:
+        return None
+    sesion = (
+        SesionSubida.objects.select_related('archivo')
+        .filter(pk=subida_id, usuario=usuario, archivo__isnull=False)
+        .first()
+    )
+    return sesion.archivo if sesion else None
+
+
+def eliminar_subida(sesion):
+    shutil.rmtree(_directorio(sesion), ignore_errors=True)
+    sesion.delete()
+
+
+def eliminar_subidas_vencidas(horas=None):
+    """
+    Elimina las sesiones (completas o no) sin actividad en las últimas 'horas'.
+    Las completas ya entregaron su File: al borrarlas el File pierde esa referencia.
+    """
+    limite = timezone.now() - timedelta(hours=horas or settings.SUBIDAS_EXPIRACION_HORAS)
+    vencidas = list(SesionSubida.objects.filter(actualizacion__lt=limite))
+    for sesion in vencidas:
+        eliminar_subida(sesion)
+    return len(vencidas)
@@ -1,3 +1,474 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from apps.autenticacion.models import Usuario
+from apps.reports.models import ArchivoReporte, Reporte
+from .almacenamiento import DIRECTORIO_CONTENIDO
+from .archivos import guardar_archivo
+from .descargas import respuesta_archivo
+from .models import File, SesionSubida
+from .recoleccion import ANTIGUEDAD_MINIMA, recolectar_disco, recolectar_filas
+from . import subidas
+from .subidas import ESPERA_ENSAMBLADO, archivo_de_subida
+from .vistas_previas import (
+    Image, TAMANOS_PREVIA, VistaPreviaNoDisponible, generar_vista_previa, nombre_vista_previa,
+    procesar_vistas_previas,
+)
+
+
+class MediaTemporalMixin:
+    """Aísla MEDIA_ROOT (y las subidas por bloques) en un directorio temporal por test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(
+            MEDIA_ROOT=self.media, SUBIDAS_DIRECTORIO=os.path.join(self.media, 'subidas')
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _archivo(self, contenido, nombre='datos.txt'):
+        return guardar_archivo(SimpleUploadedFile(nombre, contenido))
+
+
+class DescargasTests(MediaTemporalMixin, TestCase):
+    """respuesta_archivo: Range, If-Range, 416 y respuestas condicionales"""
+
+    def setUp(self):
+        super().setUp()
+        self.archivo = self._archivo(b'0123456789')
+
+    def _descargar(self, archivo=None, **cabeceras):
+        archivo = archivo or self.archivo
+        request = RequestFactory().get('/descarga/', headers=cabeceras)
+        respuesta = respuesta_archivo(request, archivo.ruta, nombre=archivo.nombre_descarga, etag=archivo.sha256)
+        contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        return respuesta, contenido
+
+    def _modificado(self):
+        return os.stat(self.archivo.ruta.path).st_mtime
+
+    def test_rango_de_bytes(self):
+        respuesta, contenido = self._descargar(Range='bytes=2-5')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(respuesta['Content-Length'], '4')
+        self.assertEqual(contenido, b'2345')
+
+    def test_rango_abierto_y_sufijo(self):
+        self.assertEqual(self._descargar(Range='bytes=7-')[1], b'789')
+        self.assertEqual(self._descargar(Range='bytes=-3')[1], b'789')
+        self.assertEqual(self._descargar(Range='bytes=-50')[1], b'0123456789')
+
+    def test_rango_no_satisfacible(self):
+        respuesta, _ = self._descargar(Range='bytes=10-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], 'bytes */10')
+
+    def test_rango_de_archivo_vacio(self):
+        vacio = self._archivo(b'', 'vacio.txt')
+        for rango in ('bytes=-5', 'bytes=0-'):
+            with self.subTest(rango=rango):
+                respuesta, _ = self._descargar(vacio, Range=rango)
+                self.assertEqual(respuesta.status_code, 416)
+                self.assertEqual(respuesta['Content-Range'], 'bytes */0')
+
+    def test_rango_no_soportado_envia_completo(self):
+        respuesta, contenido = self._descargar(Range='bytes=0-1,4-5')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(contenido, b'0123456789')
+
+    def test_if_range_con_etag(self):
+        etag = f'"{self.archivo.sha256}"'
+        self.assertEqual(self._descargar(Range='bytes=0-1', **{'If-Range': etag})[0].status_code, 206)
+        respuesta, contenido = self._descargar(Range='bytes=0-1', **{'If-Range': '"otro"'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(contenido, b'0123456789')
+
+    def test_if_range_con_fecha_exige_coincidencia_exacta(self):
+        exacta = http_date(self._modificado())
+        posterior = http_date(self._modificado() + 3600)
+        self.assertEqual(self._descargar(Range='bytes=0-1', **{'If-Range': exacta})[0].status_code, 206)
+        self.assertEqual(self._descargar(Range='bytes=0-1', **{'If-Range': posterior})[0].status_code, 200)
+
+    def test_if_none_match_responde_304(self):
+        respuesta, _ = self._descargar(**{'If-None-Match': f'"{self.archivo.sha256}"'})
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], f'"{self.archivo.sha256}"')
+
+
+class DeduplicacionTests(MediaTemporalMixin, TestCase):
+    """guardar_archivo: un blob y un File por contenido, y el contador de referencias"""
+
+    def _blobs(self):
+        raiz = os.path.join(self.media, DIRECTORIO_CONTENIDO)
+        return sorted(
+            os.path.relpath(os.path.join(actual, nombre), raiz)
+            for actual, _, nombres in os.walk(raiz) for nombre in nombres
+        )
+
+    def test_mismo_contenido_un_solo_file(self):
+        primero = self._archivo(b'contenido repetido', 'informe.txt')
+        segundo = self._archivo(b'contenido repetido', 'copia.txt')
+        self.assertEqual(primero.pk, segundo.pk)
+        self.assertEqual(segundo.nombre, 'informe.txt')
+        self.assertEqual(File.objects.filter(sha256=primero.sha256).count(), 1)
+        self.assertEqual(self._blobs(), [os.path.relpath(primero.ruta.name, DIRECTORIO_CONTENIDO)])
+
+    def test_otra_extension_conserva_el_blob_existente(self):
+        primero = self._archivo(b'mismo contenido', 'datos.txt')
+        segundo = self._archivo(b'mismo contenido', 'datos.csv')
+        self.assertEqual(primero.pk, segundo.pk)
+        self.assertEqual(len(self._blobs()), 1)
+        self.assertTrue(primero.ruta.name.endswith('.txt'))
+
+    def test_contenidos_distintos(self):
+        uno, otro = self._archivo(b'uno'), self._archivo(b'otro')
+        self.assertNotEqual(uno.pk, otro.pk)
+        self.assertEqual(len(self._blobs()), 2)
+
+    def test_contador_de_referencias(self):
+        archivo = self._archivo(b'adjunto compartido')
+        otro = self._archivo(b'otro adjunto')
+
+        def referencias(archivo):
+            return File.objects.get(pk=archivo.pk).referencias
+
+        reporte = Reporte.objects.create(titulo='Regresión', descripcion='-')
+        adjuntos = [ArchivoReporte.objects.create(reporte=reporte, archivo=archivo) for _ in range(2)]
+        self.assertEqual(referencias(archivo), 2)
+
+        adjuntos[0].archivo = otro
+        adjuntos[0].save()
+        self.assertEqual((referencias(archivo), referencias(otro)), (1, 1))
+
+        # Cargado con campos diferidos, el archivo previo se consulta antes de guardar
+        diferido = ArchivoReporte.objects.only('reporte').get(pk=adjuntos[1].pk)
+        diferido.archivo = None
+        diferido.save()
+        self.assertEqual(referencias(archivo), 0)
+
+        adjuntos[0].delete()
+        self.assertEqual(referencias(otro), 0)
+
+
+@override_settings(SUBIDAS_TAMANO_BLOQUE=4)
+class SubidasPorBloquesTests(MediaTemporalMixin, TestCase):
+    """Protocolo de subida por bloques: checksum por bloque, reanudación y ensamblado"""
+
+    CONTENIDO = b'0123456789'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='subidas@example.com', nick='subidas', password='x')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.usuario)
+
+    def _iniciar(self, **datos):
+        datos = {'nombre': 'registro.log', 'tamano': len(self.CONTENIDO), **datos}
+        respuesta = self.client.post(reverse('commons:crear_subida'), datos)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return respuesta.json()['id']
+
+    def _bloque(self, subida, indice, contenido=None, checksum=None):
+        if contenido is None:
+            contenido = self.CONTENIDO[indice * 4:(indice + 1) * 4]
+        return self.client.put(
+            reverse('commons:subir_bloque', args=[subida, indice]), contenido,
+            content_type='application/octet-stream',
+            headers={'X-Checksum-Sha256': checksum or hashlib.sha256(contenido).hexdigest()},
+        )
+
+    def _estado(self, subida):
+        return self.client.get(reverse('commons:detalle_subida', args=[subida])).json()
+
+    def _completar(self, subida):
+        return self.client.post(reverse('commons:completar_subida', args=[subida]))
+
+    def test_checksum_incorrecto_se_rechaza(self):
+        subida = self._iniciar()
+        respuesta = self._bloque(subida, 0, checksum=hashlib.sha256(b'otra cosa').hexdigest())
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._estado(subida)['recibidos'], [])
+        # No queda el temporal del bloque rechazado
+        directorio = os.path.join(self.media, 'subidas', subida)
+        self.assertEqual(os.listdir(directorio), [])
+
+    def test_tamano_de_bloque_incorrecto_se_rechaza(self):
+        subida = self._iniciar()
+        self.assertEqual(self._bloque(subida, 0, b'01234').status_code, 400)
+        self.assertEqual(self._bloque(subida, 2, b'89A').status_code, 400)
+        self.assertEqual(self._bloque(subida, 3, b'x').status_code, 400)
+
+    def test_reanudar_enviando_solo_los_faltantes(self):
+        subida = self._iniciar(sha256=hashlib.sha256(self.CONTENIDO).hexdigest())
+        self.assertEqual(self._bloque(subida, 0).status_code, 200)
+        self.assertEqual(self._bloque(subida, 2).status_code, 200)
+
+        estado = self._estado(subida)
+        self.assertEqual(estado['total_bloques'], 3)
+        self.assertEqual(estado['recibidos'], [0, 2])
+        respuesta = self._completar(subida)
+        self.assertEqual(respuesta.status_code, 400)
+
+        faltantes = set(range(estado['total_bloques'])) - set(estado['recibidos'])
+        for indice in faltantes:
+            self.assertEqual(self._bloque(subida, indice).status_code, 200)
+        respuesta = self._completar(subida)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+
+        archivo = File.objects.get(pk=respuesta.json()['archivo'])
+        self.assertEqual(archivo.sha256, hashlib.sha256(self.CONTENIDO).hexdigest())
+        with archivo.ruta.open('rb') as contenido:
+            self.assertEqual(contenido.read(), self.CONTENIDO)
+        self.assertEqual(archivo_de_subida(subida, self.usuario), archivo)
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'subidas', subida)))
+
+        # Completar de nuevo retorna el mismo File; ya no se aceptan bloques
+        self.assertEqual(self._completar(subida).json()['archivo'], archivo.pk)
+        self.assertEqual(self._bloque(subida, 0).status_code, 400)
+
+    def test_reenviar_un_bloque_lo_reemplaza(self):
+        subida = self._iniciar()
+        self._bloque(subida, 0, b'xxxx')
+        for indice in range(3):
+            self._bloque(subida, indice)
+        archivo = File.objects.get(pk=self._completar(subida).json()['archivo'])
+        self.assertEqual(archivo.sha256, hashlib.sha256(self.CONTENIDO).hexdigest())
+
+    def test_checksum_del_archivo_completo(self):
+        subida = self._iniciar(sha256=hashlib.sha256(b'otro contenido').hexdigest())
+        for indice in range(3):
+            self._bloque(subida, indice)
+        self.assertEqual(self._completar(subida).status_code, 400)
+        self.assertIsNone(archivo_de_subida(subida, self.usuario))
+
+    def test_checksum_fallido_permite_reintentar(self):
+        subida = self._iniciar(sha256=hashlib.sha256(b'otro contenido').hexdigest())
+        for indice in range(3):
+            self._bloque(subida, indice)
+        self.assertEqual(self._completar(subida).status_code, 400)
+        self.assertEqual(self._estado(subida)['estado'], SesionSubida.RECIBIENDO)
+        self.assertEqual(self._bloque(subida, 0).status_code, 200)
+
+    def _subida_lista(self):
+        subida = self._iniciar()
+        for indice in range(3):
+            self._bloque(subida, indice)
+        return subida
+
+    def test_ensambla_fuera_de_transaccion(self):
+        subida = self._subida_lista()
+        guardar = subidas.guardar_archivo
+        durante = {}
+
+        def guardar_y_observar(origen):
+            durante['transacciones'] = len(connection.atomic_blocks)
+            durante['estado'] = SesionSubida.objects.values_list('estado_subida', flat=True).get(pk=subida)
+            # Mientras se ensambla no se aceptan bloques ni un segundo ensamblado
+            durante['bloque'] = self._bloque(subida, 0).status_code
+            durante['completar'] = self._completar(subida).status_code
+            return guardar(origen)
+
+        # El test corre dentro de su propia transacción: se compara con esa profundidad
+        transacciones = len(connection.atomic_blocks)
+        with mock.patch.object(subidas, 'guardar_archivo', guardar_y_observar):
+            respuesta = self._completar(subida)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(durante, {
+            'transacciones': transacciones, 'estado': SesionSubida.ENSAMBLANDO, 'bloque': 400, 'completar': 400,
+        })
+        sesion = SesionSubida.objects.get(pk=subida)
+        self.assertEqual((sesion.estado_subida, sesion.archivo_id), (SesionSubida.COMPLETADA, respuesta.json()['archivo']))
+        self.assertFalse(sesion.bloques.exists())
+
+    def test_ensamblado_abandonado_se_puede_reintentar(self):
+        subida = self._subida_lista()
+        SesionSubida.objects.filter(pk=subida).update(
+            estado_subida=SesionSubida.ENSAMBLANDO, actualizacion=timezone.now()
+        )
+        self.assertEqual(self._completar(subida).status_code, 400)
+
+        SesionSubida.objects.filter(pk=subida).update(
+            actualizacion=timezone.now() - ESPERA_ENSAMBLADO - timedelta(minutes=1)
+        )
+        respuesta = self._completar(subida)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(self._estado(subida)['estado'], SesionSubida.COMPLETADA)
+
+    def test_subida_de_otro_usuario(self):
+        subida = self._iniciar()
+        otro = Usuario.objects.create(correo='otro@example.com', nick='otro', password='x')
+        self.client.force_login(otro)
+        self.assertEqual(self._bloque(subida, 0).status_code, 404)
+
+
+class VistasPreviasTests(MediaTemporalMixin, TestCase):
+    """Miniaturas y vistas previas: generación en segundo plano, formatos sin previa y endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='previas@example.com', nick='previas', password='x')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.usuario)
+
+    def _png(self, ancho, alto):
+        contenido = BytesIO()
+        Image.new('RGBA', (ancho, alto), (200, 30, 30, 128)).save(contenido, 'PNG')
+        return contenido.getvalue()
+
+    def _previa(self, archivo, tamano='miniatura'):
+        return self.client.get(reverse('commons:vista_previa', args=[archivo.pk, tamano]))
+
+    @skipIf(Image is None, 'Pillow no está instalado')
+    def test_genera_las_vistas_previas_de_una_imagen(self):
+        archivo = self._archivo(self._png(1600, 800), 'captura.png')
+        self.assertEqual(archivo.estado_previa, File.PREVIA_PENDIENTE)
+        # Antes de generarla el endpoint responde 404 (el cliente muestra el original)
+        self.assertEqual(self._previa(archivo).status_code, 404)
+
+        self.assertEqual(procesar_vistas_previas(), (1, []))
+        archivo.refresh_from_db()
+        self.assertEqual(archivo.estado_previa, File.PREVIA_GENERADA)
+        for tamano, lado in TAMANOS_PREVIA.items():
+            with Image.open(archivo.ruta.storage.path(nombre_vista_previa(archivo, tamano))) as imagen:
+                self.assertEqual((imagen.format, max(imagen.size)), ('JPEG', lado))
+                self.assertEqual(imagen.size[0], 2 * imagen.size[1])
+
+        respuesta = self._previa(archivo)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'image/jpeg')
+        self.assertEqual(b''.join(respuesta.streaming_content)[:3], b'\xff\xd8\xff')
+        self.assertEqual(self._previa(archivo, 'gigante').status_code, 404)
+
+    @skipIf(Image is None, 'Pillow no está instalado')
+    def test_imagen_pequena_no_se_amplia(self):
+        archivo = self._archivo(self._png(100, 50), 'icono.png')
+        procesar_vistas_previas()
+        with Image.open(archivo.ruta.storage.path(nombre_vista_previa(archivo, 'previa'))) as imagen:
+            self.assertEqual(imagen.size, (100, 50))
+
+    def test_formato_sin_vista_previa(self):
+        archivo = self._archivo(b'linea 1\nlinea 2\n', 'registro.log')
+        self.assertEqual(archivo.estado_previa, '')
+        self.assertEqual(procesar_vistas_previas(), (0, []))
+        self.assertEqual(self._previa(archivo).status_code, 404)
+        with self.assertRaises(VistaPreviaNoDisponible):
+            generar_vista_previa(archivo)
+
+    @skipIf(Image is None, 'Pillow no está instalado')
+    def test_sin_herramienta_el_pdf_queda_fallido(self):
+        archivo = self._archivo(b'%PDF-1.4\n%%EOF\n', 'manual.pdf')
+        with mock.patch('apps.commons.vistas_previas.shutil.which', return_value=None):
+            generadas, errores = procesar_vistas_previas()
+        self.assertEqual(generadas, 0)
+        self.assertIn('pdftoppm', errores[0][1])
+        archivo.refresh_from_db()
+        self.assertEqual(archivo.estado_previa, File.PREVIA_FALLIDA)
+        self.assertEqual(self._previa(archivo).status_code, 404)
+
+    @skipIf(Image is None, 'Pillow no está instalado')
+    def test_imagen_corrupta_se_reintenta_con_espera(self):
+        archivo = self._archivo(b'no es un png', 'rota.png')
+        generadas, errores = procesar_vistas_previas()
+        self.assertEqual((generadas, len(errores)), (0, 1))
+        archivo.refresh_from_db()
+        self.assertEqual((archivo.estado_previa, archivo.intentos_previa), (File.PREVIA_PENDIENTE, 1))
+        self.assertGreater(archivo.previa_disponible_desde, timezone.now())
+        # Aún en espera: el siguiente lote no la toma
+        self.assertEqual(procesar_vistas_previas(), (0, []))
+
+
+class RecoleccionArchivosTests(MediaTemporalMixin, TestCase):
+    """recolectar_filas/recolectar_disco: simulación frente a eliminación real"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='gc@example.com', nick='gc', password='x')
+
+    def setUp(self):
+        super().setUp()
+        antes = timezone.now() - ANTIGUEDAD_MINIMA - timedelta(hours=1)
+        self.usado = self._archivo(b'referenciado', 'usado.txt')
+        self.huerfano = self._archivo(b'sin referencias', 'huerfano.txt')
+        self.reciente = self._archivo(b'recien subido', 'reciente.txt')
+        SesionSubida.objects.create(
+            usuario=self.usuario, nombre='usado.txt', tamano=1, tamano_bloque=1, archivo=self.usado
+        )
+        File.objects.filter(pk__in=[self.usado.pk, self.huerfano.pk]).update(actualizacion=antes)
+
+        # Blob sin fila File (p. ej. de una subida interrumpida), anterior al límite
+        self.suelto = os.path.join(self.media, DIRECTORIO_CONTENIDO, 'ff', 'f' * 64 + '.bin')
+        os.makedirs(os.path.dirname(self.suelto), exist_ok=True)
+        with open(self.suelto, 'wb') as destino:
+            destino.write(b'12345')
+        marca = antes.timestamp()
+        for archivo in (self.usado, self.huerfano, self.reciente):
+            os.utime(archivo.ruta.path, (marca, marca))
+        os.utime(self.suelto, (marca, marca))
+
+    def _recolectar(self, **kwargs):
+        # Los blobs de las filas eliminadas se borran al confirmar, antes de recorrer el disco
+        with self.captureOnCommitCallbacks(execute=True):
+            filas = recolectar_filas(**kwargs)
+        return filas, recolectar_disco(simulacion=kwargs.get('simulacion', False))
+
+    def test_simulacion_no_elimina(self):
+        filas, disco = self._recolectar(simulacion=True)
+        self.assertEqual(filas['eliminados'], 1)
+        self.assertEqual(filas['bytes'], len(b'sin referencias'))
+        self.assertEqual((disco['eliminados'], disco['bytes']), (1, 5))
+
+        self.assertEqual(File.objects.filter(pk=self.huerfano.pk).count(), 1)
+        self.assertTrue(os.path.exists(self.huerfano.ruta.path))
+        self.assertTrue(os.path.exists(self.suelto))
+
+    def test_eliminacion_real(self):
+        ruta_huerfano = self.huerfano.ruta.path
+        filas, disco = self._recolectar()
+        self.assertEqual(filas['eliminados'], 1)
+        self.assertFalse(File.objects.filter(pk=self.huerfano.pk).exists())
+        self.assertFalse(os.path.exists(ruta_huerfano))
+        self.assertFalse(os.path.exists(self.suelto))
+
+        # Se conservan el referenciado y el reciente (puede esperar su registro)
+        self.assertEqual(set(File.objects.values_list('pk', flat=True)), {self.usado.pk, self.reciente.pk})
+        self.assertTrue(os.path.exists(self.usado.ruta.path))
+        self.assertTrue(os.path.exists(self.reciente.ruta.path))
+        self.assertEqual(disco['eliminados'], 1)
+
+    def test_completo_corrige_contadores(self):
+        File.objects.filter(pk=self.usado.pk).update(referencias=5)
+        filas, _ = self._recolectar(completo=True, simulacion=True)
+        self.assertEqual(filas['corregidos'], 1)
+        self.assertEqual(File.objects.get(pk=self.usado.pk).referencias, 5)
+
+        filas, _ = self._recolectar(completo=True)
+        self.assertEqual(filas['corregidos'], 1)
+        self.assertEqual(File.objects.get(pk=self.usado.pk).referencias, 1)
+
+    def test_comando_con_simulacion(self):
+        salida = StringIO()
+        call_command('recolectar_archivos', '--simulacion', stdout=salida)
+        self.assertIn('Simulación', salida.getvalue())
+        self.assertTrue(File.objects.filter(pk=self.huerfano.pk).exists())
+        self.assertTrue(os.path.exists(self.suelto))
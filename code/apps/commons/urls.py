@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+app_name = 'commons'
+
+urlpatterns = [
+    # Subidas por bloques
+    path('subidas/', views.crear_subida, name='crear_subida'),
+    path('subidas/<uuid:pk>/', views.detalle_subida, name='detalle_subida'),
+    path('subidas/<uuid:pk>/bloques/<int:indice>/', views.subir_bloque, name='subir_bloque'),
+    path('subidas/<uuid:pk>/completar/', views.completar, name='completar_subida'),
+
+    # Vistas previas
+    path('<int:pk>/vista-previa/<str:tamano>/', views.vista_previa_archivo, name='vista_previa'),
+]
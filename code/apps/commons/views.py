@@ -1,3 +1,102 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods, require_POST
 
-# Create your views here.
+from .descargas import respuesta_archivo
+from .models import File, SesionSubida
+from .subidas import (
+    SubidaInvalida, bloques_recibidos, completar_subida, eliminar_subida, guardar_bloque, iniciar_subida,
+)
+from .vistas_previas import TAMANOS_PREVIA, vista_previa
+
+# Cabecera con el SHA-256 (hexadecimal) de cada bloque enviado
+CABECERA_CHECKSUM = 'X-Checksum-Sha256'
+
+
+def _estado(sesion):
+    return {
+        'id': str(sesion.pk),
+        'nombre': sesion.nombre,
+        'tamano': sesion.tamano,
+        'tamano_bloque': sesion.tamano_bloque,
+        'total_bloques': sesion.total_bloques,
+        'recibidos': bloques_recibidos(sesion) if not sesion.archivo_id else [],
+        'completa': bool(sesion.archivo_id),
+        'estado': sesion.estado_subida,
+        'archivo': sesion.archivo_id,
+    }
+
+
+@login_required
+@require_POST
+def crear_subida(request):
+    """Inicia una subida por bloques: recibe nombre, tamano y opcionalmente sha256 del archivo"""
+    try:
+        sesion = iniciar_subida(
+            request.user,
+            request.POST.get('nombre'),
+            request.POST.get('tamano'),
+            request.POST.get('sha256', ''),
+        )
+    except SubidaInvalida as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_estado(sesion), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'DELETE'])
+def detalle_subida(request, pk):
+    """Estado de la subida (para reanudarla enviando solo los bloques faltantes) o cancelación"""
+    sesion = get_object_or_404(SesionSubida, pk=pk, usuario=request.user)
+    if request.method == 'DELETE':
+        eliminar_subida(sesion)
+        return JsonResponse({'eliminada': True})
+    return JsonResponse(_estado(sesion))
+
+
+@login_required
+@require_http_methods(['PUT', 'POST'])
+def subir_bloque(request, pk, indice):
+    """
+    Recibe un bloque en el cuerpo de la petición (sin multipart) con su SHA-256 en la
+    cabecera X-Checksum-Sha256. El cuerpo se lee por partes directamente a disco.
+    """
+    sesion = get_object_or_404(SesionSubida, pk=pk, usuario=request.user)
+    try:
+        tamano = guardar_bloque(sesion, indice, request, request.headers.get(CABECERA_CHECKSUM))
+    except SubidaInvalida as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'indice': indice, 'tamano': tamano})
+
+
+@login_required
+@require_POST
+def completar(request, pk):
+    """Ensambla los bloques en un File; el id de la sesión se envía luego en el formulario"""
+    sesion = get_object_or_404(SesionSubida, pk=pk, usuario=request.user)
+    try:
+        archivo = completar_subida(sesion)
+    except SubidaInvalida as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({
+        'id': str(sesion.pk),
+        'archivo': archivo.pk,
+        'nombre': archivo.nombre_descarga,
+        'sha256': archivo.sha256,
+        'tamano': archivo.tamano,
+    })
+
+
+@login_required
+def vista_previa_archivo(request, pk, tamano):
+    """
+    Miniatura o vista previa (JPEG de unos KB) de una imagen o PDF, generada en
+    segundo plano. 404 mientras no exista; el cliente usa entonces el original.
+    """
+    archivo = get_object_or_404(File, pk=pk)
+    if tamano not in TAMANOS_PREVIA or not archivo.tiene_vista_previa:
+        raise Http404("La vista previa no está disponible.")
+    etag = f"{archivo.sha256}-{tamano}" if archivo.sha256 else None
+    nombre = f"{archivo.nombre_descarga}.{tamano}.jpg"
+    return respuesta_archivo(request, vista_previa(archivo, tamano), nombre=nombre, adjunto=False, etag=etag)
@@ -0,0 +1,181 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from .models import File
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él no se generan vistas previas
+    Image = ImageOps = None
+
+# Lado mayor (px) de cada tamaño; se guardan como JPEG junto al original:
+# <ruta del original>.<tamaño>.jpg
+TAMANOS_PREVIA = {'miniatura': 240, 'previa': 1280}
+CALIDAD_JPEG = 80
+EXTENSIONES_IMAGEN = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+EXTENSIONES_PDF = {'.pdf'}
+
+MAX_INTENTOS = 3
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAXIMO = timedelta(hours=1)
+TIEMPO_MAXIMO_PDF = 60  # segundos para renderizar la primera página
+
+
+class VistaPreviaNoDisponible(Exception):
+    """El archivo no se puede convertir en vista previa (formato o herramienta ausente)"""
+
+
+def _extension(archivo):
+    return os.path.splitext(archivo.nombre_descarga)[1].lower()
+
+
+def admite_vista_previa(archivo):
+    return _extension(archivo) in EXTENSIONES_IMAGEN | EXTENSIONES_PDF
+
+
+def encolar_vista_previa(archivo):
+    """Marca el File como pendiente de vista previa si su formato la admite"""
+    if admite_vista_previa(archivo) and not archivo.estado_previa:
+        archivo.estado_previa = File.PREVIA_PENDIENTE
+        archivo.previa_disponible_desde = timezone.now()
+        return True
+    return False
+
+
+def nombre_vista_previa(archivo, tamano):
+    return f"{archivo.ruta.name}.{tamano}.jpg"
+
+
+def vista_previa(archivo, tamano):
+    """FieldFile de la vista previa 'tamano' del archivo (para respuesta_archivo)"""
+    return FieldFile(archivo, File._meta.get_field('ruta'), nombre_vista_previa(archivo, tamano))
+
+
+def rutas_vistas_previas(archivo):
+    """Nombres (relativos a MEDIA_ROOT) de todas las vistas previas de un archivo"""
+    return [nombre_vista_previa(archivo, tamano) for tamano in TAMANOS_PREVIA]
+
+
+def _primera_pagina(ruta, directorio):
+    """Renderiza la primera página de un PDF a PNG con pdftoppm (poppler-utils)"""
+    if not shutil.which('pdftoppm'):
+        raise VistaPreviaNoDisponible("pdftoppm (poppler-utils) no está instalado.")
+    salida = os.path.join(directorio, 'pagina')
+    subprocess.run(
+        ['pdftoppm', '-f', '1', '-l', '1', '-singlefile', '-png',
+         '-scale-to', str(max(TAMANOS_PREVIA.values())), ruta, salida],
+        check=True, capture_output=True, timeout=TIEMPO_MAXIMO_PDF,
+    )
+    return salida + '.png'
+
+
+def _a_rgb(imagen):
+    # JPEG no admite transparencia: se compone sobre fondo blanco
+    if imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info):
+        imagen = imagen.convert('RGBA')
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.getchannel('A'))
+        return fondo
+    return imagen.convert('RGB')
+
+
+def generar_vista_previa(archivo):
+    """
+    Genera la miniatura y la vista previa de un File (imagen o primera página de un
+    PDF). Cada tamaño se escribe a un temporal junto al original y se mueve con
+    os.replace, así el endpoint nunca sirve un JPEG a medio escribir.
+    """
+    if Image is None:
+        raise VistaPreviaNoDisponible("Pillow no está instalado.")
+    if not admite_vista_previa(archivo):
+        raise VistaPreviaNoDisponible(f"Formato sin vista previa: {_extension(archivo) or 'sin extensión'}.")
+
+    almacenamiento = archivo.ruta.storage
+    with tempfile.TemporaryDirectory() as directorio:
+        origen = archivo.ruta.path
+        if _extension(archivo) in EXTENSIONES_PDF:
+            origen = _primera_pagina(origen, directorio)
+
+        with Image.open(origen) as imagen:
+            # En JPEG, draft() decodifica directamente a menor resolución
+            imagen.draft('RGB', (max(TAMANOS_PREVIA.values()),) * 2)
+            imagen = _a_rgb(ImageOps.exif_transpose(imagen))
+            for tamano, lado in sorted(TAMANOS_PREVIA.items(), key=lambda item: -item[1]):
+                imagen.thumbnail((lado, lado))
+                destino = almacenamiento.path(nombre_vista_previa(archivo, tamano))
+                imagen.save(destino + '.tmp', 'JPEG', quality=CALIDAD_JPEG, optimize=True)
+                os.replace(destino + '.tmp', destino)
+
+
+def _reservar_lote(tamano_lote):
+    """Toma un lote de archivos pendientes; skip_locked permite varios workers en paralelo"""
+    with transaction.atomic():
+        ids = list(
+            File.objects.select_for_update(skip_locked=True)
+            .filter(estado_previa=File.PREVIA_PENDIENTE, previa_disponible_desde__lte=timezone.now())
+            .order_by('previa_disponible_desde', 'id')
+            .values_list('id', flat=True)[:tamano_lote]
+        )
+        # Se aparta el lote mientras se procesa; si el worker muere, vuelve a estar disponible
+        File.objects.filter(id__in=ids).update(previa_disponible_desde=timezone.now() + BACKOFF_MAXIMO)
+    return list(File.objects.filter(id__in=ids).order_by('id'))
+
+
+def _registrar_fallo(archivo, definitivo, max_intentos):
+    archivo.intentos_previa += 1
+    if definitivo or archivo.intentos_previa >= max_intentos:
+        archivo.estado_previa = File.PREVIA_FALLIDA
+    else:
+        espera = min(BACKOFF_BASE * 2 ** (archivo.intentos_previa - 1), BACKOFF_MAXIMO)
+        archivo.previa_disponible_desde = timezone.now() + espera
+    File.objects.filter(pk=archivo.pk).update(
+        estado_previa=archivo.estado_previa,
+        intentos_previa=archivo.intentos_previa,
+        previa_disponible_desde=archivo.previa_disponible_desde,
+    )
+
+
+def procesar_vistas_previas(tamano_lote=20, max_intentos=MAX_INTENTOS):
+    """
+    Genera las vistas previas de un lote de archivos pendientes. Los errores
+    transitorios se reintentan con backoff exponencial; un formato o herramienta
+    no disponible marca el archivo como fallido. Retorna (generadas, errores), donde
+    errores es una lista de (File, mensaje).
+    """
+    generadas, errores = 0, []
+    for archivo in _reservar_lote(tamano_lote):
+        try:
+            generar_vista_previa(archivo)
+        except VistaPreviaNoDisponible as exc:
+            _registrar_fallo(archivo, True, max_intentos)
+            errores.append((archivo, str(exc)))
+            continue
+        except Exception as exc:
+            _registrar_fallo(archivo, False, max_intentos)
+            errores.append((archivo, str(exc)))
+            continue
+
+        File.objects.filter(pk=archivo.pk).update(
+            estado_previa=File.PREVIA_GENERADA, intentos_previa=archivo.intentos_previa + 1,
+        )
+        generadas += 1
+    return generadas, errores
+
+
+def encolar_existentes():
+    """Marca como pendientes los archivos anteriores a las vistas previas que las admiten"""
+    pendientes = [
+        archivo.pk
+        for archivo in File.objects.filter(estado_previa='').only('id', 'nombre', 'ruta').iterator()
+        if admite_vista_previa(archivo)
+    ]
+    return File.objects.filter(pk__in=pendientes).update(
+        estado_previa=File.PREVIA_PENDIENTE, previa_disponible_desde=timezone.now()
+    )
@@ -0,0 +1,28 @@
+from django import forms
+
+
+class SelectAutocompletar(forms.Select):
+    """
+    Select que solo renderiza la opción vacía y la seleccionada; el resto de opciones
+    se busca por AJAX en 'url' (ver static/js/commons/autocompletar.js). Así el HTML
+    y las consultas no crecen con el tamaño del queryset del campo.
+    """
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocompletar'] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        valores = [v for v in value if v not in (None, '')]
+        opciones = [self.create_option(name, '', self.choices.field.empty_label or '', not valores, 0)]
+        if valores:
+            queryset = self.choices.queryset.filter(pk__in=valores)
+            etiqueta = self.choices.field.label_from_instance
+            for indice, objeto in enumerate(queryset, start=1):
+                opciones.append(self.create_option(name, str(objeto.pk), etiqueta(objeto), True, indice))
+        return [(None, opciones, 0)]
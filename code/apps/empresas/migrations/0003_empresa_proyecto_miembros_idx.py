@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0002_initial'),
+        ('proyectos', '0003_tarea'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='empresa_proyecto',
+            index=models.Index(fields=['proyecto', 'usuario'], name='empresa_proy_proy_usu_idx'),
+        ),
+    ]
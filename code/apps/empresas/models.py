@@ -86,3 +86,7 @@ class Empresa_Proyecto(Metadatos):
         verbose_name = "Empresa Proyecto"
         verbose_name_plural = "Empresas Proyectos"
         unique_together = ("empresa", "proyecto", "usuario")
+        indexes = [
+            # Miembros de un proyecto (autocompletado de usuarios, notificaciones)
+            models.Index(fields=["proyecto", "usuario"], name="empresa_proy_proy_usu_idx"),
+        ]
@@ -0,0 +1,195 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.commons.models import Tipo
+from apps.empresas.models import Empresa_Proyecto
+from .models import ConfiguracionNotificacion, EventoNotificacion, Notificacion
+
+# Roles de los miembros del proyecto que reciben las solicitudes de revisión
+# (administradores del proyecto y equipo de trabajo/QA)
+ROLES_REVISION = ('Propietario', 'Trabajador')
+
+MAX_INTENTOS = 5
+# Espera antes de reintentar: BACKOFF_BASE * 2^(intentos - 1), acotada por BACKOFF_MAXIMO
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAXIMO = timedelta(hours=1)
+
+
+def registrar_solicitud_revision(bug, usuario):
+    """
+    Encola la notificación de una solicitud de revisión. Debe llamarse dentro de la
+    transacción que cambia el estado del bug para que ambos se confirmen juntos.
+    """
+    return EventoNotificacion.objects.create(
+        tipo_evento=EventoNotificacion.SOLICITUD_REVISION,
+        actor=usuario,
+        proyecto_id=bug.proyecto_id,
+        bug=bug,
+        datos={
+            'titulo': bug.titulo,
+            'proyecto': bug.proyecto.nombre if bug.proyecto_id else None,
+            'actor': usuario.nick,
+        },
+    )
+
+
+def destinatarios_revision(eventos):
+    """
+    {evento_id: [Usuario]} con el asignado del bug y los miembros del proyecto con rol
+    de revisión, sin incluir a quien solicita. Dos consultas para todo el lote.
+    """
+    miembros = defaultdict(set)
+    proyectos = {evento.proyecto_id for evento in eventos if evento.proyecto_id}
+    if proyectos:
+        filas = Empresa_Proyecto.objects.filter(
+            proyecto_id__in=proyectos,
+            usuario__roles__nombre__in=ROLES_REVISION,
+        ).values_list('proyecto_id', 'usuario_id').distinct()
+        for proyecto_id, usuario_id in filas:
+            miembros[proyecto_id].add(usuario_id)
+
+    ids_por_evento = {}
+    for evento in eventos:
+        ids = set(miembros.get(evento.proyecto_id, ()))
+        if evento.bug_id and evento.bug.asignado_a_id:
+            ids.add(evento.bug.asignado_a_id)
+        ids.discard(evento.actor_id)
+        ids.discard(None)
+        ids_por_evento[evento.id] = ids
+
+    usuarios = Usuario.objects.filter(
+        id__in=set().union(*ids_por_evento.values()), is_active=True
+    ).only('id', 'nick', 'correo').in_bulk()
+    return {
+        evento_id: [usuarios[pk] for pk in sorted(ids) if pk in usuarios]
+        for evento_id, ids in ids_por_evento.items()
+    }
+
+
+def _contenido(evento):
+    datos = evento.datos
+    titulo = f"Revisión solicitada: {datos.get('titulo', '')}"[:150]
+    mensaje = (
+        f"{datos.get('actor', 'Un usuario')} ha solicitado la revisión del bug "
+        f"\"{datos.get('titulo', '')}\""
+    )
+    if datos.get('proyecto'):
+        mensaje += f" del proyecto {datos['proyecto']}"
+    return titulo, mensaje + "."
+
+
+def _preferencias(usuarios):
+    """{usuario_id: (recibir_alertas_app, recibir_correos)}; sin configuración se reciben ambas"""
+    return {
+        usuario_id: (alertas, correos)
+        for usuario_id, alertas, correos in ConfiguracionNotificacion.objects.filter(
+            usuario__in=usuarios
+        ).values_list('usuario_id', 'recibir_alertas_app', 'recibir_correos')
+    }
+
+
+def _reservar_lote(tamano_lote):
+    """Toma un lote de eventos vencidos; skip_locked permite varios workers en paralelo"""
+    with transaction.atomic():
+        ids = list(
+            EventoNotificacion.objects.select_for_update(skip_locked=True)
+            .filter(estado_envio=EventoNotificacion.PENDIENTE, disponible_desde__lte=timezone.now())
+            .order_by('disponible_desde', 'id')
+            .values_list('id', flat=True)[:tamano_lote]
+        )
+        # Se aparta el lote mientras se procesa; si el worker muere, vuelve a estar disponible
+        EventoNotificacion.objects.filter(id__in=ids).update(
+            disponible_desde=timezone.now() + BACKOFF_MAXIMO
+        )
+    return list(
+        EventoNotificacion.objects.select_related('bug').filter(id__in=ids).order_by('disponible_desde', 'id')
+    )
+
+
+def _crear_notificaciones(eventos, destinatarios, preferencias):
+    """Crea en bloque las Notificaciones en la app de los eventos que aún no las tienen"""
+    pendientes = [evento for evento in eventos if not evento.notificaciones_creadas]
+    if not pendientes:
+        return
+    tipo, _ = Tipo.objects.get_or_create(nombre='Solicitud de revisión', tipo='notificacion')
+
+    notificaciones = []
+    for evento in pendientes:
+        titulo, mensaje = _contenido(evento)
+        for usuario in destinatarios[evento.id]:
+            if preferencias.get(usuario.id, (True, True))[0]:
+                notificaciones.append(Notificacion(
+                    usuario=usuario, titulo=titulo, mensaje=mensaje, tipo=tipo,
+                    proyecto_id=evento.proyecto_id, bug_id=evento.bug_id,
+                ))
+
+    with transaction.atomic():
+        Notificacion.objects.bulk_create(notificaciones)
+        EventoNotificacion.objects.filter(id__in=[e.id for e in pendientes]).update(notificaciones_creadas=True)
+
+
+def _registrar_fallo(evento, error, max_intentos):
+    evento.intentos += 1
+    evento.ultimo_error = str(error)[:2000]
+    if evento.intentos >= max_intentos:
+        evento.estado_envio = EventoNotificacion.FALLIDO
+    else:
+        espera = min(BACKOFF_BASE * 2 ** (evento.intentos - 1), BACKOFF_MAXIMO)
+        evento.disponible_desde = timezone.now() + espera
+    evento.save(update_fields=['intentos', 'ultimo_error', 'estado_envio', 'disponible_desde', 'correos_enviados'])
+
+
+def procesar_eventos(tamano_lote=100, max_intentos=MAX_INTENTOS, conexion=None):
+    """
+    Procesa un lote de eventos pendientes: crea las Notificaciones con bulk_create y
+    envía los correos reutilizando una única conexión SMTP. Cada correo enviado queda
+    en correos_enviados, así un evento que falla a mitad de la lista se reprograma con
+    backoff exponencial y el reintento solo envía a los que faltan.
+    Retorna (procesados, fallidos).
+    """
+    eventos = _reservar_lote(tamano_lote)
+    if not eventos:
+        return 0, 0
+
+    destinatarios = destinatarios_revision(eventos)
+    preferencias = _preferencias({u.id for lista in destinatarios.values() for u in lista})
+    _crear_notificaciones(eventos, destinatarios, preferencias)
+
+    conexion = conexion or get_connection()
+    procesados = fallidos = 0
+    for evento in eventos:
+        titulo, mensaje = _contenido(evento)
+        pendientes = [
+            usuario for usuario in destinatarios[evento.id]
+            if usuario.correo and preferencias.get(usuario.id, (True, True))[1]
+            and usuario.id not in evento.correos_enviados
+        ]
+        try:
+            for usuario in pendientes:
+                conexion.send_messages([
+                    EmailMessage(titulo, mensaje, settings.DEFAULT_FROM_EMAIL, [usuario.correo], connection=conexion)
+                ])
+                evento.correos_enviados.append(usuario.id)
+        except Exception as exc:
+            # Se cierra para que el siguiente envío abra una conexión nueva
+            conexion.close()
+            _registrar_fallo(evento, exc, max_intentos)
+            fallidos += 1
+            continue
+
+        EventoNotificacion.objects.filter(id=evento.id).update(
+            estado_envio=EventoNotificacion.PROCESADO,
+            procesado=timezone.now(),
+            intentos=evento.intentos + 1,
+            ultimo_error='',
+            correos_enviados=evento.correos_enviados,
+        )
+        procesados += 1
+
+    return procesados, fallidos
@@ -0,0 +1,46 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from apps.notificaciones.eventos import MAX_INTENTOS, procesar_eventos
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa la bandeja de salida de notificaciones: crea las Notificaciones y envía "
+        "los correos pendientes por lotes, reutilizando una sola conexión SMTP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help="Eventos por lote")
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS, help="Intentos antes de marcar como fallido")
+        parser.add_argument('--continuo', action='store_true', help="Seguir esperando nuevos eventos")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos de espera sin eventos (modo continuo)")
+
+    def handle(self, *args, **options):
+        total_procesados = total_fallidos = 0
+        conexion = get_connection()
+        try:
+            while True:
+                procesados, fallidos = procesar_eventos(
+                    options['lote'], options['max_intentos'], conexion=conexion
+                )
+                total_procesados += procesados
+                total_fallidos += fallidos
+                if procesados or fallidos:
+                    self.stdout.write(f"Lote: {procesados} procesados, {fallidos} con error.")
+                    continue
+                if not options['continuo']:
+                    break
+                # Sin eventos: se libera la conexión SMTP hasta el próximo lote
+                conexion.close()
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            conexion.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Notificaciones procesadas: {total_procesados}, con error: {total_fallidos}."
+        ))
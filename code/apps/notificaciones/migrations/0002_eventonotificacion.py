@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0006_bug_total_comentarios'),
+        ('notificaciones', '0001_initial'),
+        ('proyectos', '0003_tarea'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoNotificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_evento', models.CharField(choices=[('solicitud_revision', 'Solicitud de revisión')], max_length=50, verbose_name='Tipo de evento')),
+                ('datos', models.JSONField(blank=True, default=dict, verbose_name='Datos')),
+                ('estado_envio', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesado', 'Procesado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado de envío')),
+                ('notificaciones_creadas', models.BooleanField(default=False, verbose_name='Notificaciones creadas')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible desde')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('procesado', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de procesamiento')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('bug', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bugtracker.bug')),
+                ('proyecto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proyectos.proyecto')),
+            ],
+            options={
+                'verbose_name': 'Evento de Notificación',
+                'verbose_name_plural': 'Eventos de Notificaciones',
+                'db_table': 'auth.evento_notificacion',
+                'indexes': [models.Index(fields=['estado_envio', 'disponible_desde'], name='evento_notif_pendiente_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_eventonotificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventonotificacion',
+            name='correos_enviados',
+            field=models.JSONField(blank=True, default=list, verbose_name='Correos enviados'),
+        ),
+    ]
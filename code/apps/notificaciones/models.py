@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from apps.autenticacion.models import Usuario
 from apps.bugtracker.models import Bug, ComentarioBug
 from apps.commons.models import Tipo,Metadatos
@@ -46,4 +47,53 @@ class ConfiguracionNotificacion(Metadatos):
     class Meta:
         db_table = "auth.configuracion_notificacion"
         verbose_name = "Configuración de Notificación"
-        verbose_name_plural = "Configuraciones de Notificaciones"
\ No newline at end of file
+        verbose_name_plural = "Configuraciones de Notificaciones"
+
+
+class EventoNotificacion(models.Model):
+    """
+    Bandeja de salida (outbox) de notificaciones. El evento se guarda en la misma
+    transacción que el cambio que lo origina y un worker (procesar_notificaciones)
+    lo convierte después en Notificaciones y correos, fuera del request.
+    """
+    SOLICITUD_REVISION = 'solicitud_revision'
+    TIPOS_EVENTO = [
+        (SOLICITUD_REVISION, 'Solicitud de revisión'),
+    ]
+
+    PENDIENTE = 'pendiente'
+    PROCESADO = 'procesado'
+    FALLIDO = 'fallido'
+    ESTADOS_ENVIO = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESADO, 'Procesado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    tipo_evento = models.CharField("Tipo de evento", max_length=50, choices=TIPOS_EVENTO)
+    actor = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    bug = models.ForeignKey(Bug, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    datos = models.JSONField("Datos", default=dict, blank=True)
+
+    estado_envio = models.CharField("Estado de envío", max_length=20, choices=ESTADOS_ENVIO, default=PENDIENTE)
+    notificaciones_creadas = models.BooleanField("Notificaciones creadas", default=False)
+    # Ids de los destinatarios cuyo correo ya se envió: un reintento no se los reenvía
+    correos_enviados = models.JSONField("Correos enviados", default=list, blank=True)
+    intentos = models.PositiveSmallIntegerField("Intentos", default=0)
+    disponible_desde = models.DateTimeField("Disponible desde", default=timezone.now)
+    ultimo_error = models.TextField("Último error", blank=True)
+    creacion = models.DateTimeField("Fecha de Creación", auto_now_add=True)
+    procesado = models.DateTimeField("Fecha de procesamiento", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_tipo_evento_display()} #{self.pk} ({self.estado_envio})"
+
+    class Meta:
+        db_table = "auth.evento_notificacion"
+        verbose_name = "Evento de Notificación"
+        verbose_name_plural = "Eventos de Notificaciones"
+        indexes = [
+            # El worker busca siempre los pendientes cuyo siguiente intento ya venció
+            models.Index(fields=['estado_envio', 'disponible_desde'], name='evento_notif_pendiente_idx'),
+        ]
@@ -1,3 +1,186 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.bugtracker.models import Bug, ComentarioBug
+from apps.commons.models import Estado, Rol
+from apps.empresas.models import Empresa_Proyecto
+from apps.proyectos.models import Proyecto
+from .eventos import destinatarios_revision, procesar_eventos, registrar_solicitud_revision
+from .models import ConfiguracionNotificacion, EventoNotificacion, Notificacion
+
+
+class DatosRevisionMixin:
+    """Proyecto con un solicitante, un asignado y dos miembros con rol de revisión"""
+
+    @classmethod
+    def setUpTestData(cls):
+        trabajador, _ = Rol.objects.get_or_create(nombre='Trabajador')
+        cls.solicitante = Usuario.objects.create(correo='solicita@example.com', nick='solicita', password='x')
+        cls.asignado = Usuario.objects.create(correo='asignado@example.com', nick='asignado', password='x')
+        cls.qa = Usuario.objects.create(correo='qa@example.com', nick='qa', password='x')
+        cls.admin = Usuario.objects.create(correo='admin@example.com', nick='admin_proyecto', password='x')
+        cls.ajeno = Usuario.objects.create(correo='ajeno@example.com', nick='ajeno', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Revisión')
+        for usuario in (cls.solicitante, cls.qa, cls.admin):
+            usuario.roles.add(trabajador)
+            Empresa_Proyecto.objects.create(proyecto=cls.proyecto, usuario=usuario)
+        # Las migraciones de datos iniciales ya pueden crear el estado de revisión
+        cls.en_revision = (
+            Estado.objects.filter(nombre__icontains='revisión').first() or Estado.objects.create(nombre='En revisión')
+        )
+        cls.bug = Bug.objects.create(
+            titulo='Falla', descripcion='-', proyecto=cls.proyecto,
+            reportado_por=cls.solicitante, asignado_a=cls.asignado,
+        )
+
+    def _correos_por_destinatario(self):
+        conteo = {}
+        for correo in mail.outbox:
+            for destinatario in correo.to:
+                conteo[destinatario] = conteo.get(destinatario, 0) + 1
+        return conteo
+
+
+class SolicitudRevisionTests(DatosRevisionMixin, TestCase):
+    """El evento se guarda en la transacción del cambio de estado"""
+
+    def setUp(self):
+        self.client.force_login(self.solicitante)
+
+    def test_evento_se_guarda_con_el_cambio_de_estado(self):
+        respuesta = self.client.post(reverse('bugtracker:solicitar_revision', args=[self.bug.id]))
+        self.assertEqual(respuesta.status_code, 302)
+
+        self.bug.refresh_from_db()
+        self.assertEqual(self.bug.estado, self.en_revision)
+        evento = EventoNotificacion.objects.get()
+        self.assertEqual(
+            (evento.tipo_evento, evento.bug_id, evento.actor_id, evento.estado_envio),
+            (EventoNotificacion.SOLICITUD_REVISION, self.bug.id, self.solicitante.id, EventoNotificacion.PENDIENTE),
+        )
+        self.assertEqual(evento.datos['titulo'], 'Falla')
+        # El envío queda para el worker, fuera del request
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Notificacion.objects.exists())
+
+    def test_si_falla_el_evento_no_cambia_el_estado(self):
+        with mock.patch(
+            'apps.bugtracker.views.registrar_solicitud_revision', side_effect=RuntimeError('sin outbox')
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('bugtracker:solicitar_revision', args=[self.bug.id]))
+
+        self.bug.refresh_from_db()
+        self.assertIsNone(self.bug.estado_id)
+        self.assertFalse(ComentarioBug.objects.filter(bug=self.bug).exists())
+
+    def test_rollback_descarta_el_evento(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                registrar_solicitud_revision(self.bug, self.solicitante)
+                raise RuntimeError('rollback')
+        self.assertFalse(EventoNotificacion.objects.exists())
+
+
+class ProcesarNotificacionesTests(DatosRevisionMixin, TestCase):
+    """Worker procesar_notificaciones: destinatarios, entrega y reintentos"""
+
+    def _registrar(self, bug=None):
+        return registrar_solicitud_revision(bug or self.bug, self.solicitante)
+
+    def _procesar(self):
+        salida = StringIO()
+        call_command('procesar_notificaciones', stdout=salida)
+        return salida.getvalue()
+
+    def test_destinatarios_sin_el_solicitante(self):
+        evento = self._registrar()
+        evento = EventoNotificacion.objects.select_related('bug').get(pk=evento.pk)
+        destinatarios = destinatarios_revision([evento])[evento.id]
+        self.assertEqual({u.id for u in destinatarios}, {self.asignado.id, self.qa.id, self.admin.id})
+
+    def test_destinatarios_con_consultas_constantes_por_lote(self):
+        otro_proyecto = Proyecto.objects.create(nombre='Otro')
+        Empresa_Proyecto.objects.create(proyecto=otro_proyecto, usuario=self.qa)
+
+        def consultas(cantidad):
+            for i in range(cantidad):
+                bug = Bug.objects.create(
+                    titulo=f'Bug {i}', descripcion='-', reportado_por=self.solicitante,
+                    proyecto=self.proyecto if i % 2 else otro_proyecto, asignado_a=self.ajeno,
+                )
+                self._registrar(bug)
+            eventos = list(EventoNotificacion.objects.select_related('bug'))
+            with CaptureQueriesContext(connection) as capturadas:
+                destinatarios_revision(eventos)
+            EventoNotificacion.objects.all().delete()
+            return len(capturadas)
+
+        self.assertEqual(consultas(1), consultas(8))
+
+    def test_comando_entrega_y_marca_procesado(self):
+        evento = self._registrar()
+        ConfiguracionNotificacion.objects.create(usuario=self.admin, recibir_correos=False)
+
+        salida = self._procesar()
+
+        self.assertIn('Notificaciones procesadas: 1', salida)
+        self.assertEqual(self._correos_por_destinatario(), {'asignado@example.com': 1, 'qa@example.com': 1})
+        self.assertEqual(
+            set(Notificacion.objects.filter(bug=self.bug).values_list('usuario_id', flat=True)),
+            {self.asignado.id, self.qa.id, self.admin.id},
+        )
+        evento.refresh_from_db()
+        self.assertEqual(evento.estado_envio, EventoNotificacion.PROCESADO)
+        self.assertIsNotNone(evento.procesado)
+        self.assertEqual(sorted(evento.correos_enviados), sorted([self.asignado.id, self.qa.id]))
+
+        # Un evento procesado no se vuelve a enviar
+        self._procesar()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_reintento_tras_fallo_parcial_no_duplica(self):
+        evento = self._registrar()
+        enviar = EmailBackend.send_messages
+        fallos = []
+
+        def fallar_una_vez(backend, mensajes):
+            if mensajes[0].to == ['qa@example.com'] and not fallos:
+                fallos.append(mensajes[0])
+                raise ConnectionError('SMTP caído')
+            return enviar(backend, mensajes)
+
+        with mock.patch.object(EmailBackend, 'send_messages', fallar_una_vez):
+            procesados, fallidos = procesar_eventos()
+            self.assertEqual((procesados, fallidos), (0, 1))
+
+            evento.refresh_from_db()
+            self.assertEqual(evento.estado_envio, EventoNotificacion.PENDIENTE)
+            self.assertEqual(evento.intentos, 1)
+            self.assertIn('SMTP caído', evento.ultimo_error)
+            self.assertGreater(evento.disponible_desde, timezone.now())
+
+            # Se adelanta el backoff para reintentar de inmediato
+            EventoNotificacion.objects.filter(pk=evento.pk).update(
+                disponible_desde=timezone.now() - timedelta(seconds=1)
+            )
+            self.assertEqual(procesar_eventos(), (1, 0))
 
-# Create your tests here.
+        self.assertEqual(
+            self._correos_por_destinatario(),
+            {'asignado@example.com': 1, 'qa@example.com': 1, 'admin@example.com': 1},
+        )
+        self.assertEqual(Notificacion.objects.filter(bug=self.bug).count(), 3)
+        evento.refresh_from_db()
+        self.assertEqual((evento.estado_envio, evento.intentos), (EventoNotificacion.PROCESADO, 2))
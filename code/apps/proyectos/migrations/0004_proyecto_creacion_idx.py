@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0004_vista_previa_archivo'),
+        ('proyectos', '0003_tarea'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['creacion', 'id'], name='proyecto_creacion_id_idx'),
+        ),
+    ]
@@ -17,6 +17,10 @@ class Proyecto(Metadatos):
         db_table = "proyectos.proyecto"
         verbose_name = "Proyecto"
         verbose_name_plural = "Proyectos"
+        indexes = [
+            # Paginación por cursor de la lista de proyectos
+            models.Index(fields=["creacion", "id"], name="proyecto_creacion_id_idx"),
+        ]
 
 class MiembroProyecto(Metadatos):
  
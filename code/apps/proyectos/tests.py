@@ -1,3 +1,121 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.commons.models import Estado
+from .models import Proyecto, Sprint
+from .views import PROYECTOS_POR_PAGINA
+
+
+class ListaProyectosTests(TestCase):
+    """
+    lista_proyectos: la página se lee por cursor con proyecto_creacion_id_idx y los
+    sprints se cuentan después, solo para los proyectos de esa página
+    """
+
+    TOTAL_PROYECTOS = 400
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='proyectos@example.com', nick='proyectos', password='x')
+        cls.activo = Estado.objects.create(nombre='Sprint activo')
+        cls.cerrado = Estado.objects.create(nombre='Sprint cerrado')
+        Proyecto.objects.bulk_create([Proyecto(nombre=f'Proyecto {i}') for i in range(cls.TOTAL_PROYECTOS)])
+        ahora = timezone.now()
+        proyectos = list(Proyecto.objects.order_by('id'))
+        for i, proyecto in enumerate(proyectos):
+            proyecto.creacion = ahora - timedelta(minutes=i)
+        Proyecto.objects.bulk_update(proyectos, ['creacion'], batch_size=500)
+        Sprint.objects.bulk_create([
+            Sprint(
+                nombre=f'Sprint {i}', fecha_inicio=date(2026, 1, 1), fecha_fin=date(2026, 1, 15),
+                proyecto=proyectos[i % len(proyectos)], estado=cls.activo if i % 3 == 0 else cls.cerrado,
+            )
+            for i in range(cls.TOTAL_PROYECTOS * 5)
+        ], batch_size=500)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE `{Proyecto._meta.db_table}`, `{Sprint._meta.db_table}`')
+            else:
+                cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def _lista(self, **parametros):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('proyectos:lista_proyectos'), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, [consulta['sql'] for consulta in consultas.captured_queries]
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+                return cursor.fetchone()[0]
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(' '.join(str(columna) for columna in fila) for fila in cursor.fetchall())
+
+    def test_conteos_de_sprints_de_la_pagina(self):
+        respuesta, _ = self._lista()
+        proyectos = respuesta.context['proyectos']
+        self.assertEqual(len(proyectos), PROYECTOS_POR_PAGINA)
+        esperados = list(Proyecto.objects.order_by('-creacion', '-id')[:PROYECTOS_POR_PAGINA])
+        self.assertEqual([p.id for p in proyectos], [p.id for p in esperados])
+        for proyecto in proyectos:
+            sprints = Sprint.objects.filter(proyecto=proyecto)
+            self.assertEqual(proyecto.total_sprints, sprints.count())
+            self.assertEqual(proyecto.sprints_activos, sprints.filter(estado=self.activo).count())
+
+    def test_proyecto_sin_sprints(self):
+        Proyecto.objects.create(nombre='Nuevo')
+        proyecto = self._lista()[0].context['proyectos'][0]
+        self.assertEqual((proyecto.nombre, proyecto.total_sprints, proyecto.sprints_activos), ('Nuevo', 0, 0))
+
+    @skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN solo se valida en sqlite y MySQL')
+    def test_pagina_sin_agrupar_ni_ordenar_en_memoria(self):
+        primera = self._lista()[0]
+        _, consultas = self._lista(cursor=primera.context['cursor_siguiente'])
+        tabla = connection.ops.quote_name(Proyecto._meta.db_table)
+        paginas = [sql for sql in consultas if f'FROM {tabla}' in sql and 'ORDER BY' in sql]
+        self.assertEqual(len(paginas), 1, consultas)
+        self.assertNotIn('GROUP BY', paginas[0])
+
+        plan = self._plan(paginas[0])
+        if connection.vendor == 'mysql':
+            self.assertNotIn('"access_type": "ALL"', plan, plan)
+            self.assertNotIn('"using_filesort": true', plan, plan)
+            self.assertNotIn('"using_temporary_table": true', plan, plan)
+        else:
+            self.assertIn('proyecto_creacion_id_idx', plan, plan)
+            self.assertNotIn('TEMP B-TREE', plan, plan)
+
+    @skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN solo se valida en sqlite y MySQL')
+    def test_conteo_de_sprints_usa_el_indice_de_proyecto(self):
+        _, consultas = self._lista()
+        tabla = connection.ops.quote_name(Sprint._meta.db_table)
+        conteos = [sql for sql in consultas if f'FROM {tabla}' in sql]
+        self.assertEqual(len(conteos), 1, consultas)
+
+        plan = self._plan(conteos[0])
+        if connection.vendor == 'mysql':
+            self.assertNotIn('"access_type": "ALL"', plan, plan)
+        else:
+            lineas = [linea for linea in plan.splitlines() if Sprint._meta.db_table in linea]
+            self.assertTrue(lineas, plan)
+            for linea in lineas:
+                self.assertIn('SEARCH', linea, plan)
 
-# Create your tests here.
+    def test_consultas_constantes(self):
+        # Página completa con varios sprints por proyecto frente a un único proyecto
+        _, muchos = self._lista()
+        Proyecto.objects.exclude(pk__in=Proyecto.objects.order_by('-creacion', '-id').values('pk')[:1]).delete()
+        respuesta, uno = self._lista()
+        self.assertEqual(len(respuesta.context['proyectos']), 1)
+        self.assertEqual(len(uno), len(muchos), uno)
@@ -4,31 +4,50 @@ from django.contrib import messages
 from django.views.decorators.cache import never_cache
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
+from django.db.models import Count, Q
 import json
 
 from apps.proyectos.models import Proyecto, ProyectoMetodologia, Sprint, Tarea
 from apps.commons.models import Estado, Metodologias, Rol, Prioridad
 from apps.empresas.models import Empresa, Empresa_Proyecto
 from apps.autenticacion.models import Usuario
+from apps.bugtracker.estadisticas import estadisticas_proyecto
+from apps.commons.paginacion import paginar_keyset, contar_estimado, CursorInvalido
+
+PROYECTOS_POR_PAGINA = 24
 
 @never_cache
 @login_required
 def lista_proyectos(request):
-    proyectos = Proyecto.objects.all().order_by('-creacion')
+    # Primero la página por cursor (-creacion, -id) con proyecto_creacion_id_idx, sin
+    # agregados que obliguen a agrupar y ordenar toda la tabla
+    proyectos = Proyecto.objects.select_related('estado')
+    try:
+        pagina = paginar_keyset(proyectos, request.GET.get('cursor'), PROYECTOS_POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(proyectos, None, PROYECTOS_POR_PAGINA)
     
-    # Contar sprints por proyecto
-    proyectos_datos = []
-    for proyecto in proyectos:
-        sprints = Sprint.objects.filter(proyecto=proyecto)
-        proyectos_datos.append({
-            'proyecto': proyecto,
-            'sprints_activos': sprints.filter(estado__nombre__icontains='activo').count(),
-            'total_sprints': sprints.count()
-        })
+    # Luego los conteos de sprints solo de los proyectos de la página, en una consulta
+    conteos = {
+        fila['proyecto_id']: fila
+        for fila in Sprint.objects.filter(proyecto_id__in=[p.id for p in pagina['objetos']])
+        .values('proyecto_id')
+        .annotate(
+            total=Count('id'),
+            activos=Count('id', filter=Q(estado__nombre__icontains='activo')),
+        )
+        .order_by()
+    }
+    for proyecto in pagina['objetos']:
+        fila = conteos.get(proyecto.id, {})
+        proyecto.total_sprints = fila.get('total', 0)
+        proyecto.sprints_activos = fila.get('activos', 0)
     
     context = {
-        'proyectos_datos': proyectos_datos,
-        'total_proyectos': proyectos.count()
+        'proyectos': pagina['objetos'],
+        'conteo': contar_estimado(Proyecto.objects.all()),
+        'cursor_siguiente': pagina['next'],
+        'cursor_anterior': pagina['prev'],
     }
     
     return render(request, 'proyectos/lista_proyectos.html', context)
@@ -131,6 +150,25 @@ def detalle_proyecto(request, id):
     estados = Estado.objects.all()  # Todos los estados
     prioridades = Prioridad.objects.all()
     
+    # Conteos de bugs desde las estadísticas materializadas
+    estadisticas = estadisticas_proyecto(proyecto.id)
+    nombres_estado = {e.id: e.nombre for e in estados}
+    nombres_prioridad = {p.id: p.nombre for p in prioridades}
+    bugs_por_dimension = {
+        dimension: sorted(
+            (
+                {'nombre': nombres.get(valor_id, 'Sin asignar'), 'total': total}
+                for valor_id, total in estadisticas[dimension].items()
+            ),
+            key=lambda fila: -fila['total'],
+        )
+        for dimension, nombres in (
+            ('estado', nombres_estado),
+            ('prioridad', nombres_prioridad),
+            ('severidad', nombres_prioridad),
+        )
+    }
+    
     # Verificar si la metodología permite sprints
     proyecto_metodologia = ProyectoMetodologia.objects.filter(proyecto=proyecto).first()
     permite_sprints = False
@@ -147,6 +185,10 @@ def detalle_proyecto(request, id):
         'total_sprints': sprints.count(),
         'total_tareas': tareas.count(),
         'permite_sprints': permite_sprints,
+        'total_bugs': estadisticas['total'],
+        'bugs_por_estado': bugs_por_dimension['estado'],
+        'bugs_por_prioridad': bugs_por_dimension['prioridad'],
+        'bugs_por_severidad': bugs_por_dimension['severidad'],
         # Para modales
         'metodologias': metodologias,
         'empresas': empresas,
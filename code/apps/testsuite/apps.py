@@ -5,3 +5,6 @@ class TestsuiteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.testsuite'
     verbose_name = 'Test Suite'
+
+    def ready(self):
+        from .signals import catalogos, resumenes, salud
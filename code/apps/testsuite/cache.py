@@ -0,0 +1,55 @@
+from django.utils.http import quote_etag
+
+from apps.commons.cache import invalidar_versiones
+from apps.commons.models import File
+from .models import EjecucionPrueba
+
+TIEMPO_FRAGMENTO = 24 * 3600
+
+
+def clave_fragmento_ejecucion(ejecucion_id, version):
+    return f"ejecucion:{ejecucion_id}:fragmento:{version}"
+
+
+def version_ejecucion(actualizacion, estado_previa=''):
+    """
+    Versión del detalle de una ejecución: su marca de actualización en microsegundos,
+    más una marca cuando la vista previa de su archivo ya está generada
+    """
+    version = str(int(actualizacion.timestamp() * 1_000_000))
+    if estado_previa == File.PREVIA_GENERADA:
+        version += '-p'
+    return version
+
+
+def version_vigente(ejecucion_id):
+    """
+    Versión de la ejecución leída de la base de datos (una fila por clave primaria),
+    o None si no existe. No se guarda en caché: así no depende de que una invalidación
+    llegue a todos los procesos, ni de cambios hechos con update() sin señales.
+    """
+    fila = (
+        EjecucionPrueba.objects.filter(pk=ejecucion_id)
+        .values('actualizacion', 'archivo__estado_previa')
+        .first()
+    )
+    if fila is None:
+        return None
+    return version_ejecucion(fila['actualizacion'], fila['archivo__estado_previa'] or '')
+
+
+def etag_ejecucion(ejecucion_id, version):
+    return quote_etag(f"ejecucion-{ejecucion_id}-{version}")
+
+
+TIEMPO_SALUD = 60 * 60
+
+
+def espacio_salud(testsuite_id):
+    """Espacio de caché versionado de las métricas de salud de un Test Suite"""
+    return f"testsuite:{testsuite_id}:salud"
+
+
+def invalidar_salud(*testsuite_ids):
+    """Incrementa la versión de las métricas una vez confirmada la transacción en curso"""
+    invalidar_versiones(*(espacio_salud(testsuite_id) for testsuite_id in testsuite_ids))
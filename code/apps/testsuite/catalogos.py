@@ -0,0 +1,12 @@
+from apps.commons.catalogos import obtener_catalogo
+from apps.commons.models import Estado
+from .models import TestSuite
+
+
+def catalogo_testsuites():
+    return obtener_catalogo('testsuites', lambda: TestSuite.objects.only('id', 'nombre').order_by('nombre'))
+
+
+def catalogo_estados():
+    # Mismo catálogo que usa bugtracker; se invalida al cambiar un Estado
+    return obtener_catalogo('estados', lambda: Estado.objects.all())
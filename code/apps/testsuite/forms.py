@@ -1,6 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 import re
+from apps.commons.widgets import SelectAutocompletar
 from .models import TestSuite, CasoPrueba, EjecucionPrueba, Entorno
 
 
@@ -131,20 +133,28 @@ class EjecucionPruebaForm(forms.ModelForm):
         widget=forms.FileInput(attrs={
             'class': 'form-control',
             'accept': 'image/*,.pdf,.doc,.docx,.txt',  # Restricted to images, PDFs and text documents
-            'id': 'id_archivo_upload'
+            'id': 'id_archivo_upload',
+            'data-subida': reverse_lazy('commons:crear_subida'),
         }),
         label='Subir Archivo (Imágenes, PDF o Documentos)',
         help_text='Solo se permiten imágenes (JPG, PNG, GIF), PDF o documentos de texto'
     )
+    # Id de una subida por bloques completada (apps.commons.subidas), alternativa a 'archivo_upload'
+    subida = forms.UUIDField(required=False, widget=forms.HiddenInput())
     
     class Meta:
         model = EjecucionPrueba
         fields = ['caso_prueba', 'estado', 'resultado', 'observaciones']
         widgets = {
-            'caso_prueba': forms.Select(attrs={
-                'class': 'form-select',
-                'required': True
-            }),
+            # Solo se renderiza el caso elegido; el resto se busca por nombre
+            'caso_prueba': SelectAutocompletar(
+                url=reverse_lazy('testsuite:autocompletar_casos'),
+                attrs={
+                    'class': 'form-select',
+                    'required': True,
+                    'data-placeholder': 'Buscar caso por nombre',
+                }
+            ),
             'estado': forms.Select(attrs={
                 'class': 'form-select'
             }),
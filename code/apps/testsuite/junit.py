@@ -0,0 +1,159 @@
+from collections import Counter
+from xml.etree.ElementTree import iterparse
+
+from django.db import transaction
+
+from apps.commons.models import Estado
+from .cache import invalidar_salud
+from .models import CasoPrueba, EjecucionPrueba
+from .resumenes import clave_ejecucion, sumar_ejecuciones
+
+# Resultado de JUnit -> (texto de EjecucionPrueba.resultado, nombre del Estado)
+RESULTADOS_JUNIT = {
+    'exitoso': ('Exitoso', 'Ejecutado(Correcto)'),
+    'fallido': ('Fallido', 'Ejecutado(Falló)'),
+    'error': ('Error', 'Ejecutado(Falló)'),
+    'omitido': ('Omitido', 'No aplica'),
+}
+
+LONGITUD_NOMBRE = CasoPrueba._meta.get_field('nombre').max_length
+LONGITUD_OBSERVACIONES = 4000
+
+
+class ReporteJUnitInvalido(ValueError):
+    """El archivo no es un reporte JUnit/xUnit legible"""
+
+
+def _etiqueta(elemento):
+    # Ignora espacios de nombres: {ns}testcase -> testcase
+    return elemento.tag.rsplit('}', 1)[-1]
+
+
+def leer_casos(origen):
+    """
+    Recorre un reporte JUnit/xUnit con iterparse y genera un dict por <testcase>
+    (nombre, resultado, duracion, mensaje). Cada testcase se descarta del árbol al
+    procesarlo, así la memoria no crece con el tamaño del reporte.
+    """
+    pila = []
+    suites = []
+    try:
+        for evento, elemento in iterparse(origen, events=('start', 'end')):
+            etiqueta = _etiqueta(elemento)
+            if evento == 'start':
+                pila.append(elemento)
+                if etiqueta == 'testsuite':
+                    suites.append(elemento.get('name', ''))
+                continue
+
+            pila.pop()
+            if etiqueta == 'testsuite':
+                suites.pop()
+                if pila:
+                    pila[-1].remove(elemento)
+                continue
+            if etiqueta != 'testcase':
+                continue
+
+            clase = elemento.get('classname') or (suites[-1] if suites else '')
+            nombre = elemento.get('name', '')
+            resultado, mensaje = 'exitoso', ''
+            for hijo in elemento:
+                tipo = _etiqueta(hijo)
+                if tipo in ('failure', 'error', 'skipped'):
+                    resultado = {'failure': 'fallido', 'error': 'error', 'skipped': 'omitido'}[tipo]
+                    mensaje = hijo.get('message') or (hijo.text or '').strip()
+                    break
+            try:
+                duracion = float(elemento.get('time') or 0)
+            except ValueError:
+                duracion = 0.0
+
+            yield {
+                'nombre': (f"{clase}.{nombre}" if clase else nombre)[:LONGITUD_NOMBRE],
+                'resultado': resultado,
+                'duracion': duracion,
+                'mensaje': mensaje,
+            }
+
+            elemento.clear()
+            if pila:
+                pila[-1].remove(elemento)
+    except SyntaxError as exc:
+        # ParseError hereda de SyntaxError
+        raise ReporteJUnitInvalido(str(exc)) from exc
+
+
+def _observaciones(caso):
+    texto = f"Duración: {caso['duracion']:.3f} s"
+    if caso['mensaje']:
+        texto += f"\n{caso['mensaje']}"
+    return texto[:LONGITUD_OBSERVACIONES]
+
+
+def importar_junit(origen, test_suite, usuario=None, entorno=None, version='', tamano_lote=1000):
+    """
+    Importa un reporte JUnit en 'test_suite': crea en bloque los CasoPrueba que no
+    existen (por nombre) y una EjecucionPrueba por testcase con bulk_create, en una
+    transacción por lote. Retorna un Counter con 'casos_creados', 'ejecuciones' y
+    la cantidad por resultado.
+    """
+    estados = dict(
+        Estado.objects.filter(nombre__in={estado for _, estado in RESULTADOS_JUNIT.values()})
+        .values_list('nombre', 'id')
+    )
+    casos = dict(CasoPrueba.objects.filter(test_suite=test_suite).values_list('nombre', 'id'))
+    resumen = Counter()
+
+    def guardar(lote):
+        nuevos = list(dict.fromkeys(caso['nombre'] for caso in lote if caso['nombre'] not in casos))
+        with transaction.atomic():
+            if nuevos:
+                CasoPrueba.objects.bulk_create([
+                    CasoPrueba(
+                        nombre=nombre,
+                        descripcion='Importado desde reporte JUnit',
+                        test_suite=test_suite,
+                        entorno=entorno,
+                        version=version,
+                    )
+                    for nombre in nuevos
+                ])
+                # Se releen los ids: no todos los motores los devuelven en bulk_create
+                casos.update(
+                    CasoPrueba.objects.filter(test_suite=test_suite, nombre__in=nuevos)
+                    .values_list('nombre', 'id')
+                )
+                resumen['casos_creados'] += len(nuevos)
+
+            ejecuciones = EjecucionPrueba.objects.bulk_create([
+                EjecucionPrueba(
+                    caso_prueba_id=casos[caso['nombre']],
+                    test_suite=test_suite,
+                    ejecutado_por=usuario,
+                    estado_id=estados.get(RESULTADOS_JUNIT[caso['resultado']][1]),
+                    resultado=RESULTADOS_JUNIT[caso['resultado']][0],
+                    observaciones=_observaciones(caso),
+                )
+                for caso in lote
+            ])
+            # bulk_create no dispara señales: se suman los resúmenes diarios y se
+            # invalidan las métricas al confirmar el lote
+            sumar_ejecuciones(
+                clave_ejecucion(test_suite.pk, ejecucion.creacion, ejecucion.estado_id)
+                for ejecucion in ejecuciones
+            )
+            invalidar_salud(test_suite.pk)
+        resumen['ejecuciones'] += len(lote)
+
+    lote = []
+    for caso in leer_casos(origen):
+        resumen[caso['resultado']] += 1
+        lote.append(caso)
+        if len(lote) >= tamano_lote:
+            guardar(lote)
+            lote = []
+    if lote:
+        guardar(lote)
+
+    return resumen
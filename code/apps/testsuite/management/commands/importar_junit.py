@@ -0,0 +1,62 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.testsuite.junit import ReporteJUnitInvalido, importar_junit
+from apps.testsuite.models import Entorno, TestSuite
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa uno o más reportes JUnit/xUnit XML en un Test Suite, creando los casos "
+        "que falten y las ejecuciones en bloque."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help="Reportes JUnit XML")
+        parser.add_argument('--testsuite', type=int, required=True, help="Id del Test Suite destino")
+        parser.add_argument('--usuario', help="Correo del usuario que figura como ejecutor")
+        parser.add_argument('--entorno', type=int, help="Id del entorno para los casos nuevos")
+        parser.add_argument('--version-casos', dest='version_casos', default='', help="Versión para los casos nuevos")
+        parser.add_argument('--lote', type=int, default=1000, help="Testcases por lote/transacción")
+
+    def handle(self, *args, **options):
+        try:
+            test_suite = TestSuite.objects.get(pk=options['testsuite'])
+        except TestSuite.DoesNotExist:
+            raise CommandError(f"No existe el Test Suite {options['testsuite']}")
+
+        usuario = None
+        if options['usuario']:
+            usuario = User.objects.filter(correo=options['usuario'].lower()).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        entorno = None
+        if options['entorno']:
+            entorno = Entorno.objects.filter(pk=options['entorno']).first()
+            if entorno is None:
+                raise CommandError(f"No existe el entorno {options['entorno']}")
+
+        for archivo in options['archivos']:
+            inicio = time.monotonic()
+            try:
+                with open(archivo, 'rb') as origen:
+                    resumen = importar_junit(
+                        origen, test_suite, usuario=usuario, entorno=entorno,
+                        version=options['version_casos'], tamano_lote=options['lote'],
+                    )
+            except OSError as exc:
+                raise CommandError(f"No se pudo leer {archivo}: {exc}")
+            except ReporteJUnitInvalido as exc:
+                raise CommandError(f"{archivo} no es un reporte JUnit válido: {exc}")
+
+            transcurrido = max(time.monotonic() - inicio, 1e-6)
+            self.stdout.write(self.style.SUCCESS(
+                f"{archivo}: {resumen['ejecuciones']} ejecuciones ({resumen['exitoso']} exitosas, "
+                f"{resumen['fallido']} fallidas, {resumen['error']} con error, {resumen['omitido']} omitidas), "
+                f"{resumen['casos_creados']} casos nuevos, {resumen['ejecuciones'] / transcurrido:.0f} casos/s."
+            ))
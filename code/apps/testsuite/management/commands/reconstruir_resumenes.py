@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.testsuite.resumenes import (
+    acumular_rango, avanzar_reconstruccion, iniciar_reconstruccion, terminar_reconstruccion,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los resúmenes diarios de ejecuciones recorriendo el historial "
+        "por rangos de id, con memoria acotada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--testsuite', type=int, help="Reconstruir solo este Test Suite")
+        parser.add_argument('--lote', type=int, default=50000, help="Ids de ejecución por rango")
+
+    def handle(self, *args, **options):
+        test_suite_id = options.get('testsuite')
+        tamano = max(options['lote'], 1)
+        inicio = time.monotonic()
+
+        limite = iniciar_reconstruccion(test_suite_id)
+        if limite is None:
+            raise CommandError("Ya hay una reconstrucción de resúmenes en curso.")
+        desde = contadas = 0
+        try:
+            while desde < limite:
+                hasta = min(desde + tamano, limite)
+                contadas += acumular_rango(desde, hasta, test_suite_id)
+                desde = hasta
+                avanzar_reconstruccion(test_suite_id, desde, limite)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"  ids hasta {hasta}/{limite}: {contadas} ejecuciones")
+        finally:
+            terminar_reconstruccion()
+
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes reconstruidos: {contadas} ejecuciones en {transcurrido:.1f} s "
+            f"({contadas / transcurrido:.0f} ejecuciones/s)."
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0001_initial'),
+        ('testsuite', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ejecucionprueba',
+            index=models.Index(fields=['caso_prueba', 'creacion', 'id'], name='ejecucion_caso_creacion_idx'),
+        ),
+    ]
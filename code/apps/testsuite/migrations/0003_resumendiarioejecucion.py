@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testsuite', '0002_ejecucion_caso_creacion_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioEjecucion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado_id', models.PositiveBigIntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('test_suite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='testsuite.testsuite')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario Ejecución',
+                'verbose_name_plural': 'Resúmenes Diarios Ejecuciones',
+                'db_table': 'testsuite.resumen_diario_ejecucion',
+                'constraints': [models.UniqueConstraint(fields=('test_suite', 'fecha', 'estado_id'), name='resumen_diario_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0001_initial'),
+        ('testsuite', '0003_resumendiarioejecucion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='casoprueba',
+            index=models.Index(fields=['creacion', 'id'], name='caso_creacion_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casoprueba',
+            index=models.Index(fields=['test_suite', 'creacion', 'id'], name='caso_suite_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casoprueba',
+            index=models.Index(fields=['estado', 'creacion', 'id'], name='caso_estado_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casoprueba',
+            index=models.Index(fields=['nombre'], name='caso_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ejecucionprueba',
+            index=models.Index(fields=['creacion', 'id'], name='ejecucion_creacion_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ejecucionprueba',
+            index=models.Index(fields=['estado', 'creacion', 'id'], name='ejecucion_estado_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ejecucionprueba',
+            index=models.Index(fields=['ejecutado_por', 'creacion', 'id'], name='ejecucion_usuario_creacion_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_suite_del_caso(apps, schema_editor):
+    EjecucionPrueba = apps.get_model('testsuite', 'EjecucionPrueba')
+    CasoPrueba = apps.get_model('testsuite', 'CasoPrueba')
+    suite = CasoPrueba.objects.filter(pk=OuterRef('caso_prueba_id')).values('test_suite_id')[:1]
+    EjecucionPrueba.objects.filter(caso_prueba__isnull=False).update(test_suite_id=Subquery(suite))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0005_tabla_cache'),
+        ('testsuite', '0004_indices_listas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ejecucionprueba',
+            name='test_suite',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='testsuite.testsuite'),
+        ),
+        migrations.RunPython(copiar_suite_del_caso, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ejecucionprueba',
+            index=models.Index(fields=['test_suite', 'creacion', 'id'], name='ejecucion_suite_creacion_idx'),
+        ),
+    ]
@@ -48,6 +48,12 @@ class CasoPrueba(Metadatos):
         db_table = "testsuite.casoprueba"
         verbose_name = "Caso Prueba"
         verbose_name_plural = "Casos Pruebas"
+        indexes = [
+            models.Index(fields=["creacion", "id"], name="caso_creacion_id_idx"),
+            models.Index(fields=["test_suite", "creacion", "id"], name="caso_suite_creacion_idx"),
+            models.Index(fields=["estado", "creacion", "id"], name="caso_estado_creacion_idx"),
+            models.Index(fields=["nombre"], name="caso_nombre_idx"),
+        ]
 
 
 class EjecucionPrueba(Metadatos):
@@ -61,11 +67,62 @@ class EjecucionPrueba(Metadatos):
         'commons.File', on_delete=models.SET_NULL, null=True, blank=True
     )
     resultado = models.CharField(max_length=100)
+    # Copia de caso_prueba.test_suite: la lista filtrada por suite se lee y ordena con
+    # ejecucion_suite_creacion_idx sin pasar por los casos. Se asigna al guardar (y en
+    # la importación JUnit) y resumenes.trasladar_caso la actualiza al mover el caso.
+    test_suite = models.ForeignKey(
+        TestSuite, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+"
+    )
 
     def __str__(self):
         return f"Ejecución de {self.caso_prueba.nombre if self.caso_prueba else 'N/A'} - {self.resultado}"
 
+    def _suite_del_caso(self):
+        if self.caso_prueba_id is None:
+            return None
+        campo = self._meta.get_field('caso_prueba')
+        if campo.is_cached(self) and self.caso_prueba is not None:
+            return self.caso_prueba.test_suite_id
+        return CasoPrueba.objects.filter(pk=self.caso_prueba_id).values_list('test_suite_id', flat=True).first()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'caso_prueba', 'caso_prueba_id'} & set(update_fields):
+            self.test_suite_id = self._suite_del_caso()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'test_suite'}
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = "testsuite.ejecucionprueba"
         verbose_name = "Ejecución Prueba"
         verbose_name_plural = "Ejecuciones Pruebas"
+        indexes = [
+            models.Index(fields=["caso_prueba", "creacion", "id"], name="ejecucion_caso_creacion_idx"),
+            models.Index(fields=["test_suite", "creacion", "id"], name="ejecucion_suite_creacion_idx"),
+            models.Index(fields=["creacion", "id"], name="ejecucion_creacion_id_idx"),
+            models.Index(fields=["estado", "creacion", "id"], name="ejecucion_estado_creacion_idx"),
+            models.Index(fields=["ejecutado_por", "creacion", "id"], name="ejecucion_usuario_creacion_idx"),
+        ]
+
+
+class ResumenDiarioEjecucion(models.Model):
+    """Conteo materializado de ejecuciones por Test Suite, día y estado (para las tendencias)"""
+    test_suite = models.ForeignKey(TestSuite, on_delete=models.CASCADE, related_name="resumenes_diarios")
+    fecha = models.DateField()
+    # Id del Estado de la ejecución; 0 para las ejecuciones sin estado
+    estado_id = models.PositiveBigIntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.test_suite_id} {self.fecha} estado={self.estado_id}: {self.total}"
+
+    class Meta:
+        db_table = "testsuite.resumen_diario_ejecucion"
+        verbose_name = "Resumen Diario Ejecución"
+        verbose_name_plural = "Resúmenes Diarios Ejecuciones"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["test_suite", "fecha", "estado_id"], name="resumen_diario_unico"
+            ),
+        ]
@@ -0,0 +1,211 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import EjecucionPrueba, ResumenDiarioEjecucion
+from .salud import ids_estados_resultado
+
+DIAS_TENDENCIA = 14
+
+# Reconstrucción en curso, en la caché compartida para que la vean las señales de
+# todos los procesos. Se renueva en cada rango; si el comando muere, expira sola.
+CLAVE_RECONSTRUCCION = 'testsuite:resumenes:reconstruccion'
+TIEMPO_RECONSTRUCCION = 60 * 60
+
+
+def clave_ejecucion(test_suite_id, creacion, estado_id):
+    """
+    Fila de ResumenDiarioEjecucion (test_suite_id, fecha, estado_id) a la que aporta
+    una ejecución. Las ejecuciones sin Test Suite no se cuentan.
+    """
+    if not test_suite_id:
+        return None
+    return (test_suite_id, timezone.localdate(creacion), estado_id or 0)
+
+
+def _sumar(test_suite_id, fecha, estado_id, delta):
+    # Los totales nunca quedan negativos, aunque llegue un descuento de una fila que
+    # se reconstruyó después de contar la ejecución
+    filtro = {'test_suite_id': test_suite_id, 'fecha': fecha, 'estado_id': estado_id}
+    total = Greatest(F('total') + delta, 0)
+    if ResumenDiarioEjecucion.objects.filter(**filtro).update(total=total):
+        return
+    try:
+        with transaction.atomic():
+            ResumenDiarioEjecucion.objects.create(total=max(delta, 0), **filtro)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el update y el create
+        ResumenDiarioEjecucion.objects.filter(**filtro).update(total=total)
+
+
+def aplicar_deltas(deltas):
+    """Suma a cada fila (test_suite_id, fecha, estado_id) su delta, en orden para evitar bloqueos cruzados"""
+    with transaction.atomic():
+        for (test_suite_id, fecha, estado_id), delta in sorted(deltas.items()):
+            if delta:
+                _sumar(test_suite_id, fecha, estado_id, delta)
+
+
+def aplicar_cambios(pares):
+    """
+    Ajusta los resúmenes para varias ejecuciones a la vez. Cada par es
+    (clave_anterior, clave_nueva), con None para una ejecución creada o eliminada.
+    """
+    deltas = defaultdict(int)
+    for anterior, nueva in pares:
+        if anterior:
+            deltas[anterior] -= 1
+        if nueva:
+            deltas[nueva] += 1
+    aplicar_deltas(deltas)
+
+
+def sumar_ejecuciones(claves):
+    """Suma ejecuciones nuevas insertadas en bloque (bulk_create no dispara señales)"""
+    aplicar_cambios((None, clave) for clave in claves)
+
+
+def _conteos_por_dia(ejecuciones):
+    return (
+        ejecuciones.annotate(fecha=TruncDate('creacion'))
+        .values('fecha', 'estado_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+
+
+def reconstruccion_en_curso():
+    """{'test_suite_id', 'desde', 'limite'} de la reconstrucción en curso, o None"""
+    return cache.get(CLAVE_RECONSTRUCCION)
+
+
+def _reconstruye(reconstruccion, test_suite_id):
+    return bool(reconstruccion) and reconstruccion['test_suite_id'] in (None, test_suite_id)
+
+
+def clave_aplicable(clave, ejecucion_id, reconstruccion):
+    """
+    La clave de resumen de una ejecución, o None si la reconstrucción en curso todavía
+    no llega a esa ejecución en ese Test Suite: al llegar cuenta su estado final, así
+    que aplicar el cambio ahora lo contaría dos veces (o descontaría una fila vacía).
+    """
+    if clave and _reconstruye(reconstruccion, clave[0]):
+        if reconstruccion['desde'] < ejecucion_id <= reconstruccion['limite']:
+            return None
+    return clave
+
+
+def trasladar_caso(caso_id, suite_anterior, suite_nueva):
+    """
+    Mueve las ejecuciones de un caso que cambió de Test Suite (o se eliminó): su copia
+    de test_suite y sus conteos en los resúmenes diarios
+    """
+    reconstruccion = reconstruccion_en_curso()
+    filas = _conteos_por_dia(EjecucionPrueba.objects.filter(caso_prueba_id=caso_id))
+    if reconstruccion:
+        filas = filas.annotate(pendientes=Count('id', filter=Q(
+            id__gt=reconstruccion['desde'], id__lte=reconstruccion['limite']
+        )))
+
+    deltas = defaultdict(int)
+    for fila in filas:
+        for test_suite_id, signo in ((suite_anterior, -1), (suite_nueva, 1)):
+            if not test_suite_id:
+                continue
+            # Las ejecuciones que la reconstrucción todavía no recorrió las cuenta ella
+            n = fila['n'] - (fila['pendientes'] if _reconstruye(reconstruccion, test_suite_id) else 0)
+            deltas[(test_suite_id, fila['fecha'], fila['estado_id'] or 0)] += signo * n
+    aplicar_deltas(deltas)
+    EjecucionPrueba.objects.filter(caso_prueba_id=caso_id).update(test_suite_id=suite_nueva)
+
+
+def _ejecuciones_con_suite(test_suite_id=None):
+    ejecuciones = EjecucionPrueba.objects.filter(caso_prueba__test_suite__isnull=False)
+    if test_suite_id:
+        ejecuciones = ejecuciones.filter(caso_prueba__test_suite_id=test_suite_id)
+    return ejecuciones
+
+
+def iniciar_reconstruccion(test_suite_id=None):
+    """
+    Borra los resúmenes (de un Test Suite o de todos) y retorna el id máximo de
+    ejecución a recorrer, o None si ya hay una reconstrucción en curso. Las
+    ejecuciones posteriores ya las suman las señales; los cambios en las anteriores
+    que aún no se recorrieron las señales los omiten (ver clave_aplicable).
+    """
+    limite = EjecucionPrueba.objects.aggregate(limite=Max('id'))['limite'] or 0
+    estado = {'test_suite_id': test_suite_id, 'desde': 0, 'limite': limite}
+    if not cache.add(CLAVE_RECONSTRUCCION, estado, TIEMPO_RECONSTRUCCION):
+        return None
+
+    resumenes = ResumenDiarioEjecucion.objects.all()
+    if test_suite_id:
+        resumenes = resumenes.filter(test_suite_id=test_suite_id)
+    resumenes.delete()
+    return limite
+
+
+def avanzar_reconstruccion(test_suite_id, desde, limite):
+    """Registra que las ejecuciones hasta 'desde' ya están contadas"""
+    estado = {'test_suite_id': test_suite_id, 'desde': desde, 'limite': limite}
+    cache.set(CLAVE_RECONSTRUCCION, estado, TIEMPO_RECONSTRUCCION)
+
+
+def terminar_reconstruccion():
+    cache.delete(CLAVE_RECONSTRUCCION)
+
+
+def acumular_rango(desde, hasta, test_suite_id=None):
+    """
+    Suma a los resúmenes las ejecuciones con id en (desde, hasta]. La agregación se
+    hace en la base de datos, así que la memoria depende de las filas del resumen
+    del rango y no de la cantidad de ejecuciones. Retorna las ejecuciones contadas.
+    """
+    filas = (
+        _ejecuciones_con_suite(test_suite_id)
+        .filter(id__gt=desde, id__lte=hasta)
+        .annotate(fecha=TruncDate('creacion'))
+        .values('caso_prueba__test_suite_id', 'fecha', 'estado_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    deltas = {
+        (fila['caso_prueba__test_suite_id'], fila['fecha'], fila['estado_id'] or 0): fila['n']
+        for fila in filas
+    }
+    aplicar_deltas(deltas)
+    return sum(deltas.values())
+
+
+def tendencia_diaria(testsuite_id, dias=DIAS_TENDENCIA):
+    """
+    Ejecuciones por día de los últimos 'dias' días, leídas de los resúmenes:
+    una lista de {'fecha', 'exitosas', 'fallidas', 'otras', 'total'} (incluye días sin ejecuciones).
+    """
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    ids_exito, ids_fallo = ids_estados_resultado()
+
+    por_dia = {
+        desde + timedelta(days=i): {'exitosas': 0, 'fallidas': 0, 'otras': 0, 'total': 0}
+        for i in range(dias)
+    }
+    filas = ResumenDiarioEjecucion.objects.filter(
+        test_suite_id=testsuite_id, fecha__gte=desde, fecha__lte=hoy, total__gt=0
+    )
+    for fecha, estado_id, total in filas.values_list('fecha', 'estado_id', 'total'):
+        dia = por_dia[fecha]
+        if estado_id in ids_exito:
+            dia['exitosas'] += total
+        elif estado_id in ids_fallo:
+            dia['fallidas'] += total
+        else:
+            dia['otras'] += total
+        dia['total'] += total
+
+    return [{'fecha': fecha, **conteos} for fecha, conteos in sorted(por_dia.items())]
@@ -0,0 +1,133 @@
+from django.db import connection
+from django.db.models import Case, Count, F, IntegerField, Max, Min, Q, Value, When, Window
+from django.db.models.functions import Lag
+
+from apps.commons.cache import obtener_versionado
+from apps.commons.models import Estado
+from .cache import TIEMPO_SALUD, espacio_salud
+from .models import CasoPrueba, EjecucionPrueba
+
+# Solo las ejecuciones con resultado definitivo cuentan para las métricas
+ESTADOS_EXITO = ('Ejecutado(Correcto)', 'Ejecutado(Con advertencias)')
+ESTADOS_FALLO = ('Ejecutado(Falló)',)
+
+# Un caso es inestable si alterna entre éxito y fallo en al menos el 20% de sus
+# ejecuciones consecutivas (con un mínimo de ejecuciones para no marcar ruido)
+UMBRAL_INESTABLE = 0.2
+MIN_EJECUCIONES_INESTABLE = 4
+MAX_INESTABLES = 10
+
+
+def ids_estados_resultado():
+    """Ids de los Estados que cuentan como éxito y como fallo"""
+    ids = dict(Estado.objects.filter(nombre__in=ESTADOS_EXITO + ESTADOS_FALLO).values_list('nombre', 'id'))
+    exito = [ids[nombre] for nombre in ESTADOS_EXITO if nombre in ids]
+    fallo = [ids[nombre] for nombre in ESTADOS_FALLO if nombre in ids]
+    return exito, fallo
+
+
+def _transiciones(ejecuciones, ids_exito):
+    """
+    Cantidad de cambios éxito <-> fallo entre ejecuciones consecutivas de cada caso.
+
+    El ORM arma la consulta con LAG() particionado por caso y la base de datos agrega
+    el resultado con GROUP BY; el ORM no permite agregar sobre una ventana directamente.
+    """
+    exito = Case(When(estado_id__in=ids_exito, then=Value(1)), default=Value(0), output_field=IntegerField())
+    secuencia = ejecuciones.annotate(
+        exito=exito,
+        previo=Window(
+            Lag(exito),
+            partition_by=[F('caso_prueba_id')],
+            order_by=[F('creacion').asc(), F('id').asc()],
+        ),
+    ).values('caso_prueba_id', 'exito', 'previo').order_by()
+    sql, params = secuencia.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT caso_prueba_id, "
+            "SUM(CASE WHEN previo IS NOT NULL AND previo <> exito THEN 1 ELSE 0 END) "
+            f"FROM ({sql}) secuencia GROUP BY caso_prueba_id",
+            params,
+        )
+        return dict(cursor.fetchall())
+
+
+def _horas(intervalo):
+    return round(intervalo.total_seconds() / 3600, 2)
+
+
+def calcular_salud(testsuite_id):
+    """
+    Métricas de salud del Test Suite y de cada caso: tasa de éxito, tiempo medio entre
+    fallos (horas de ejecución observadas / fallos) e índice de inestabilidad
+    (transiciones éxito <-> fallo / pares de ejecuciones consecutivas).
+
+    Todo se agrega en la base de datos con dos consultas por conjunto, sin importar
+    la cantidad de casos o ejecuciones.
+    """
+    ids_exito, ids_fallo = ids_estados_resultado()
+    ejecuciones = EjecucionPrueba.objects.filter(
+        caso_prueba__test_suite_id=testsuite_id, estado_id__in=ids_exito + ids_fallo
+    )
+
+    por_caso = (
+        ejecuciones.values('caso_prueba_id')
+        .annotate(
+            total=Count('id'),
+            exitosas=Count('id', filter=Q(estado_id__in=ids_exito)),
+            primera=Min('creacion'),
+            ultima=Max('creacion'),
+        )
+        .order_by()
+    )
+    transiciones = _transiciones(ejecuciones, ids_exito)
+
+    casos = {}
+    suite = {
+        'total_casos': CasoPrueba.objects.filter(test_suite_id=testsuite_id).count(),
+        'casos_ejecutados': 0, 'ejecuciones': 0, 'exitosas': 0, 'fallidas': 0,
+        'transiciones': 0, 'pares': 0, 'casos_inestables': 0,
+        'primera': None, 'ultima': None,
+    }
+    for fila in por_caso:
+        total, exitosas = fila['total'], fila['exitosas']
+        fallidas = total - exitosas
+        cambios = transiciones.get(fila['caso_prueba_id'], 0)
+        indice = cambios / (total - 1) if total > 1 else 0.0
+        inestable = total >= MIN_EJECUCIONES_INESTABLE and indice >= UMBRAL_INESTABLE
+        casos[fila['caso_prueba_id']] = {
+            'ejecuciones': total,
+            'tasa_exito': round(100 * exitosas / total, 1),
+            'mtbf_horas': _horas((fila['ultima'] - fila['primera']) / fallidas) if fallidas else None,
+            'indice_inestabilidad': round(indice, 3),
+            'inestable': inestable,
+        }
+
+        suite['casos_ejecutados'] += 1
+        suite['ejecuciones'] += total
+        suite['exitosas'] += exitosas
+        suite['fallidas'] += fallidas
+        suite['transiciones'] += cambios
+        suite['pares'] += total - 1
+        suite['casos_inestables'] += inestable
+        suite['primera'] = min(suite['primera'] or fila['primera'], fila['primera'])
+        suite['ultima'] = max(suite['ultima'] or fila['ultima'], fila['ultima'])
+
+    suite['tasa_exito'] = round(100 * suite['exitosas'] / suite['ejecuciones'], 1) if suite['ejecuciones'] else None
+    suite['mtbf_horas'] = (
+        _horas((suite['ultima'] - suite['primera']) / suite['fallidas']) if suite['fallidas'] else None
+    )
+    suite['indice_inestabilidad'] = round(suite['transiciones'] / suite['pares'], 3) if suite['pares'] else 0.0
+    suite['mas_inestables'] = sorted(
+        (caso_id for caso_id, metricas in casos.items() if metricas['inestable']),
+        key=lambda caso_id: -casos[caso_id]['indice_inestabilidad'],
+    )[:MAX_INESTABLES]
+
+    return {'suite': suite, 'casos': casos}
+
+
+def salud_testsuite(testsuite_id):
+    """Métricas de salud desde la caché; se recalculan cuando llegan nuevas ejecuciones"""
+    return obtener_versionado(espacio_salud(testsuite_id), lambda: calcular_salud(testsuite_id), TIEMPO_SALUD)
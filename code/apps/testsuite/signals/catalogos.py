@@ -0,0 +1,11 @@
+# apps/testsuite/signals/catalogos.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.commons.catalogos import invalidar_catalogos
+from ..models import TestSuite
+
+
+@receiver([post_save, post_delete], sender=TestSuite)
+def invalidar_catalogo_testsuites(sender, **kwargs):
+    invalidar_catalogos('testsuites')
@@ -0,0 +1,104 @@
+# apps/testsuite/signals/resumenes.py
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from ..models import CasoPrueba, EjecucionPrueba
+from ..resumenes import (
+    aplicar_cambios, clave_aplicable, clave_ejecucion, reconstruccion_en_curso, trasladar_caso,
+)
+
+CAMPOS_RESUMEN = ('caso_prueba_id', 'estado_id')
+
+
+def _valores(instance, campos):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    if all(campo in instance.__dict__ for campo in campos):
+        return {campo: instance.__dict__[campo] for campo in campos}
+    return None
+
+
+def _suites(*caso_ids):
+    caso_ids = set(caso_ids) - {None}
+    if not caso_ids:
+        return {}
+    return dict(CasoPrueba.objects.filter(pk__in=caso_ids).values_list('id', 'test_suite_id'))
+
+
+@receiver(post_init, sender=EjecucionPrueba)
+def recordar_valores_ejecucion(sender, instance, **kwargs):
+    instance._resumen_original = _valores(instance, CAMPOS_RESUMEN)
+
+
+@receiver(pre_save, sender=EjecucionPrueba)
+def completar_valores_ejecucion(sender, instance, raw=False, **kwargs):
+    """Si la ejecución se cargó con campos diferidos, consulta los valores previos antes de guardar"""
+    if raw or not instance.pk or instance._state.adding:
+        return
+    if getattr(instance, '_resumen_original', None) is None:
+        instance._resumen_original = (
+            EjecucionPrueba.objects.filter(pk=instance.pk).values(*CAMPOS_RESUMEN).first()
+        )
+
+
+@receiver(post_save, sender=EjecucionPrueba)
+def actualizar_resumen_ejecucion(sender, instance, created, raw=False, **kwargs):
+    """Suma la ejecución al resumen de su día, o la mueve si cambió de estado o de caso"""
+    if raw:
+        return
+    nuevos = {campo: getattr(instance, campo) for campo in CAMPOS_RESUMEN}
+    anteriores = None if created else instance._resumen_original
+    if anteriores == nuevos:
+        return
+
+    suites = _suites(nuevos['caso_prueba_id'], anteriores and anteriores['caso_prueba_id'])
+    clave_anterior = None
+    if anteriores:
+        clave_anterior = clave_ejecucion(
+            suites.get(anteriores['caso_prueba_id']), instance.creacion, anteriores['estado_id']
+        )
+    clave_nueva = clave_ejecucion(suites.get(nuevos['caso_prueba_id']), instance.creacion, nuevos['estado_id'])
+    reconstruccion = reconstruccion_en_curso()
+    aplicar_cambios([(
+        clave_aplicable(clave_anterior, instance.pk, reconstruccion),
+        clave_aplicable(clave_nueva, instance.pk, reconstruccion),
+    )])
+    instance._resumen_original = nuevos
+
+
+@receiver(post_delete, sender=EjecucionPrueba)
+def descontar_ejecucion_eliminada(sender, instance, **kwargs):
+    suites = _suites(instance.caso_prueba_id)
+    clave = clave_ejecucion(suites.get(instance.caso_prueba_id), instance.creacion, instance.estado_id)
+    aplicar_cambios([(clave_aplicable(clave, instance.pk, reconstruccion_en_curso()), None)])
+
+
+@receiver(post_init, sender=CasoPrueba)
+def recordar_suite_caso(sender, instance, **kwargs):
+    instance._resumen_test_suite = _valores(instance, ('test_suite_id',))
+
+
+@receiver(pre_save, sender=CasoPrueba)
+def completar_suite_caso(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk or instance._state.adding:
+        return
+    if getattr(instance, '_resumen_test_suite', None) is None:
+        instance._resumen_test_suite = (
+            CasoPrueba.objects.filter(pk=instance.pk).values('test_suite_id').first()
+        )
+
+
+@receiver(post_save, sender=CasoPrueba)
+def trasladar_resumen_caso(sender, instance, created, raw=False, **kwargs):
+    """Las ejecuciones de un caso movido de Test Suite pasan a contar en el nuevo"""
+    if raw or created:
+        return
+    anterior = (instance._resumen_test_suite or {}).get('test_suite_id')
+    if anterior != instance.test_suite_id:
+        trasladar_caso(instance.pk, anterior, instance.test_suite_id)
+    instance._resumen_test_suite = {'test_suite_id': instance.test_suite_id}
+
+
+@receiver(pre_delete, sender=CasoPrueba)
+def descontar_caso_eliminado(sender, instance, **kwargs):
+    # En pre_delete: después las ejecuciones quedan sin caso (SET_NULL) y ya no se pueden agrupar
+    trasladar_caso(instance.pk, instance.test_suite_id, None)
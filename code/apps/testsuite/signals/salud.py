@@ -0,0 +1,46 @@
+# apps/testsuite/signals/salud.py
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from ..cache import invalidar_salud
+from ..models import CasoPrueba, EjecucionPrueba
+
+
+@receiver(post_init, sender=CasoPrueba)
+def recordar_testsuite_caso(sender, instance, **kwargs):
+    # Se lee __dict__ para no disparar consultas sobre campos diferidos
+    instance._test_suite_original = instance.__dict__.get('test_suite_id')
+
+
+@receiver(post_init, sender=EjecucionPrueba)
+def recordar_caso_ejecucion(sender, instance, **kwargs):
+    instance._caso_prueba_original = instance.__dict__.get('caso_prueba_id')
+
+
+@receiver(post_save, sender=CasoPrueba)
+@receiver(post_delete, sender=CasoPrueba)
+def invalidar_salud_caso(sender, instance, raw=False, **kwargs):
+    """Un caso nuevo, eliminado o movido de Test Suite cambia las métricas de ambos suites"""
+    if raw:
+        return
+    suites = {instance.test_suite_id, getattr(instance, '_test_suite_original', None)} - {None}
+    if suites:
+        invalidar_salud(*suites)
+    instance._test_suite_original = instance.test_suite_id
+
+
+@receiver(post_save, sender=EjecucionPrueba)
+@receiver(post_delete, sender=EjecucionPrueba)
+def invalidar_salud_ejecucion(sender, instance, raw=False, **kwargs):
+    """Las métricas del Test Suite dejan de valer cuando llega o cambia una ejecución"""
+    if raw:
+        return
+    casos = {instance.caso_prueba_id, getattr(instance, '_caso_prueba_original', None)} - {None}
+    if casos:
+        suites = set(
+            CasoPrueba.objects.filter(pk__in=casos, test_suite__isnull=False)
+            .values_list('test_suite_id', flat=True)
+        )
+        if suites:
+            invalidar_salud(*suites)
+    instance._caso_prueba_original = instance.caso_prueba_id
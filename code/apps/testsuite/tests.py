@@ -1,3 +1,410 @@
-from django.test import TestCase
+import json
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.autenticacion.models import Usuario
+from apps.commons.models import Estado, File
+from apps.proyectos.models import Proyecto
+from .junit import ReporteJUnitInvalido, importar_junit
+from .models import CasoPrueba, EjecucionPrueba, ResumenDiarioEjecucion, TestSuite
+from .resumenes import (
+    acumular_rango, aplicar_deltas, avanzar_reconstruccion, iniciar_reconstruccion,
+    reconstruccion_en_curso, terminar_reconstruccion,
+)
+from .salud import salud_testsuite
+from .views import EJECUCIONES_POR_PAGINA, _filtrar_ejecuciones
+
+
+class DatosTestSuiteMixin:
+    """Proyecto, Test Suite, caso y usuario mínimos para las pruebas de la app"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(correo='qa@example.com', nick='qa', password='x')
+        cls.proyecto = Proyecto.objects.create(nombre='Proyecto QA')
+        cls.test_suite = TestSuite.objects.create(nombre='Regresión', descripcion='-', proyecto=cls.proyecto)
+        cls.caso = CasoPrueba.objects.create(
+            nombre='Login', descripcion='-', test_suite=cls.test_suite, version='1'
+        )
+
+
+class DetalleEjecucionTests(DatosTestSuiteMixin, TestCase):
+    """ETag y fragmento en caché del detalle de una ejecución"""
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.ejecucion = EjecucionPrueba.objects.create(
+            caso_prueba=self.caso, ejecutado_por=self.usuario, resultado='OK'
+        )
+        self.url = reverse('testsuite:detalle_ejecucion', args=[self.ejecucion.pk])
+
+    def _detalle(self, etag=None):
+        cabeceras = {'X-Requested-With': 'XMLHttpRequest'}
+        if etag:
+            cabeceras['If-None-Match'] = etag
+        return self.client.get(self.url, headers=cabeceras)
+
+    def test_responde_304_si_la_version_no_cambio(self):
+        respuesta = self._detalle()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._detalle(respuesta['ETag']).status_code, 304)
+
+    def test_cambio_sin_senales_invalida_el_etag(self):
+        etag = self._detalle()['ETag']
+
+        # update() no emite señales: la versión se lee igual de la base de datos
+        EjecucionPrueba.objects.filter(pk=self.ejecucion.pk).update(
+            resultado='Falló', actualizacion=self.ejecucion.actualizacion + timedelta(seconds=1)
+        )
+        respuesta = self._detalle(etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertIn('Falló', respuesta.json()['html'])
+
+    def test_vista_previa_generada_cambia_el_etag(self):
+        archivo = File.objects.create(
+            nombre='captura.png', ruta='contenido/ab/captura.png', estado_previa=File.PREVIA_PENDIENTE
+        )
+        EjecucionPrueba.objects.filter(pk=self.ejecucion.pk).update(archivo=archivo)
+        respuesta = self._detalle()
+        self.assertNotIn('file-thumb', respuesta.json()['html'])
+
+        # El worker de vistas previas (otro proceso) solo actualiza el File
+        File.objects.filter(pk=archivo.pk).update(estado_previa=File.PREVIA_GENERADA)
+        nueva = self._detalle(respuesta['ETag'])
+        self.assertEqual(nueva.status_code, 200)
+        self.assertIn('file-thumb', nueva.json()['html'])
+
+    def test_ejecucion_inexistente(self):
+        self.ejecucion.delete()
+        self.assertEqual(self._detalle().status_code, 404)
+
+
+class SaludTestSuiteTests(DatosTestSuiteMixin, TestCase):
+    """Métricas de salud en caché versionada (apps.commons.cache)"""
+
+    def test_se_recalcula_al_confirmar_un_cambio(self):
+        self.assertEqual(salud_testsuite(self.test_suite.pk)['suite']['total_casos'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CasoPrueba.objects.create(nombre='Logout', descripcion='-', test_suite=self.test_suite, version='1')
+        self.assertEqual(salud_testsuite(self.test_suite.pk)['suite']['total_casos'], 2)
+
+    def test_sin_cambios_se_sirve_desde_la_cache(self):
+        salud = salud_testsuite(self.test_suite.pk)
+        with mock.patch('apps.testsuite.salud.calcular_salud') as calcular:
+            self.assertEqual(salud_testsuite(self.test_suite.pk), salud)
+        calcular.assert_not_called()
+
+
+class DetalleTestSuiteTests(DatosTestSuiteMixin, TestCase):
+    """Detalle del suite: última ejecución por caso con un número de consultas constante"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        ahora = timezone.now()
+        cls.ultimas = {}
+        cls.suite_grande = TestSuite.objects.create(nombre='Grande', descripcion='-', proyecto=cls.proyecto)
+        for suite, casos in ((cls.test_suite, [cls.caso]), (cls.suite_grande, None)):
+            if casos is None:
+                casos = [
+                    CasoPrueba.objects.create(nombre=f'Caso {i}', descripcion='-', test_suite=suite, version='1')
+                    for i in range(25)
+                ]
+            for caso in casos:
+                ejecuciones = [
+                    EjecucionPrueba.objects.create(caso_prueba=caso, ejecutado_por=cls.usuario, resultado='OK')
+                    for _ in range(3)
+                ]
+                # Dos ejecuciones con la misma fecha: el id desempata la más reciente
+                for i, ejecucion in enumerate(ejecuciones):
+                    EjecucionPrueba.objects.filter(pk=ejecucion.pk).update(creacion=ahora - timedelta(hours=0 if i else 1))
+                cls.ultimas[caso.id] = ejecuciones[-1].id
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def _detalle(self, suite):
+        respuesta = self.client.get(reverse('testsuite:detalle_testsuite', args=[suite.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_ultima_ejecucion_de_cada_caso(self):
+        casos = self._detalle(self.suite_grande).context['casos']
+        self.assertEqual(len(casos), 25)
+        for caso in casos:
+            self.assertEqual(caso.ultima_ejecucion.id, self.ultimas[caso.id])
+            self.assertEqual(caso.ultima_ejecucion.ejecutado_por, self.usuario)
+
+    def test_consultas_constantes_con_uno_o_muchos_casos(self):
+        # Se calientan las métricas de salud de ambos suites (caché versionada)
+        self._detalle(self.test_suite)
+        self._detalle(self.suite_grande)
+
+        with CaptureQueriesContext(connection) as un_caso:
+            self._detalle(self.test_suite)
+        with self.assertNumQueries(len(un_caso)):
+            self._detalle(self.suite_grande)
+
+
+class ReconstruccionResumenesTests(DatosTestSuiteMixin, TestCase):
+    """Resúmenes diarios: cambios concurrentes con reconstruir_resumenes y totales no negativos"""
+
+    def setUp(self):
+        self.correcto = Estado.objects.create(nombre='Ejecutado(Correcto)')
+        self.fallo = Estado.objects.create(nombre='Ejecutado(Falló)')
+        self.ejecuciones = [
+            EjecucionPrueba.objects.create(
+                caso_prueba=self.caso, ejecutado_por=self.usuario, resultado='-',
+                estado=self.correcto if i % 2 else self.fallo,
+            )
+            for i in range(6)
+        ]
+
+    def _resumen(self):
+        return dict(
+            ((fila.fecha, fila.estado_id), fila.total)
+            for fila in ResumenDiarioEjecucion.objects.filter(test_suite=self.test_suite, total__gt=0)
+        )
+
+    def _esperado(self):
+        conteo = Counter()
+        for ejecucion in EjecucionPrueba.objects.filter(caso_prueba__test_suite=self.test_suite):
+            conteo[(timezone.localdate(ejecucion.creacion), ejecucion.estado_id or 0)] += 1
+        return dict(conteo)
+
+    def test_cambios_durante_la_reconstruccion(self):
+        self.assertEqual(self._resumen(), self._esperado())
+        ids = [ejecucion.pk for ejecucion in self.ejecuciones]
+
+        limite = iniciar_reconstruccion(self.test_suite.pk)
+        acumular_rango(0, ids[2], self.test_suite.pk)
+        avanzar_reconstruccion(self.test_suite.pk, ids[2], limite)
+
+        # Una ya contada y otra pendiente se eliminan; otra pendiente cambia de estado
+        self.ejecuciones[0].delete()
+        self.ejecuciones[4].delete()
+        self.ejecuciones[5].estado = self.fallo
+        self.ejecuciones[5].save()
+        nueva = EjecucionPrueba.objects.create(
+            caso_prueba=self.caso, ejecutado_por=self.usuario, resultado='-', estado=self.correcto
+        )
+        self.assertGreater(nueva.pk, limite)
+
+        acumular_rango(ids[2], limite, self.test_suite.pk)
+        terminar_reconstruccion()
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_caso_movido_durante_la_reconstruccion(self):
+        otra = TestSuite.objects.create(nombre='Humo', descripcion='-', proyecto=self.proyecto)
+        ids = [ejecucion.pk for ejecucion in self.ejecuciones]
+
+        limite = iniciar_reconstruccion(self.test_suite.pk)
+        acumular_rango(0, ids[2], self.test_suite.pk)
+        avanzar_reconstruccion(self.test_suite.pk, ids[2], limite)
+        self.caso.test_suite = otra
+        self.caso.save()
+        acumular_rango(ids[2], limite, self.test_suite.pk)
+        terminar_reconstruccion()
+
+        self.assertEqual(self._resumen(), {})
+        movidas = ResumenDiarioEjecucion.objects.filter(test_suite=otra).values_list('total', flat=True)
+        self.assertEqual(sum(movidas), len(self.ejecuciones))
+
+    def test_no_se_inician_dos_reconstrucciones(self):
+        iniciar_reconstruccion()
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_resumenes', stdout=StringIO())
+        terminar_reconstruccion()
+
+        call_command('reconstruir_resumenes', stdout=StringIO())
+        self.assertEqual(self._resumen(), self._esperado())
+        self.assertIsNone(reconstruccion_en_curso())
+
+    def test_los_totales_no_quedan_negativos(self):
+        hoy = timezone.localdate()
+        aplicar_deltas({(self.test_suite.pk, hoy, self.correcto.pk): -10, (self.test_suite.pk, hoy, 999): -1})
+        totales = ResumenDiarioEjecucion.objects.filter(
+            test_suite=self.test_suite, fecha=hoy, estado_id__in=[self.correcto.pk, 999]
+        )
+        self.assertEqual(sorted(totales.values_list('total', flat=True)), [0, 0])
+
+
+class PlanConsultasEjecucionesTests(DatosTestSuiteMixin, TestCase):
+    """
+    EXPLAIN de la lista de ejecuciones filtrada por Test Suite: la página se lee ya
+    ordenada por ejecucion_suite_creacion_idx, sin recorrer la tabla ni ordenar en memoria.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.suites = [
+            TestSuite.objects.create(nombre=f'Suite {i}', descripcion='-', proyecto=cls.proyecto) for i in range(10)
+        ]
+        CasoPrueba.objects.bulk_create([
+            CasoPrueba(nombre=f'Caso {i}', descripcion='-', test_suite=cls.suites[i % 10], version='1')
+            for i in range(100)
+        ])
+        casos = list(CasoPrueba.objects.filter(test_suite__in=cls.suites))
+        # bulk_create no pasa por save(): la copia del suite se asigna como en importar_junit
+        EjecucionPrueba.objects.bulk_create([
+            EjecucionPrueba(
+                caso_prueba=casos[i % len(casos)], test_suite_id=casos[i % len(casos)].test_suite_id,
+                ejecutado_por=cls.usuario, resultado='-',
+            )
+            for i in range(3000)
+        ], batch_size=500)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE `{EjecucionPrueba._meta.db_table}`')
+            else:
+                cursor.execute('ANALYZE')
+
+    def _consulta(self, filtros):
+        request = RequestFactory().get('/testsuite/ejecuciones/', filtros)
+        return _filtrar_ejecuciones(request).order_by('-creacion', '-id')[:EJECUCIONES_POR_PAGINA + 1]
+
+    @skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN solo se valida en sqlite y MySQL')
+    def test_filtro_por_testsuite_usa_indice_sin_ordenar_en_memoria(self):
+        consulta = self._consulta({'testsuite': str(self.suites[3].pk)})
+        if connection.vendor == 'mysql':
+            texto = json.dumps(json.loads(consulta.explain(format='JSON')))
+            self.assertNotIn('"access_type": "ALL"', texto, texto)
+            self.assertNotIn('"using_filesort": true', texto, texto)
+            return
+        plan = consulta.explain()
+        tabla = EjecucionPrueba._meta.db_table
+        lineas = [linea for linea in plan.splitlines() if tabla in linea]
+        self.assertTrue(lineas, plan)
+        for linea in lineas:
+            self.assertIn('ejecucion_suite_creacion_idx', linea, plan)
+        self.assertNotIn('TEMP B-TREE', plan, plan)
+
+    def test_filtro_por_testsuite_devuelve_sus_ejecuciones(self):
+        esperadas = list(
+            EjecucionPrueba.objects.filter(caso_prueba__test_suite=self.suites[3])
+            .order_by('-creacion', '-id').values_list('id', flat=True)[:EJECUCIONES_POR_PAGINA + 1]
+        )
+        consulta = self._consulta({'testsuite': str(self.suites[3].pk)})
+        self.assertEqual([ejecucion.id for ejecucion in consulta], esperadas)
+
+
+class SuiteDeEjecucionTests(DatosTestSuiteMixin, TestCase):
+    """La copia de test_suite en EjecucionPrueba sigue al caso"""
+
+    def _ejecutar(self, caso):
+        return EjecucionPrueba.objects.create(caso_prueba=caso, ejecutado_por=self.usuario, resultado='-')
+
+    def test_se_asigna_al_guardar(self):
+        ejecucion = self._ejecutar(self.caso)
+        self.assertEqual(ejecucion.test_suite_id, self.test_suite.id)
+
+        otro = CasoPrueba.objects.create(nombre='Otro', descripcion='-', version='1')
+        ejecucion = EjecucionPrueba.objects.get(pk=ejecucion.pk)
+        ejecucion.caso_prueba_id = otro.id
+        ejecucion.save(update_fields=['caso_prueba'])
+        ejecucion.refresh_from_db()
+        self.assertIsNone(ejecucion.test_suite_id)
+
+    def test_sigue_al_caso_movido_o_eliminado(self):
+        otra_suite = TestSuite.objects.create(nombre='Otra', descripcion='-', proyecto=self.proyecto)
+        ejecuciones = [self._ejecutar(self.caso) for _ in range(3)]
+
+        self.caso.test_suite = otra_suite
+        self.caso.save()
+        self.assertEqual(
+            set(EjecucionPrueba.objects.filter(pk__in=[e.pk for e in ejecuciones]).values_list('test_suite_id', flat=True)),
+            {otra_suite.id},
+        )
+
+        self.caso.delete()
+        self.assertEqual(
+            set(EjecucionPrueba.objects.filter(pk__in=[e.pk for e in ejecuciones]).values_list('test_suite_id', flat=True)),
+            {None},
+        )
+
+
+REPORTE_JUNIT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="login">
+    <testcase classname="login" name="valido" time="0.5"/>
+    <testcase classname="login" name="invalido" time="0.25"><failure message="esperaba 401"/></testcase>
+    <testcase classname="login" name="bloqueo"><skipped/></testcase>
+  </testsuite>
+  <testsuite name="perfil">
+    <testcase name="editar" time="x"><error>Traceback</error></testcase>
+    <testcase classname="login" name="valido" time="0.1"/>
+  </testsuite>
+</testsuites>
+"""
+
+
+class ImportarJUnitTests(DatosTestSuiteMixin, TestCase):
+    """importar_junit: casos deduplicados por nombre, reimportación y reportes inválidos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.estados = {
+            nombre: Estado.objects.create(nombre=nombre)
+            for nombre in ('Ejecutado(Correcto)', 'Ejecutado(Falló)', 'No aplica')
+        }
+
+    def _importar(self, contenido=REPORTE_JUNIT, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return importar_junit(BytesIO(contenido), self.test_suite, usuario=self.usuario, **kwargs)
+
+    def _casos(self):
+        return Counter(CasoPrueba.objects.filter(test_suite=self.test_suite).values_list('nombre', flat=True))
+
+    def test_importa_casos_y_ejecuciones(self):
+        resumen = self._importar(tamano_lote=2)
+        self.assertEqual(resumen['casos_creados'], 4)
+        self.assertEqual(resumen['ejecuciones'], 5)
+        self.assertEqual((resumen['exitoso'], resumen['fallido'], resumen['error'], resumen['omitido']), (2, 1, 1, 1))
+        self.assertEqual(set(self._casos()), {'Login', 'login.valido', 'login.invalido', 'login.bloqueo', 'perfil.editar'})
+
+        fallida = EjecucionPrueba.objects.get(caso_prueba__nombre='login.invalido')
+        self.assertEqual(fallida.resultado, 'Fallido')
+        self.assertEqual(fallida.estado, self.estados['Ejecutado(Falló)'])
+        self.assertIn('esperaba 401', fallida.observaciones)
+        self.assertFalse(EjecucionPrueba.objects.exclude(test_suite=self.test_suite).exists())
+
+    def test_reimportar_no_duplica_casos(self):
+        self._importar()
+        casos = self._casos()
+        resumen = self._importar()
+
+        self.assertEqual(resumen['casos_creados'], 0)
+        self.assertEqual(self._casos(), casos)
+        self.assertTrue(all(total == 1 for total in casos.values()))
+        self.assertEqual(EjecucionPrueba.objects.filter(caso_prueba__test_suite=self.test_suite).count(), 10)
+        totales = ResumenDiarioEjecucion.objects.filter(test_suite=self.test_suite).values_list('total', flat=True)
+        self.assertEqual(sum(totales), 10)
+
+    def test_sin_returning_en_bulk_create(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self._importar(tamano_lote=2)
+        self.assertEqual(
+            EjecucionPrueba.objects.filter(caso_prueba__nombre='login.valido').count(), 2
+        )
+        totales = ResumenDiarioEjecucion.objects.filter(test_suite=self.test_suite).values_list('total', flat=True)
+        self.assertEqual(sum(totales), 5)
+
+    def test_reporte_invalido(self):
+        with self.assertRaises(ReporteJUnitInvalido):
+            self._importar(b'<testsuite><testcase name="a">')
@@ -10,9 +10,12 @@ urlpatterns = [
     path('testsuites/<int:pk>/editar/', views.editar_testsuite, name='editar_testsuite'),
     path('testsuites/<int:pk>/eliminar/', views.eliminar_testsuite, name='eliminar_testsuite'),
     path('testsuites/<int:pk>/detalle/', views.detalle_testsuite, name='detalle_testsuite'),
+    path('testsuites/<int:pk>/tendencia/', views.tendencia_testsuite, name='tendencia_testsuite'),
+    path('testsuites/<int:pk>/importar-junit/', views.importar_junit_testsuite, name='importar_junit'),
     
     # CasoPrueba URLs
     path('casos-prueba/', views.lista_casos_prueba, name='lista_casos'),
+    path('casos-prueba/autocompletar/', views.autocompletar_casos, name='autocompletar_casos'),
     path('casos-prueba/crear/', views.crear_caso_prueba, name='crear_caso_prueba'),
     path('casos-prueba/<int:pk>/editar/', views.editar_caso_prueba, name='editar_caso_prueba'),
     path('casos-prueba/<int:pk>/eliminar/', views.eliminar_caso_prueba, name='eliminar_caso_prueba'),
@@ -33,5 +36,6 @@ urlpatterns = [
     path('entornos/<int:pk>/eliminar/', views.eliminar_entorno, name='eliminar_entorno'),
     
     path('descargar-archivo/<int:pk>/', views.descargar_archivo, name='descargar_archivo'),
+    path('ejecuciones/<int:pk>/descargar/', views.descargar_archivo_ejecucion, name='descargar_archivo_ejecucion'),
 
 ]
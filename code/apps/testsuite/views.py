@@ -1,14 +1,31 @@
+from datetime import datetime, time, timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.template.loader import render_to_string
-from django.db.models import Count
-from django.urls import reverse
+from django.db.models import OuterRef, Subquery
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
 
 from apps.commons.models import Extension, File
+from apps.commons.descargas import respuesta_archivo
+from apps.commons.archivos import guardar_archivo
+from apps.commons.subidas import archivo_de_subida
+from apps.commons.paginacion import paginar_keyset, contar_estimado, CursorInvalido
+from .catalogos import catalogo_estados, catalogo_testsuites
+from .cache import (
+    TIEMPO_FRAGMENTO, clave_fragmento_ejecucion, etag_ejecucion, version_vigente,
+)
 from .models import TestSuite, Entorno, CasoPrueba, EjecucionPrueba
 from .forms import TestSuiteForm, EntornoForm, CasoPruebaForm, EjecucionPruebaForm
+from .junit import ReporteJUnitInvalido, importar_junit
+from .resumenes import DIAS_TENDENCIA, tendencia_diaria
+from .salud import salud_testsuite
 from django.http import FileResponse, Http404
 from django.conf import settings
 import os
@@ -20,6 +37,14 @@ import os
 from apps.commons.models import File 
 
 
+CASOS_POR_PAGINA = 50
+EJECUCIONES_POR_PAGINA = 30
+AUTOCOMPLETAR_LIMITE = 10
+MAX_DIAS_TENDENCIA = 366
+
+User = get_user_model()
+
+
 @login_required
 def lista_testsuites(request):
     testsuites = TestSuite.objects.all().select_related('proyecto')
@@ -74,23 +99,161 @@ def eliminar_testsuite(request, pk):
 
 @login_required
 def detalle_testsuite(request, pk):
-    testsuite = get_object_or_404(TestSuite, pk=pk)
+    testsuite = get_object_or_404(TestSuite.objects.select_related('proyecto'), pk=pk)
+    # Id de la ejecución más reciente de cada caso: una subconsulta correlacionada
+    # que se resuelve con el índice (caso_prueba, creacion, id)
+    ultima_ejecucion = EjecucionPrueba.objects.filter(caso_prueba=OuterRef('pk')).order_by('-creacion', '-id')
+    # El conteo de ejecuciones por caso viene en las métricas de salud (sin GROUP BY por página)
     casos_prueba = CasoPrueba.objects.filter(test_suite=testsuite).select_related('estado', 'entorno').annotate(
-        num_ejecuciones=Count('ejecucionprueba')
+        ultima_ejecucion_id=Subquery(ultima_ejecucion.values('id')[:1])
     )
+    
+    # Con miles de casos se muestra una página; las métricas salen de la caché del suite
+    try:
+        pagina = paginar_keyset(casos_prueba, request.GET.get('cursor'), CASOS_POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(casos_prueba, None, CASOS_POR_PAGINA)
+    
+    # Las últimas ejecuciones de toda la página se traen en una sola consulta
+    ultimas = EjecucionPrueba.objects.select_related('estado', 'ejecutado_por').in_bulk(
+        [caso.ultima_ejecucion_id for caso in pagina['objetos'] if caso.ultima_ejecucion_id]
+    )
+    salud = salud_testsuite(testsuite.pk)
+    for caso in pagina['objetos']:
+        caso.ultima_ejecucion = ultimas.get(caso.ultima_ejecucion_id)
+        caso.salud = salud['casos'].get(caso.id)
+    
+    mas_inestables = CasoPrueba.objects.in_bulk(salud['suite']['mas_inestables'])
+    inestables = [
+        (mas_inestables[caso_id], salud['casos'][caso_id])
+        for caso_id in salud['suite']['mas_inestables'] if caso_id in mas_inestables
+    ]
+    tendencia = tendencia_diaria(testsuite.pk)
     form_caso = CasoPruebaForm(initial={'test_suite': testsuite})
     
     context = {
         'testsuite': testsuite,
-        'casos': casos_prueba,
+        'casos': pagina['objetos'],
+        'cursor_siguiente': pagina['next'],
+        'cursor_anterior': pagina['prev'],
+        'salud': salud['suite'],
+        'inestables': inestables,
+        'tendencia': tendencia,
+        'maximo_tendencia': max(dia['total'] for dia in tendencia) or 1,
         'form': form_caso,
     }
     return render(request, 'testsuite/detalle_testsuite.html', context)
 
 
+@login_required
+def tendencia_testsuite(request, pk):
+    """Ejecuciones por día del Test Suite (desde los resúmenes diarios) para gráficos"""
+    testsuite = get_object_or_404(TestSuite, pk=pk)
+    try:
+        dias = min(max(int(request.GET.get('dias', DIAS_TENDENCIA)), 1), MAX_DIAS_TENDENCIA)
+    except ValueError:
+        dias = DIAS_TENDENCIA
+    
+    tendencia = [
+        {**dia, 'fecha': dia['fecha'].isoformat()}
+        for dia in tendencia_diaria(testsuite.pk, dias)
+    ]
+    return JsonResponse({'testsuite': testsuite.pk, 'dias': tendencia})
+
+
+@login_required
+def importar_junit_testsuite(request, pk):
+    """Importa un reporte JUnit/xUnit XML (multipart 'reporte') en el Test Suite"""
+    testsuite = get_object_or_404(TestSuite, pk=pk)
+    es_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    if request.method != 'POST':
+        return redirect('testsuite:detalle_testsuite', pk=pk)
+    
+    reporte = request.FILES.get('reporte')
+    if not reporte:
+        if es_ajax:
+            return JsonResponse({'error': 'Adjunta un reporte JUnit XML.'}, status=400)
+        messages.error(request, 'Adjunta un reporte JUnit XML.')
+        return redirect('testsuite:detalle_testsuite', pk=pk)
+    
+    # El archivo subido (en disco si es grande) se recorre con iterparse sin cargarlo completo
+    try:
+        resumen = importar_junit(reporte, testsuite, usuario=request.user)
+    except ReporteJUnitInvalido as exc:
+        if es_ajax:
+            return JsonResponse({'error': f'Reporte inválido: {exc}'}, status=400)
+        messages.error(request, f'El archivo no es un reporte JUnit válido: {exc}')
+        return redirect('testsuite:detalle_testsuite', pk=pk)
+    
+    if es_ajax:
+        return JsonResponse(dict(resumen))
+    messages.success(
+        request,
+        f"Reporte importado: {resumen['ejecuciones']} ejecuciones "
+        f"({resumen['exitoso']} exitosas, {resumen['fallido'] + resumen['error']} fallidas, "
+        f"{resumen['omitido']} omitidas) y {resumen['casos_creados']} casos nuevos."
+    )
+    return redirect('testsuite:detalle_testsuite', pk=pk)
+
+
+def _entero(valor):
+    """Id recibido por GET, o None si falta o no es un número"""
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _fecha(valor):
+    """Fecha AAAA-MM-DD recibida por GET, o None si falta o no es válida"""
+    try:
+        return parse_date(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _filtrar_por_fecha(queryset, request):
+    """
+    Filtra 'creacion' por el rango ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD (ambos inclusive).
+    Se compara contra límites de fecha/hora para que el índice sobre creacion aplique.
+    """
+    desde = _fecha(request.GET.get('desde'))
+    hasta = _fecha(request.GET.get('hasta'))
+    if desde:
+        queryset = queryset.filter(creacion__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+    if hasta:
+        queryset = queryset.filter(
+            creacion__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        )
+    return queryset
+
+
+def _filtrar_casos(request):
+    """Aplica los filtros opcionales de la lista de casos (suite, estado, fechas)"""
+    casos = CasoPrueba.objects.select_related('test_suite', 'estado', 'entorno')
+    
+    testsuite_id = _entero(request.GET.get('testsuite'))
+    estado_id = _entero(request.GET.get('estado'))
+    
+    if testsuite_id:
+        casos = casos.filter(test_suite_id=testsuite_id)
+    if estado_id:
+        casos = casos.filter(estado_id=estado_id)
+    
+    return _filtrar_por_fecha(casos, request)
+
+
 @login_required
 def lista_casos_prueba(request):
-    casos = CasoPrueba.objects.all().select_related('test_suite', 'estado', 'entorno')
+    """Lista de casos paginada por cursor (-creacion, -id) con filtros indexados"""
+    casos = _filtrar_casos(request)
+    
+    try:
+        pagina = paginar_keyset(casos, request.GET.get('cursor'), CASOS_POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(casos, None, CASOS_POR_PAGINA)
+    
     form = CasoPruebaForm()
     caso_editar = None
     
@@ -99,13 +262,39 @@ def lista_casos_prueba(request):
         form = CasoPruebaForm(instance=caso_editar)
     
     context = {
-        'casos': casos,
+        'casos': pagina['objetos'],
+        'conteo': contar_estimado(casos),
+        'cursor_siguiente': pagina['next'],
+        'cursor_anterior': pagina['prev'],
+        'testsuites': catalogo_testsuites(),
+        'estados': catalogo_estados(),
         'form': form,
         'caso_editar': caso_editar
     }
     return render(request, 'testsuite/casos_prueba.html', context)
 
 
+@login_required
+def autocompletar_casos(request):
+    """Búsqueda por prefijo del nombre de los casos (opcionalmente de un Test Suite)"""
+    termino = request.GET.get('q', '').strip()
+    testsuite_id = _entero(request.GET.get('testsuite'))
+    
+    casos = CasoPrueba.objects.all()
+    if testsuite_id:
+        casos = casos.filter(test_suite_id=testsuite_id)
+    if termino:
+        # Prefijo sin comodín inicial: se resuelve con el índice sobre nombre
+        casos = casos.filter(nombre__istartswith=termino)
+    
+    return JsonResponse({
+        'resultados': [
+            {'id': caso['id'], 'texto': caso['nombre']}
+            for caso in casos.order_by('nombre').values('id', 'nombre')[:AUTOCOMPLETAR_LIMITE]
+        ]
+    })
+
+
 @login_required
 def crear_caso_prueba(request):
     if request.method == 'POST':
@@ -161,11 +350,41 @@ def detalle_caso_prueba(request, pk):
     return render(request, 'testsuite/detalle_caso_prueba.html', context)
 
 
+def _filtrar_ejecuciones(request):
+    """Aplica los filtros opcionales de la lista de ejecuciones (suite, caso, estado, ejecutor, fechas)"""
+    ejecuciones = EjecucionPrueba.objects.select_related(
+        'caso_prueba', 'ejecutado_por', 'estado', 'archivo'
+    )
+    
+    testsuite_id = _entero(request.GET.get('testsuite'))
+    caso_id = _entero(request.GET.get('caso'))
+    estado_id = _entero(request.GET.get('estado'))
+    usuario_id = _entero(request.GET.get('ejecutado_por'))
+    
+    if caso_id:
+        ejecuciones = ejecuciones.filter(caso_prueba_id=caso_id)
+    elif testsuite_id:
+        # Por la copia del suite en la ejecución: ejecucion_suite_creacion_idx lee la
+        # página ya ordenada, sin join con los casos ni orden en memoria
+        ejecuciones = ejecuciones.filter(test_suite_id=testsuite_id)
+    if estado_id:
+        ejecuciones = ejecuciones.filter(estado_id=estado_id)
+    if usuario_id:
+        ejecuciones = ejecuciones.filter(ejecutado_por_id=usuario_id)
+    
+    return _filtrar_por_fecha(ejecuciones, request)
+
+
 @login_required
 def lista_ejecuciones(request):
-    ejecuciones = EjecucionPrueba.objects.all().select_related(
-        'caso_prueba', 'ejecutado_por', 'estado'
-    )
+    """Lista de ejecuciones paginada por cursor (-creacion, -id) con filtros indexados"""
+    ejecuciones = _filtrar_ejecuciones(request)
+    
+    try:
+        pagina = paginar_keyset(ejecuciones, request.GET.get('cursor'), EJECUCIONES_POR_PAGINA)
+    except CursorInvalido:
+        pagina = paginar_keyset(ejecuciones, None, EJECUCIONES_POR_PAGINA)
+    
     form = EjecucionPruebaForm()
     ejecucion_editar = None
     
@@ -173,8 +392,23 @@ def lista_ejecuciones(request):
         ejecucion_editar = get_object_or_404(EjecucionPrueba, pk=request.GET['editar'])
         form = EjecucionPruebaForm(instance=ejecucion_editar)
     
+    # Nombres de los filtros que no tienen un catálogo en la página
+    caso_filtrado = None
+    if _entero(request.GET.get('caso')):
+        caso_filtrado = CasoPrueba.objects.filter(pk=_entero(request.GET.get('caso'))).only('nombre').first()
+    usuario_filtrado = None
+    if _entero(request.GET.get('ejecutado_por')):
+        usuario_filtrado = User.objects.filter(pk=_entero(request.GET.get('ejecutado_por'))).first()
+    
     context = {
-        'ejecuciones': ejecuciones,
+        'ejecuciones': pagina['objetos'],
+        'conteo': contar_estimado(ejecuciones),
+        'cursor_siguiente': pagina['next'],
+        'cursor_anterior': pagina['prev'],
+        'testsuites': catalogo_testsuites(),
+        'estados': catalogo_estados(),
+        'caso_filtrado': caso_filtrado,
+        'usuario_filtrado': usuario_filtrado,
         'form': form,
         'ejecucion_editar': ejecucion_editar
     }
@@ -188,13 +422,12 @@ def crear_ejecucion(request):
         caso = CasoPrueba.objects.get(pk=caso_id)
 
         archivo_subido = request.FILES.get("archivo_upload")
-        archivo_obj = None
+        # Los archivos grandes llegan ya ensamblados por la subida por bloques
+        archivo_obj = archivo_de_subida(request.POST.get("subida"), request.user)
 
-        if archivo_subido:
-            # Guardar el archivo en File.ruta
-            archivo_obj = File.objects.create(
-                ruta=archivo_subido
-            )
+        if archivo_obj is None and archivo_subido:
+            # Se guarda por contenido: una subida repetida reutiliza el mismo File
+            archivo_obj = guardar_archivo(archivo_subido)
 
         ejecucion = EjecucionPrueba.objects.create(
             caso_prueba=caso,
@@ -214,22 +447,14 @@ def editar_ejecucion(request, pk):
 
     if request.method == 'POST':
         archivo_upload = request.FILES.get('archivo_upload')
+        archivo_subida = archivo_de_subida(request.POST.get('subida'), request.user)
 
-        if archivo_upload:
-            # Eliminar archivo anterior si existe
-            if ejecucion.archivo:
-                try:
-                    if ejecucion.archivo.ruta:
-                        ejecucion.archivo.ruta.delete()
-                    ejecucion.archivo.delete()
-                except:
-                    pass
-
-            # Crear nuevo File
-            archivo_obj = File.objects.create(
-                ruta=archivo_upload
-            )
-            ejecucion.archivo = archivo_obj
+        if archivo_subida:
+            ejecucion.archivo = archivo_subida
+        elif archivo_upload:
+            # El archivo anterior puede estar compartido con otros registros: no se
+            # borra aquí, pierde una referencia al guardar y lo elimina la recolección
+            ejecucion.archivo = guardar_archivo(archivo_upload)
 
         # Actualizar campos restantes
         ejecucion.estado_id = request.POST.get("estado")
@@ -254,113 +479,52 @@ def eliminar_ejecucion(request, pk):
 
 @login_required
 def detalle_ejecucion(request, pk):
-    ejecucion = get_object_or_404(EjecucionPrueba, pk=pk)
+    """
+    Fragmento HTML del detalle de una ejecución para el modal (XHR).
     
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        
-        # -----------------------------
-        # SECCIÓN DE ARCHIVO ADJUNTO - SIEMPRE AMBOS BOTONES
-        # -----------------------------
-        archivo_html = ''
-
+    El fragmento se cachea por versión (actualizacion y estado de la vista previa)
+    y se responde con ETag. La versión se lee con una consulta de una fila por
+    clave primaria: si If-None-Match coincide se devuelve 304 sin cargar ni
+    renderizar el detalle.
+    """
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return redirect('testsuite:lista_ejecuciones')
+    
+    version = version_vigente(pk)
+    if version is None:
+        raise Http404("La ejecución no existe.")
+    etag = etag_ejecucion(pk, version)
+    
+    respuesta = get_conditional_response(request, etag=etag)
+    if respuesta is not None:
+        return _cabeceras_detalle(respuesta, etag)
+    
+    clave = clave_fragmento_ejecucion(pk, version)
+    html = cache.get(clave)
+    if html is None:
+        ejecucion = get_object_or_404(
+            EjecucionPrueba.objects.select_related('caso_prueba', 'ejecutado_por', 'estado', 'archivo'),
+            pk=pk
+        )
+        archivo_nombre = ''
         if ejecucion.archivo and ejecucion.archivo.ruta:
-            # Construimos la URL correcta para descargar el archivo
-            archivo_nombre = os.path.basename(ejecucion.archivo.ruta.name)
-            url_descarga = reverse('testsuite:descargar_archivo', args=[ejecucion.archivo.id])
-            archivo_url = ejecucion.archivo.ruta.url
-            
-            # Determinar extensión
-            extension = archivo_nombre.split('.')[-1].lower()
-
-            # SIEMPRE MOSTRAR AMBOS BOTONES (Vista Previa + Descargar)
-            botones_html = f"""
-                <button onclick="previewFile('{archivo_url}', '{archivo_nombre}')" class="btn-secondary btn-sm">
-                    <i class="fas fa-eye"></i> Vista Previa
-                </button>
-                <a href="{url_descarga}" class="btn-primary btn-sm">
-                    <i class="fas fa-download"></i> Descargar
-                </a>
-            """
-
-            archivo_html = f"""
-            <div class="detail-section">
-                <h3><i class="fas fa-paperclip"></i> Archivos Adjuntos</h3>
-                <div class="file-list">
-                    <div class="file-item">
-                        <div class="file-icon">
-                            <i class="fas fa-file-alt"></i>
-                        </div>
-                        <div class="file-info">
-                            <span class="file-name">{archivo_nombre}</span>
-                            <span class="file-size text-muted">Tipo: {extension.upper()}</span>
-                        </div>
-                        <div class="file-actions">
-                            {botones_html}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            """
-        else:
-            archivo_html = """
-            <div class="detail-section">
-                <h3><i class="fas fa-paperclip"></i> Archivos Adjuntos</h3>
-                <div class="empty-files">
-                    <i class="fas fa-folder-open"></i>
-                    <p class="text-muted">No hay archivos adjuntos para esta ejecución</p>
-                </div>
-            </div>
-            """
-
-        # -----------------------------
-        # CONTENIDO PRINCIPAL DEL MODAL
-        # -----------------------------
-        html = f"""
-        <div class="detalle-info">
-            <div class="detail-section">
-                <h3><i class="fas fa-info-circle"></i> Información de la Ejecución</h3>
-                <div class="info-grid">
-                    <div class="info-row">
-                        <span class="info-label"><i class="fas fa-clipboard-list"></i> Caso de Prueba:</span>
-                        <span class="info-value">{ejecucion.caso_prueba.nombre if ejecucion.caso_prueba else 'N/A'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label"><i class="fas fa-user"></i> Ejecutado Por:</span>
-                        <span class="info-value">{str(ejecucion.ejecutado_por) if ejecucion.ejecutado_por else 'N/A'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label"><i class="fas fa-tag"></i> Estado:</span>
-                        <span class="info-value">
-                            <span class="badge badge-{ejecucion.estado.nombre.lower() if ejecucion.estado else 'secondary'}">
-                                {ejecucion.estado.nombre if ejecucion.estado else 'N/A'}
-                            </span>
-                        </span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label"><i class="fas fa-check-circle"></i> Resultado:</span>
-                        <span class="info-value">
-                            <span class="badge badge-resultado-{ejecucion.resultado.lower() if ejecucion.resultado else 'pendiente'}">
-                                {ejecucion.resultado or 'N/A'}
-                            </span>
-                        </span>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="detail-section">
-                <h3><i class="fas fa-clipboard"></i> Observaciones</h3>
-                <div class="observaciones-content">
-                    <p>{ejecucion.observaciones or '<em class="text-muted">Sin observaciones registradas</em>'}</p>
-                </div>
-            </div>
-            
-            {archivo_html}
-        </div>
-        """
-
-        return JsonResponse({'html': html})
+            archivo_nombre = ejecucion.archivo.nombre_descarga
+        html = render_to_string('testsuite/partials/detalle_ejecucion.html', {
+            'ejecucion': ejecucion,
+            'archivo_nombre': archivo_nombre,
+            'archivo_extension': archivo_nombre.rsplit('.', 1)[-1] if '.' in archivo_nombre else '',
+        })
+        cache.set(clave, html, TIEMPO_FRAGMENTO)
     
-    return redirect('testsuite:lista_ejecuciones')
+    return _cabeceras_detalle(JsonResponse({'html': html}), etag)
+
+
+def _cabeceras_detalle(respuesta, etag):
+    respuesta['ETag'] = etag
+    # El navegador guarda la respuesta pero revalida cada vez con If-None-Match
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    patch_vary_headers(respuesta, ['X-Requested-With'])
+    return respuesta
 
 
 @login_required
@@ -421,19 +585,14 @@ def eliminar_entorno(request, pk):
 
 @login_required
 def descargar_archivo_ejecucion(request, pk):
-    ejecucion = get_object_or_404(EjecucionPrueba, pk=pk)
+    ejecucion = get_object_or_404(EjecucionPrueba.objects.select_related('archivo'), pk=pk)
 
     # Verificamos que tenga archivo
-    if not ejecucion.archivo or not ejecucion.archivo.ruta:
+    if not ejecucion.archivo:
         raise Http404("El archivo no existe")
 
-    ruta_fisica = ejecucion.archivo.ruta.path
-    nombre_descarga = os.path.basename(ruta_fisica)
-
-    if not os.path.exists(ruta_fisica):
-        raise Http404("El archivo no está en el servidor")
-
-    return FileResponse(open(ruta_fisica, 'rb'), as_attachment=True, filename=nombre_descarga)
+    archivo = ejecucion.archivo
+    return respuesta_archivo(request, archivo.ruta, nombre=archivo.nombre_descarga, etag=archivo.sha256)
 
 
 @login_required
@@ -441,17 +600,6 @@ def descargar_archivo(request, pk):
     # Obtener el objeto File
     file_obj = get_object_or_404(File, pk=pk)
 
-    if not file_obj.ruta:
-        raise Http404("El archivo no está asociado en la base de datos.")
-
-    file_path = file_obj.ruta.path
-
-    # Validar que el archivo exista en el filesystem
-    if not os.path.exists(file_path):
-        raise Http404("El archivo no fue encontrado en el servidor.")
-
-    # Leer archivo y responder para descarga
-    with open(file_path, 'rb') as f:
-        response = HttpResponse(f.read(), content_type="application/octet-stream")
-        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
-        return response
\ No newline at end of file
+    # Se transmite por bloques (o lo entrega el servidor web) sin leerlo completo en memoria
+    # El hash del contenido sirve de ETag (los archivos antiguos usan el de os.stat)
+    return respuesta_archivo(request, file_obj.ruta, nombre=file_obj.nombre_descarga, etag=file_obj.sha256)
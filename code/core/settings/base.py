@@ -143,3 +143,43 @@ STATICFILES_DIRS = [
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# --- CACHÉ ---
+# Catálogos y métricas se leen en cada request y se invalidan por señales
+# incrementando versiones en la caché. En producción con varios procesos (workers web
+# y comandos) se debe definir CACHE_REDIS_URL para que la invalidación llegue a todos
+# (requiere el paquete redis). Sin ella se usa la caché en memoria de cada proceso: los
+# demás procesos ven el cambio cuando vence la entrada (TIEMPO_CATALOGO, TIEMPO_SALUD).
+# No se usa DatabaseCache: cada lectura sería una consulta más en las vistas que la caché
+# debe aliviar (commons.0005_tabla_cache solo crea su tabla si se configura a mano).
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# --- DESCARGAS DE ARCHIVOS ---
+# None: Django transmite el archivo por bloques. 'x-accel' (nginx) o 'x-sendfile'
+# (Apache/lighttpd) delegan el envío de los bytes al servidor web.
+DESCARGAS_OFFLOAD = os.environ.get('DESCARGAS_OFFLOAD') or None
+# Location interna de nginx con alias a MEDIA_ROOT, p. ej.:
+#   location /media-protegida/ { internal; alias /ruta/a/media/; }
+DESCARGAS_ACCEL_PREFIJO = '/media-protegida/'
+DESCARGAS_TAMANO_BLOQUE = 64 * 1024
+
+# --- SUBIDAS POR BLOQUES ---
+# Los archivos grandes se envían en bloques reanudables (apps.commons.subidas); los
+# bloques recibidos se guardan aquí hasta ensamblar el archivo.
+SUBIDAS_DIRECTORIO = os.path.join(MEDIA_ROOT, 'subidas')
+SUBIDAS_TAMANO_BLOQUE = 5 * 1024 * 1024
+SUBIDAS_TAMANO_MAXIMO = 2 * 1024 * 1024 * 1024
+# Horas tras las que se eliminan las sesiones de subida (ver limpiar_subidas)
+SUBIDAS_EXPIRACION_HORAS = 24
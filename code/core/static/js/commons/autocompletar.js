@@ -0,0 +1,92 @@
+// Autocompletado para los <select data-autocompletar="url"> (widget SelectAutocompletar).
+// El select solo trae la opción elegida; al escribir en el buscador se consultan
+// las coincidencias al servidor y se reemplazan las opciones. Si el select indica
+// data-proyecto o data-proyecto-campo, la búsqueda se limita a ese proyecto.
+(function() {
+    function requiereProyecto(select) {
+        return Boolean(select.dataset.proyecto || select.dataset.proyectoCampo);
+    }
+
+    function etiqueta(resultado) {
+        return resultado.texto || `${resultado.nick} (${resultado.correo})`;
+    }
+
+    function proyectoDe(select) {
+        if (select.dataset.proyecto) {
+            return select.dataset.proyecto;
+        }
+        const campo = select.dataset.proyectoCampo && document.getElementById(select.dataset.proyectoCampo);
+        return campo ? campo.value : '';
+    }
+
+    function reemplazarOpciones(select, resultados) {
+        const seleccionada = select.options[select.selectedIndex];
+        const conservar = Array.from(select.options).filter(
+            opcion => opcion.value === '' || opcion === seleccionada
+        );
+        select.innerHTML = '';
+        conservar.forEach(opcion => select.appendChild(opcion));
+        resultados.forEach(resultado => {
+            if (seleccionada && String(resultado.id) === seleccionada.value) {
+                return;
+            }
+            const opcion = document.createElement('option');
+            opcion.value = resultado.id;
+            opcion.textContent = etiqueta(resultado);
+            select.appendChild(opcion);
+        });
+    }
+
+    function iniciar(select) {
+        const buscador = document.createElement('input');
+        buscador.type = 'search';
+        buscador.className = 'form-control';
+        const textoBuscar = select.dataset.placeholder || 'Buscar por nick o correo';
+        buscador.placeholder = textoBuscar;
+        buscador.autocomplete = 'off';
+        select.parentNode.insertBefore(buscador, select);
+
+        let temporizador = null;
+        function consultar() {
+            const params = new URLSearchParams({ q: buscador.value.trim() });
+            if (requiereProyecto(select)) {
+                const proyecto = proyectoDe(select);
+                if (!proyecto) {
+                    buscador.placeholder = 'Selecciona un proyecto para buscar';
+                    reemplazarOpciones(select, []);
+                    return;
+                }
+                buscador.placeholder = textoBuscar;
+                params.set('proyecto', proyecto);
+            }
+            fetch(`${select.dataset.autocompletar}?${params}`)
+                .then(response => response.json())
+                .then(data => reemplazarOpciones(select, data.resultados));
+        }
+
+        buscador.addEventListener('input', function() {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(consultar, 250);
+        });
+        // Primeras coincidencias del proyecto al entrar al campo
+        buscador.addEventListener('focus', consultar);
+        select.addEventListener('focus', function() {
+            if (select.options.length <= 2) {
+                consultar();
+            }
+        });
+
+        const campoProyecto = select.dataset.proyectoCampo && document.getElementById(select.dataset.proyectoCampo);
+        if (campoProyecto) {
+            campoProyecto.addEventListener('change', function() {
+                select.value = '';
+                buscador.value = '';
+                reemplazarOpciones(select, []);
+            });
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('select[data-autocompletar]').forEach(iniciar);
+    });
+})();
@@ -0,0 +1,121 @@
+// Subida por bloques para los <input type="file" data-subida="url"> (apps.commons.subidas).
+// Al enviar el formulario el archivo se sube en bloques con su SHA-256, se ensambla
+// en el servidor y el formulario se envía solo con el id de la subida (campo oculto
+// data-subida-campo, por defecto "subida"). Si la conexión se corta, al volver a
+// enviar se retoma desde los bloques faltantes. Sin crypto.subtle (sitios sin HTTPS)
+// el formulario se envía como siempre, con el archivo completo.
+(function() {
+    const REINTENTOS = 3;
+
+    function claveLocal(archivo) {
+        return `subida:${archivo.name}:${archivo.size}:${archivo.lastModified}`;
+    }
+
+    async function sha256(blob) {
+        const resumen = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return Array.from(new Uint8Array(resumen), byte => byte.toString(16).padStart(2, '0')).join('');
+    }
+
+    async function pedir(url, opciones) {
+        const response = await fetch(url, opciones);
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            throw new Error(data.error || `Error ${response.status}`);
+        }
+        return data;
+    }
+
+    async function obtenerSesion(base, archivo, token) {
+        const guardada = localStorage.getItem(claveLocal(archivo));
+        if (guardada) {
+            try {
+                return await pedir(`${base}${guardada}/`);
+            } catch (error) {
+                localStorage.removeItem(claveLocal(archivo));
+            }
+        }
+        const datos = new FormData();
+        datos.append('nombre', archivo.name);
+        datos.append('tamano', archivo.size);
+        const sesion = await pedir(base, { method: 'POST', headers: { 'X-CSRFToken': token }, body: datos });
+        localStorage.setItem(claveLocal(archivo), sesion.id);
+        return sesion;
+    }
+
+    async function enviarBloque(url, bloque, token) {
+        const checksum = await sha256(bloque);
+        for (let intento = 1; ; intento++) {
+            try {
+                return await pedir(url, {
+                    method: 'PUT',
+                    headers: { 'X-CSRFToken': token, 'X-Checksum-Sha256': checksum },
+                    body: bloque,
+                });
+            } catch (error) {
+                if (intento >= REINTENTOS) {
+                    throw error;
+                }
+                await new Promise(resolver => setTimeout(resolver, 1000 * intento));
+            }
+        }
+    }
+
+    async function subir(base, archivo, token, progreso) {
+        const sesion = await obtenerSesion(base, archivo, token);
+        if (!sesion.completa) {
+            const recibidos = new Set(sesion.recibidos);
+            for (let indice = 0; indice < sesion.total_bloques; indice++) {
+                if (!recibidos.has(indice)) {
+                    const inicio = indice * sesion.tamano_bloque;
+                    await enviarBloque(
+                        `${base}${sesion.id}/bloques/${indice}/`,
+                        archivo.slice(inicio, inicio + sesion.tamano_bloque),
+                        token
+                    );
+                }
+                progreso(indice + 1, sesion.total_bloques);
+            }
+            await pedir(`${base}${sesion.id}/completar/`, { method: 'POST', headers: { 'X-CSRFToken': token } });
+        }
+        localStorage.removeItem(claveLocal(archivo));
+        return sesion.id;
+    }
+
+    function iniciar(input) {
+        const form = input.form;
+        const campo = form && form.elements[input.dataset.subidaCampo || 'subida'];
+        if (!campo || !window.crypto || !crypto.subtle) {
+            return;
+        }
+        const estado = document.createElement('small');
+        estado.className = 'form-text text-muted';
+        input.insertAdjacentElement('afterend', estado);
+
+        form.addEventListener('submit', async function(evento) {
+            const archivo = input.files[0];
+            if (!archivo || evento.defaultPrevented) {
+                return;
+            }
+            evento.preventDefault();
+            const botones = form.querySelectorAll('[type="submit"]');
+            botones.forEach(boton => boton.disabled = true);
+            const token = form.querySelector('[name="csrfmiddlewaretoken"]').value;
+            try {
+                campo.value = await subir(input.dataset.subida, archivo, token, function(enviados, total) {
+                    estado.textContent = `Subiendo archivo: ${Math.round(100 * enviados / total)}%`;
+                });
+                // El archivo ya está en el servidor: solo se envía el id de la subida
+                input.value = '';
+                estado.textContent = 'Archivo subido';
+                form.submit();
+            } catch (error) {
+                estado.textContent = `No se pudo subir el archivo (${error.message}). Vuelve a enviar para continuar.`;
+                botones.forEach(boton => boton.disabled = false);
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('input[type="file"][data-subida]').forEach(iniciar);
+    });
+})();
@@ -9,6 +9,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('apps.autenticacion.urls')),
     path('bugtracker/', include('apps.bugtracker.urls')),
+    path('archivos/', include('apps.commons.urls')),
     path('historial/', include('apps.historial.urls')),
     path('notificaciones/', include('apps.notificaciones.urls')),
     path('proyectos/', include('apps.proyectos.urls')),